@@ -0,0 +1,206 @@
+# agente_eda.py
+"""
+Execução sem interface (não importa o Streamlit): relatórios de EDA para vários CSVs.
+
+    python -m agente_eda run data/*.csv --out reports/
+    python -m agente_eda run data/*.csv --perguntas q.txt --out reports/ --workers 8
+    python -m agente_eda run grande.parquet --motor duckdb --out reports/
+
+Para cada CSV é criada uma pasta em --out com as tabelas em Parquet, os gráficos em PNG
+e um relatorio.md (pergunta, resposta, conclusão e arquivos gerados).
+Com --motor duckdb/polars o arquivo não é carregado no pandas: as estatísticas básicas
+rodam no motor (utils.motores) e as perguntas que precisam dos dados em memória ficam de fora.
+"""
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+import unicodedata
+from functools import partial
+
+# backend sem janela, escolhido antes de qualquer import do matplotlib
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pandas as pd  # noqa: E402
+
+from utils import charts, dataset, eda, memory, motores, nlp, paralelo  # noqa: E402
+
+PERGUNTAS_PADRAO = [
+    "tipos de dados", "intervalo", "média", "variância", "frequentes", "outliers",
+    "correlação", "dispersão", "tendência temporal", "clusters",
+    "variáveis mais influentes", "distribuição de variáveis", "tabela cruzada",
+]
+
+
+def _slug(texto: str, limite: int = 40) -> str:
+    s = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode()
+    s = re.sub(r"[^a-zA-Z0-9]+", "_", s).strip("_").lower()
+    return s[:limite] or "x"
+
+
+def ler_perguntas(caminho: str) -> list:
+    """Uma pergunta por linha; linhas vazias e iniciadas por '#' são ignoradas."""
+    with open(caminho, encoding="utf-8") as f:
+        return [linha.strip() for linha in f if linha.strip() and not linha.lstrip().startswith("#")]
+
+
+def _gravar_tabela(tabela, caminho: str) -> str:
+    """Parquet com nomes de coluna em texto; colunas mistas que o Arrow recusa viram texto."""
+    tabela = tabela.to_frame() if isinstance(tabela, pd.Series) else tabela.copy()
+    tabela.columns = [str(c) for c in tabela.columns]
+    try:
+        tabela.to_parquet(caminho)
+    except Exception:
+        for c in tabela.columns:
+            if tabela[c].dtype == object:
+                tabela[c] = tabela[c].astype(str)
+        tabela.index = tabela.index.astype(str)
+        tabela.to_parquet(caminho)
+    return caminho
+
+
+def _gravar_png(fig, caminho: str) -> str:
+    with open(caminho, "wb") as f:
+        f.write(charts.para_bytes(fig))
+    return caminho
+
+
+def _exportar(df: pd.DataFrame, base: str, acao, params: dict) -> list:
+    """Grava os artefatos de uma resposta (mesmas ações que o app desenha) e retorna os caminhos."""
+    if acao == "tabela":
+        return [_gravar_tabela(params["data"], f"{base}.parquet")]
+    if acao == "dupla_tabela":
+        caminhos = [_gravar_tabela(params["pct"], f"{base}_pct.parquet"),
+                    _gravar_tabela(params["efeito"], f"{base}_efeito.parquet")]
+        if "metodos" in params:
+            caminhos += [_gravar_tabela(params["metodos"], f"{base}_metodos.parquet"),
+                         _gravar_tabela(params["efeito_metodos"], f"{base}_efeito_metodos.parquet")]
+        return caminhos
+    if acao == "dict_series":
+        longa = pd.DataFrame(
+            [(col, str(valor), int(n)) for col, serie in params["mapa"].items() for valor, n in serie.items()],
+            columns=["coluna", "valor", "contagem"],
+        )
+        return [_gravar_tabela(longa, f"{base}.parquet")]
+    if acao == "serie":
+        return [_gravar_tabela(params["serie"].rename("valor"), f"{base}.parquet")]
+    if acao == "heatmap_corr":
+        return [_gravar_png(charts.heatmap_corr(df), f"{base}.png")]
+    if acao == "scatter":
+        return [_gravar_png(charts.scatter(df, params["x"], params["y"]), f"{base}.png")]
+    if acao == "timeseries":
+        caminhos = [_gravar_png(charts.timeseries(df, params["tcol"], params["ycol"]), f"{base}.png")]
+        if "tendencias" in params:
+            caminhos.append(_gravar_tabela(params["tendencias"], f"{base}_tendencias.parquet"))
+        return caminhos
+    if acao == "hist":
+        return [_gravar_png(charts.hist(df, params["col"]), f"{base}.png")]
+    if acao == "multi_plot":
+        os.makedirs(base, exist_ok=True)
+        arquivos = []
+        for tipo, col in params["resultados"]:
+            fig = charts.hist(df, col) if tipo == "hist" else charts.bar_counts(df, col, topn=20)
+            arquivos.append(_gravar_png(fig, os.path.join(base, f"{tipo}_{_slug(col)}.png")))
+        return arquivos
+    return []
+
+
+def processar(csv: str, saida: str, perguntas: list, otimizar: bool = False, workers_internos: int = None,
+              motor: str = "pandas") -> dict:
+    """Carrega um CSV, responde as perguntas (em lote) e grava o relatório em `saida`."""
+    t0 = time.perf_counter()
+    if workers_internos:
+        paralelo.WORKERS = workers_internos
+    try:
+        os.makedirs(saida, exist_ok=True)
+        memory.clear()
+        intencoes = [nlp.interpretar_pergunta(q) for q in perguntas]
+        if motor == "pandas":
+            df = dataset.carregar(csv, otimizar=otimizar)
+            respostas = eda.responder_lote(df, perguntas, intencoes=intencoes)
+            n_linhas, n_colunas = df.shape
+        else:
+            # sem DataFrame: as respostas do motor são só tabelas (nada para desenhar)
+            df = motores.abrir(csv, motor)
+            respostas = motores.responder_lote(df, perguntas, intencoes=intencoes)
+            n_linhas, n_colunas = df.linhas, len(df.columns)
+
+        linhas = [f"# {os.path.basename(csv)}", "",
+                  f"{n_linhas:,} linhas × {n_colunas} colunas", ""]
+        for i, (q, (texto, acao, params)) in enumerate(zip(perguntas, respostas), 1):
+            arquivos = _exportar(df, os.path.join(saida, f"{i:02d}_{_slug(q)}"), acao, params or {})
+            linhas += [f"## {i}. {q}", "", texto, ""]
+            if params and params.get("conclusion"):
+                linhas += [f"> **Conclusão:** {params['conclusion']}", ""]
+            linhas += [f"- [{os.path.relpath(a, saida)}]({os.path.relpath(a, saida)})" for a in arquivos]
+            linhas.append("")
+        with open(os.path.join(saida, "relatorio.md"), "w", encoding="utf-8") as f:
+            f.write("\n".join(linhas))
+        return {"arquivo": csv, "saida": saida, "linhas": n_linhas, "colunas": n_colunas,
+                "segundos": round(time.perf_counter() - t0, 2), "erro": ""}
+    except Exception as e:  # um CSV com problema não derruba o lote
+        return {"arquivo": csv, "saida": saida, "linhas": None, "colunas": None,
+                "segundos": round(time.perf_counter() - t0, 2), "erro": f"{type(e).__name__}: {e}"}
+
+
+def _pastas(arquivos, out: str) -> list:
+    """Uma pasta por CSV (nome do arquivo; sufixo numérico se dois CSVs tiverem o mesmo nome)."""
+    usadas, pastas = set(), []
+    for a in arquivos:
+        nome = _slug(os.path.splitext(os.path.basename(a))[0], limite=80)
+        final, n = nome, 2
+        while final in usadas:
+            final, n = f"{nome}_{n}", n + 1
+        usadas.add(final)
+        pastas.append(os.path.join(out, final))
+    return pastas
+
+
+def _item(args, perguntas, otimizar, workers_internos, motor):
+    csv, saida = args
+    return processar(csv, saida, perguntas, otimizar, workers_internos, motor)
+
+
+def run(args) -> int:
+    arquivos = sorted({a for padrao in args.csv for a in (glob.glob(padrao) or [padrao])})
+    arquivos = [a for a in arquivos if os.path.isfile(a)]
+    if not arquivos:
+        print("Nenhum CSV encontrado.", file=sys.stderr)
+        return 2
+    perguntas = ler_perguntas(args.perguntas) if args.perguntas else PERGUNTAS_PADRAO
+    workers = max(1, min(args.workers or paralelo.WORKERS, len(arquivos)))
+    # threads por arquivo divididas entre os processos (evita sobrecarregar a máquina)
+    workers_internos = max(1, (os.cpu_count() or 1) // workers)
+
+    os.makedirs(args.out, exist_ok=True)
+    tarefa = partial(_item, perguntas=perguntas, otimizar=args.otimizar, workers_internos=workers_internos,
+                     motor=args.motor)
+    resumo = paralelo.mapear(tarefa, list(zip(arquivos, _pastas(arquivos, args.out))),
+                             workers=workers, backend="process")
+
+    pd.DataFrame(resumo).to_csv(os.path.join(args.out, "resumo.csv"), index=False)
+    for r in resumo:
+        status = f"ERRO {r['erro']}" if r["erro"] else f"{r['linhas']:,} linhas"
+        print(f"{r['arquivo']} → {r['saida']} ({status}, {r['segundos']}s)")
+    return 1 if any(r["erro"] for r in resumo) else 0
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m agente_eda", description="Agente EDA sem interface")
+    sub = ap.add_subparsers(dest="comando", required=True)
+    p = sub.add_parser("run", help="gera relatórios para um ou mais CSVs")
+    p.add_argument("csv", nargs="+", help="arquivos ou padrões glob (ex.: data/*.csv)")
+    p.add_argument("--perguntas", help="arquivo texto com uma pergunta por linha (padrão: bateria básica)")
+    p.add_argument("--out", default="reports", help="pasta de saída")
+    p.add_argument("--workers", type=int, default=None, help="CSVs processados ao mesmo tempo")
+    p.add_argument("--otimizar", action="store_true", help="compacta os tipos na carga")
+    p.add_argument("--motor", choices=motores.MOTORES, default=motores.MOTOR_PADRAO,
+                   help="motor das estatísticas (duckdb/polars leem o arquivo sem carregá-lo no pandas)")
+    args = ap.parse_args(argv)
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
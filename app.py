@@ -1,11 +1,10 @@
 # app.py
+import io
 import os
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-from utils import eda, charts, nlp
+from utils import eda, charts, nlp, dataset, streaming, cruzamento, temporal, instrumentacao, tarefas, correlacao
 from utils.memory import all_md, clear  
 
 # (Opcional) Token da HF se for usar LLM depois
@@ -55,41 +54,149 @@ with st.expander("📖 Manual (passo a passo)"):
     """)
 
 # ---------------------- Helper: preview + expandir ----------------------
-def preview_and_expand(make_fig, label: str, small=(6, 4), big=(11, 7)):
+def preview_and_expand(make_fig, label: str, chave: tuple, key: str, small=(6, 4), big=(11, 7)):
     """
-    Renderiza um preview e um expander com a versão ampliada do mesmo gráfico.
+    Renderiza um preview e, sob demanda, a versão ampliada do mesmo gráfico.
     - make_fig: função que retorna figura matplotlib e aceita 'figsize' como kwarg.
       Ex.: lambda **kw: charts.hist(df, "Amount", **kw)
-    - label: texto do expander
+    - label: texto do botão "ver maior"
+    - chave: (hash do dataset, tipo do gráfico, parâmetros...) → cache das imagens
+    - key: identificador único do widget na página
     - small: tamanho preview
-    - big: tamanho expandido
+    - big: tamanho expandido (só é renderizado quando o usuário pede)
     """
-    fig_small = make_fig(figsize=small)
-    st.pyplot(fig_small)
-    with st.expander(f"🔍 {label} — ver maior"):
-        fig_big = make_fig(figsize=big)
-        st.pyplot(fig_big)
+    png = charts.renderizar(chave, make_fig, small)
+    with instrumentacao.span("st.image"):
+        st.image(png, use_container_width=True)
+    if st.toggle(f"🔍 {label} — ver maior", key=f"zoom-{key}"):
+        st.image(charts.renderizar(chave, make_fig, big), use_container_width=True)
+
+
+@st.fragment(run_every=1)
+def andamento(turn: dict, campo: str, key: str):
+    """
+    Progresso da tarefa `turn[campo]` (utils.tarefas), com cancelar; redesenha a página ao terminar.
+    Cancelar vale só para este turno: a tarefa compartilhada continua para quem mais a pediu.
+    """
+    tarefa = turn[campo]
+    if tarefa is None or tarefa.done():
+        st.rerun()
+    st.progress(tarefa.progresso, text=f"⏳ {tarefa.etapa or 'Calculando'}… ({tarefa.estado})")
+    if st.button("Cancelar", key=key):
+        tarefa.cancelar()
+        turn[campo] = None
+        if campo == "tarefa":
+            turn["texto"] = "Cálculo cancelado."
+        st.rerun()
+
+
+def concluir(turn: dict) -> None:
+    """Passa para o turno a resposta que terminou em segundo plano (a conclusão é gravada nesta sessão)."""
+    for campo in ("tarefa", "refino"):
+        t = turn.get(campo)
+        if t is None or not t.done():
+            continue
+        turn[campo] = None
+        if t.cancelada or t.erro is not None:
+            # refino: a resposta aproximada continua valendo
+            if campo == "tarefa":
+                turn["texto"] = "Cálculo cancelado." if t.cancelada else f"Erro no cálculo: {t.erro}"
+            continue
+        turn["texto"], turn["acao"], turn["params"] = eda.registrar(turn["pergunta"], t.result())
+
+
+def graficos_prontos(turn: dict, dados, dkey: str, resultados, i: int) -> bool:
+    """
+    Pré-renderiza (em paralelo, no cache de imagens) os gráficos do 'multi_plot'. Em datasets
+    grandes isso vira uma tarefa em segundo plano: False enquanto ela não termina.
+    """
+    if len(dados) < eda.SEGUNDO_PLANO:
+        charts.renderizar_distribuicoes(dados, dkey, resultados)
+        return True
+    if "graficos" not in turn:
+        turn["graficos"] = tarefas.submeter(lambda: charts.renderizar_distribuicoes(dados, dkey, resultados),
+                                            chave=("distribuicoes", dkey, tuple(map(tuple, resultados))),
+                                            nome="charts.distribuicoes")
+    t = turn["graficos"]
+    if t is None or t.cancelada:
+        st.caption("Gráficos cancelados.")
+        return False
+    if not t.done():
+        andamento(turn, "graficos", key=f"cancelar-graficos{i}")
+        return False
+    return True
+
+
+def gerado(rotulo: str, selecao: tuple) -> bool:
+    """Botão 'Gerar…' que continua valendo nos reruns seguintes (ex.: ao pedir o 'ver maior')."""
+    if st.button(rotulo):
+        st.session_state["grafico_gerado"] = selecao
+    return st.session_state.get("grafico_gerado") == selecao
 
 # ---------------------- Estado de chat ----------------------
 if "chat" not in st.session_state:
     # cada item: {"pergunta": str, "texto": str, "acao": str|None, "params": dict}
     st.session_state["chat"] = []
 
+# instrumentação desta sessão (interruptores no painel de depuração, no fim do script): vale para
+# o rerun inteiro e as tarefas que ele agenda, sem ligar nada para as demais sessões
+trace_sessao = st.session_state.setdefault("instrumentacao", instrumentacao.Sessao())
+trace_sessao.configurar(st.session_state.get("instrumentar", instrumentacao.ATIVO),
+                        st.session_state.get("instrumentar_memoria", instrumentacao.MEMORIA))
+instrumentacao.usar(trace_sessao)
+
 # ---------------------- Upload ----------------------
 uploaded_file = st.file_uploader("📂 Faça upload de um arquivo CSV", type="csv")
+modo_streaming = st.toggle("Modo streaming (CSV maior que a memória)", value=False)
+otimizar_tipos = st.toggle("Otimizar tipos ao carregar (menos memória)", value=False)
 
 if uploaded_file:
-    df = pd.read_csv(uploaded_file, low_memory=False)
-    st.success(f"Arquivo carregado! {df.shape[0]:,} linhas × {df.shape[1]} colunas.")
-
-    # ordenar por tempo se existir
-    tcol = eda.detectar_tempo(df)
-    if tcol:
-        df = df.sort_values(tcol).reset_index(drop=True)
+    # hash do conteúdo calculado uma vez por upload (o rerun reaproveita)
+    hashes = st.session_state.setdefault("dataset_hash", {})
+    if uploaded_file.file_id not in hashes:
+        hashes[uploaded_file.file_id] = dataset.hash_conteudo(uploaded_file)
+
+    if modo_streaming:
+        # leitura por blocos: resumos em uma passada; o resto do app usa a amostra
+        memoria_mb = st.number_input("Memória máxima para a leitura (MB)", 64, 65536, 512, step=64)
+        perfil = streaming.carregar_streaming(uploaded_file, hashes[uploaded_file.file_id], memoria_mb=memoria_mb)
+        df = perfil.amostra
+        st.success(f"Arquivo lido em blocos! {perfil.linhas:,} linhas × {len(perfil.colunas)} colunas. "
+                   f"Gráficos, clusters e perguntas usam uma amostra de {len(df):,} linhas.")
+
+        with st.expander("⚡ Resumo do arquivo completo (passagem única)", expanded=False):
+            tipos_df, _ = perfil.tipos()
+            st.subheader("Tipos")
+            st.dataframe(tipos_df, use_container_width=True)
+            st.subheader("Intervalo (min/max)")
+            st.dataframe(perfil.intervalo(), use_container_width=True)
+            st.subheader("Tendência central (mediana aproximada)")
+            st.dataframe(perfil.tendencia_central(), use_container_width=True)
+            st.subheader("Variabilidade")
+            st.dataframe(perfil.variabilidade(), use_container_width=True)
+            st.subheader("Outliers IQR (% estimado)")
+            st.dataframe(perfil.outliers_iqr().to_frame("pct_linhas_outlier"), use_container_width=True)
+            st.subheader("Top frequências")
+            for k, series in perfil.frequencias().items():
+                st.markdown(f"**{k}**")
+                st.write(series)
+    else:
+        # leitura + tipagem + ordenação por tempo ficam em cache (memória/disco) por conteúdo
+        df = dataset.carregar(uploaded_file, hashes[uploaded_file.file_id], otimizar=otimizar_tipos)
+        st.success(f"Arquivo carregado! {df.shape[0]:,} linhas × {df.shape[1]} colunas.")
+
+    # identifica o conteúdo nos caches (imagens, estatísticas)
+    dkey = dataset.chave(df)
 
     # --- Visão Geral (rolável) ---
     with st.expander("📑 Visão Geral (clique para abrir)", expanded=False):
         st.caption(f"{df.shape[0]:,} linhas × {df.shape[1]} colunas")
+        relatorio = dataset.relatorio_otimizacao(df)
+        if relatorio is not None:
+            antes, depois = relatorio["Antes (MB)"].sum(), relatorio["Depois (MB)"].sum()
+            st.markdown(f"**Otimização de tipos:** {antes:,.1f} MB → {depois:,.1f} MB "
+                        f"({(1 - depois / max(antes, 1e-9)) * 100:.0f}% de economia)")
+            st.dataframe(relatorio, use_container_width=True, hide_index=True)
         mostrar_tudo = st.toggle("Mostrar todas as linhas (pode ficar lento)", value=False)
         limite = st.slider("Linhas quando NÃO mostrar tudo:", 100, 10000, 2000, step=100)
         df_view = df if mostrar_tudo else df.head(limite)
@@ -110,13 +217,35 @@ if uploaded_file:
         if not st.session_state["chat"]:
             st.caption("Sem interações ainda. Faça uma pergunta abaixo.")
         else:
-            for turn in st.session_state["chat"]:
-                with st.container():
+            for i, turn in enumerate(st.session_state["chat"]):
+                # resposta pesada (ou exata, no lugar da aproximada) que ficou pronta em segundo plano
+                concluir(turn)
+
+                # a primeira exibição da resposta entra na medição da pergunta (painel de depuração)
+                with st.container(), instrumentacao.retomar(turn.pop("trace", None)):
                     st.markdown(f"**Você:** {turn['pergunta']}")
                     st.markdown(f"**Agente:** {turn['texto']}")
+                    if turn.get("tarefa") is not None:
+                        andamento(turn, "tarefa", key=f"cancelar{i}")
 
                     acao = turn["acao"]
                     params = turn["params"] or {}
+                    # respostas aproximadas desenham a partir da mesma amostra usada no cálculo
+                    dados = params.get("dados", df)
+                    dkey_turno = dataset.chave(dados)
+
+                    if params.get("aproximado"):
+                        st.caption(f"≈ Resposta aproximada: amostra de {params['n_amostra']:,} "
+                                   f"de {params['n_total']:,} linhas.")
+                        if "ic" in params:
+                            with st.expander("Intervalos de confiança (95%)", expanded=False):
+                                st.dataframe(params["ic"], use_container_width=True)
+                        if turn.get("refino") is not None:
+                            st.caption("Resposta exata em segundo plano:")
+                            andamento(turn, "refino", key=f"cancelar{i}")
+                        elif st.button("Calcular exato agora", key=f"exato{i}"):
+                            turn["refino"] = eda.refinar(df, turn["pergunta"], params.get("intencao"))
+                            st.rerun()
 
                     if acao == "tabela":
                         st.dataframe(params["data"], use_container_width=True)
@@ -126,6 +255,11 @@ if uploaded_file:
                         st.dataframe(params["pct"], use_container_width=True)
                         st.subheader("Efeito dos outliers (comparação mean/std)")
                         st.dataframe(params["efeito"], use_container_width=True)
+                        if "metodos" in params:
+                            st.subheader("Comparação de métodos (% de linhas fora)")
+                            st.dataframe(params["metodos"], use_container_width=True)
+                            st.subheader("Média/desvio sem os outliers de cada método")
+                            st.dataframe(params["efeito_metodos"], use_container_width=True)
 
                     elif acao == "dict_series":
                         for k, series in params["mapa"].items():
@@ -137,41 +271,49 @@ if uploaded_file:
 
                     elif acao == "heatmap_corr":
                         preview_and_expand(
-                            lambda **kw: charts.heatmap_corr(df, **kw),
-                            label="Mapa de correlação"
+                            lambda **kw: charts.heatmap_corr(dados, **kw),
+                            label="Mapa de correlação",
+                            chave=(dkey_turno, "heatmap_corr", "pearson"), key=f"chat{i}"
                         )
 
                     elif acao == "scatter":
-                        df_num = df.select_dtypes("number")
                         preview_and_expand(
-                            lambda **kw: charts.scatter(df_num, params["x"], params["y"], **kw),
-                            label=f"Dispersão: {params['x']} vs {params['y']}"
+                            lambda **kw: charts.scatter(dados, params["x"], params["y"], **kw),
+                            label=f"Dispersão: {params['x']} vs {params['y']}",
+                            chave=(dkey_turno, "scatter", params["x"], params["y"]), key=f"chat{i}"
                         )
 
                     elif acao == "timeseries":
                         preview_and_expand(
-                            lambda **kw: charts.timeseries(df, params["tcol"], params["ycol"], **kw),
-                            label=f"Série temporal: {params['ycol']} por {params['tcol']}"
+                            lambda **kw: charts.timeseries(dados, params["tcol"], params["ycol"], **kw),
+                            label=f"Série temporal: {params['ycol']} por {params['tcol']}",
+                            chave=(dkey_turno, "timeseries", params["tcol"], params["ycol"]), key=f"chat{i}"
                         )
+                        if "tendencias" in params:
+                            st.caption("Tendência linear de cada coluna (mínimos quadrados sobre todas as linhas)")
+                            st.dataframe(params["tendencias"], use_container_width=True)
 
                     elif acao == "hist":
                         preview_and_expand(
-                            lambda **kw: charts.hist(df, params["col"], **kw),
-                            label=f"Histograma: {params['col']}"
+                            lambda **kw: charts.hist(dados, params["col"], **kw),
+                            label=f"Histograma: {params['col']}",
+                            chave=(dkey_turno, "hist", params["col"]), key=f"chat{i}"
                         )
 
-                    elif acao == "multi_plot":
+                    elif acao == "multi_plot" and graficos_prontos(turn, dados, dkey_turno, params["resultados"], i):
                         for tipo, col in params["resultados"]:
                             st.subheader(f"{col} ({'Numérica' if tipo=='hist' else 'Categórica'})")
                             if tipo == "hist":
                                 preview_and_expand(
-                                    lambda **kw: charts.hist(df, col, **kw),
-                                    label=f"Histograma: {col}"
+                                    lambda **kw: charts.hist(dados, col, **kw),
+                                    label=f"Histograma: {col}",
+                                    chave=(dkey_turno, "hist", col), key=f"chat{i}-{col}"
                                 )
                             elif tipo == "bar":
                                 preview_and_expand(
-                                    lambda **kw: charts.bar_counts(df, col, topn=20, **kw),
-                                    label=f"Top valores: {col}"
+                                    lambda **kw: charts.bar_counts(dados, col, topn=20, **kw),
+                                    label=f"Top valores: {col}",
+                                    chave=(dkey_turno, "bar_counts", col, 20), key=f"chat{i}-{col}"
                                 )
 
                     # Conclusão curta (se veio)
@@ -181,41 +323,55 @@ if uploaded_file:
 
                     st.markdown("---")
 
-        # Entrada + enviar
-        pergunta = st.text_input("Digite sua pergunta ao agente:")
-
-        # Mapeia a categoria (da LLM) para uma frase canônica entendida pelo eda.responder
-        CAT2QUERY = {
-            "tipos": "tipos de dados",
-            "intervalo": "intervalo",
-            "tendencia_central": "tendência central",
-            "variabilidade": "variância",
-            "frequencias": "frequentes",
-            "outliers": "outliers",
-            "correlacao": "correlação",
-            "dispersao": "dispersão",
-            "temporal": "tendência temporal",
-            "clusters": "cluster",
-            "influencia": "influência",
-            "distribuicao": "distribuição",
-            "tabela_cruzada": "tabela cruzada",
-        }
-
-        if st.button("Enviar"):
-            # 1) interpretar com LLM (ou fallback) → categoria
-            categoria = nlp.interpretar_pergunta(pergunta)
-            # 2) transformar a categoria em uma “pergunta canônica” que o eda.responder entende
-            pergunta_canonica = CAT2QUERY.get(categoria, pergunta)
-            # 3) responder com base nessa “pergunta”
-            texto, acao, params = eda.responder(df, pergunta_canonica)
-
-            st.session_state["chat"].append({
-                "pergunta": pergunta,
-                "texto": texto,
-                "acao": acao,
-                "params": params,
-            })
-            st.rerun()
+        # Entrada + enviar (uma pergunta, ou várias de uma vez: uma por linha)
+        em_lote = st.toggle("Várias perguntas (uma por linha)", key="modo_lote")
+        aproximado = st.toggle("Modo aproximado (amostra + intervalos de confiança, exato em segundo plano)",
+                               key="modo_aproximado")
+        estrato = None
+        if aproximado:
+            opcoes = ["(sem estratos)"] + [c for c in df.columns if c not in df.select_dtypes("number").columns]
+            escolha = st.selectbox("Estratificar a amostra por", opcoes, key="estrato_amostra")
+            estrato = None if escolha == opcoes[0] else escolha
+
+        if not em_lote:
+            pergunta = st.text_input("Digite sua pergunta ao agente:")
+
+            if st.button("Enviar"):
+                with instrumentacao.pergunta(pergunta) as trace:
+                    # 1) interpretar com LLM (ou fallback por regras) → categoria
+                    categoria = nlp.interpretar_pergunta(pergunta)
+                    if not aproximado and eda.pesada(df, pergunta, categoria):
+                        # 2a) intenção pesada num dataset grande: tarefa em segundo plano, a página segue usável
+                        turno = {"texto": "Calculando em segundo plano…", "acao": None, "params": {},
+                                 "tarefa": eda.agendar(df, pergunta, categoria)}
+                    else:
+                        # 2) responder com essa intenção (a pergunta original segue para achar colunas citadas)
+                        texto, acao, params = eda.responder(df, pergunta, intencao=categoria,
+                                                            aproximado=aproximado, estrato=estrato)
+                        turno = {"texto": texto, "acao": acao, "params": params,
+                                 # aproximada: a exata já começa a ser calculada em segundo plano
+                                 "refino": eda.refinar(df, pergunta, params.get("intencao"))
+                                 if params.get("aproximado") else None}
+
+                st.session_state["chat"].append({"pergunta": pergunta, **turno, "trace": trace})
+                st.rerun()
+        else:
+            bloco = st.text_area("Cole as perguntas, uma por linha:", height=200)
+
+            if st.button("Enviar todas"):
+                perguntas = [linha.strip() for linha in bloco.splitlines() if linha.strip()]
+                categorias = [nlp.interpretar_pergunta(q) for q in perguntas]
+                # cálculos repetidos entre as perguntas rodam uma vez; respostas na ordem colada
+                with st.spinner(f"Respondendo {len(perguntas)} perguntas..."):
+                    respostas = eda.responder_lote(df, perguntas, intencoes=categorias)
+                for q, (texto, acao, params) in zip(perguntas, respostas):
+                    st.session_state["chat"].append({
+                        "pergunta": q,
+                        "texto": texto,
+                        "acao": acao,
+                        "params": params,
+                    })
+                st.rerun()
 
     # ---- Aba 2: Gráficos sob demanda ----
     with tabs[1]:
@@ -225,53 +381,89 @@ if uploaded_file:
 
         if gtab == "Histograma" and num_cols:
             c = st.selectbox("Coluna numérica", num_cols)
-            if st.button("Gerar histograma"):
+            if gerado("Gerar histograma", ("hist", c)):
                 preview_and_expand(
                     lambda **kw: charts.hist(df, c, **kw),
-                    label=f"Histograma: {c}"
+                    label=f"Histograma: {c}",
+                    chave=(dkey, "hist", c), key="aba-hist"
                 )
 
         if gtab == "Boxplot" and num_cols:
             c = st.selectbox("Coluna numérica", num_cols, key="box")
-            if st.button("Gerar boxplot"):
+            if gerado("Gerar boxplot", ("box", c)):
                 preview_and_expand(
                     lambda **kw: charts.box(df, c, **kw),
-                    label=f"Boxplot: {c}"
+                    label=f"Boxplot: {c}",
+                    chave=(dkey, "box", c), key="aba-box"
                 )
 
         if gtab == "Dispersão" and len(num_cols) >= 2:
-            x = st.selectbox("Eixo X", num_cols, key="x")
-            y = st.selectbox("Eixo Y", num_cols, key="y")
-            if st.button("Gerar dispersão"):
+            # começa pelo par de maior |r| (matriz de correlação em cache, a mesma do heatmap)
+            par = correlacao.par_mais_forte(df)
+            ix, iy = (num_cols.index(par[0]), num_cols.index(par[1])) if par else (0, 1)
+            x = st.selectbox("Eixo X", num_cols, index=ix, key="x")
+            y = st.selectbox("Eixo Y", num_cols, index=iy, key="y")
+            if gerado("Gerar dispersão", ("scatter", x, y)):
                 preview_and_expand(
-                    lambda **kw: charts.scatter(df.select_dtypes("number"), x, y, **kw),
-                    label=f"Dispersão: {x} vs {y}"
+                    lambda **kw: charts.scatter(df, x, y, **kw),
+                    label=f"Dispersão: {x} vs {y}",
+                    chave=(dkey, "scatter", x, y), key="aba-scatter"
                 )
 
         if gtab == "Correlação" and len(num_cols) >= 2:
-            if st.button("Gerar correlação"):
+            metodo = st.radio("Método", ["pearson", "spearman"], horizontal=True, key="corr_metodo")
+            if gerado("Gerar correlação", ("heatmap_corr", metodo)):
                 preview_and_expand(
-                    lambda **kw: charts.heatmap_corr(df, **kw),
-                    label="Mapa de correlação"
+                    lambda **kw: charts.heatmap_corr(df, metodo=metodo, **kw),
+                    label=f"Mapa de correlação ({metodo.capitalize()})",
+                    chave=(dkey, "heatmap_corr", metodo), key="aba-corr"
                 )
 
         if gtab == "Série Temporal":
             tcol_here = eda.detectar_tempo(df)
             if tcol_here and num_cols:
-                y = st.selectbox("Variável (Y)", num_cols, key="tsy")
-                if st.button("Gerar série"):
+                y = st.selectbox("Variável (Y)", [c for c in num_cols if c != tcol_here] or num_cols, key="tsy")
+                datas = temporal.eixo(df, tcol_here).datas
+                # tempo numérico (ex.: segundos, anos): baldes de largura automática
+                freq = st.selectbox("Granularidade", ["auto", "h", "D", "W", "MS"] if datas else ["auto"],
+                                    format_func=lambda f: "automática" if f == "auto" else temporal.descrever(f),
+                                    key="ts_freq")
+                freq = None if freq == "auto" else freq
+                janela = st.number_input("Média móvel (baldes; 0 = sem)", 0, 365, 0, key="ts_janela") or None
+                if gerado("Gerar série", ("timeseries", tcol_here, y, freq, janela)):
                     preview_and_expand(
-                        lambda **kw: charts.timeseries(df, tcol_here, y, **kw),
-                        label=f"Série temporal: {y} por {tcol_here}"
+                        lambda **kw: charts.timeseries(df, tcol_here, y, freq=freq, janela=janela, **kw),
+                        label=f"Série temporal: {y} por {tcol_here}",
+                        chave=(dkey, "timeseries", tcol_here, y, freq, janela), key="aba-ts"
                     )
+                    serie = eda.serie_temporal(df, tcol_here, freq)
+                    st.caption("Tendência linear de cada coluna (mínimos quadrados sobre todas as linhas)")
+                    st.dataframe(serie.tendencia, use_container_width=True)
+                    if st.toggle("Decomposição sazonal", key="ts_decomp"):
+                        preview_and_expand(
+                            lambda **kw: charts.decomposicao(df, tcol_here, y, freq=freq, **kw),
+                            label=f"Decomposição: {y}",
+                            chave=(dkey, "decomposicao", tcol_here, y, freq), key="aba-ts-dec",
+                            small=(8, 6), big=(12, 9)
+                        )
             else:
                 st.info("Não identifiquei coluna temporal + numérica.")
 
         if gtab == "Tabela Cruzada" and len(cat_cols) >= 2:
             a = st.selectbox("Categórica A", cat_cols, key="cta")
             b = st.selectbox("Categórica B", cat_cols, key="ctb")
-            if st.button("Gerar crosstab"):
-                st.dataframe(pd.crosstab(df[a], df[b]), use_container_width=True)
+            top = st.number_input("Categorias mostradas de cada lado (demais em 'Outros')", 2, 500,
+                                  cruzamento.TOP, key="ct_top")
+            if gerado("Gerar crosstab", ("crosstab", a, b, top)):
+                ct = eda.crosstab(df, a, b, top=int(top))
+                st.caption(ct.resumo())
+                if ct.truncada:
+                    st.caption(f"{ct.matriz.shape[0]:,} × {ct.matriz.shape[1]:,} categorias "
+                               f"({ct.matriz.nnz:,} combinações presentes); mostrando as {int(top)} mais frequentes "
+                               f"de cada lado, o resto em '{cruzamento.OUTROS}'.")
+                st.dataframe(ct.tabela, use_container_width=True)
+                st.download_button("Baixar todas as combinações (CSV)", ct.longa().to_csv(index=False).encode("utf-8"),
+                                   file_name=f"crosstab_{a}_{b}.csv", mime="text/csv", key="ct_csv")
 
     # ---- Aba 3: Conclusões acumuladas ----
     with tabs[2]:
@@ -282,3 +474,27 @@ if uploaded_file:
 
 else:
     st.info("Envie um arquivo CSV para começar.")
+
+# ---------------------- Depuração: latência por pergunta ----------------------
+# (no fim do script: a pergunta recém-enviada já aparece com a fase de exibição)
+with st.sidebar.expander("🩺 Depuração: latência por pergunta"):
+    instrumentar = st.toggle("Instrumentar perguntas", value=instrumentacao.ATIVO, key="instrumentar")
+    memoria = st.toggle("Medir pico de memória (tracemalloc; mais lento)", value=instrumentacao.MEMORIA,
+                        key="instrumentar_memoria", disabled=not instrumentar)
+    if instrumentar and memoria:
+        st.caption("Pico de memória: do processo (tracemalloc); spans concorrentes ficam sem pico.")
+
+    recentes = list(reversed(trace_sessao.recentes))
+    if not recentes:
+        st.caption("Nenhuma pergunta instrumentada ainda. Ligue acima e faça uma pergunta.")
+    else:
+        i = st.selectbox("Pergunta", range(len(recentes)), key="trace_escolhido",
+                         format_func=lambda i: f"{recentes[i].texto[:40]} — {recentes[i].ms:,.0f} ms")
+        st.dataframe(recentes[i].tabela(), use_container_width=True, hide_index=True)
+        if recentes[i].caches:
+            st.caption("Caches (acertos/faltas nesta pergunta)")
+            st.dataframe(pd.DataFrame(recentes[i].caches).T, use_container_width=True)
+        buf = io.StringIO()
+        instrumentacao.exportar_jsonl(recentes, buf)
+        st.download_button("Baixar spans (JSONL)", buf.getvalue().encode("utf-8"), file_name="spans.jsonl",
+                           mime="application/jsonl", key="trace_jsonl")
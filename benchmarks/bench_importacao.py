@@ -0,0 +1,115 @@
+# benchmarks/bench_importacao.py
+"""
+Tempo de importação (python -X importtime, cada alvo num interpretador novo) comparado
+com o orçamento em benchmarks/orcamento_importacao.json.
+
+    python benchmarks/bench_importacao.py                 # mede e compara com o orçamento
+    python benchmarks/bench_importacao.py --registrar     # idem + acrescenta ao histórico
+    python benchmarks/bench_importacao.py --detalhar 10   # módulos mais pesados de cada alvo
+
+Cada alvo é a mediana de --repeticoes execuções (depois de uma de aquecimento, descartada);
+um alvo acima do orçamento é medido de novo com o triplo de execuções antes de contar como
+estouro. Os orçamentos têm ~30% de folga sobre o tempo típico: o que se quer pegar é um import
+pesado voltando para o topo (o sklearn sozinho custa ~1 s), não o ruído da máquina.
+
+Sai com código 1 se algum alvo passar do orçamento. O histórico fica em
+benchmarks/historico_importacao.jsonl (uma linha por execução registrada; o commit ganha
+"+alterado" quando a medição inclui mudanças ainda não commitadas).
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ORCAMENTO = os.path.join(RAIZ, "benchmarks", "orcamento_importacao.json")
+HISTORICO = os.path.join(RAIZ, "benchmarks", "historico_importacao.jsonl")
+
+# alvo → código importado; "app" repete os imports do topo do app.py (sem rodar a interface)
+ALVOS = {
+    "app": "import streamlit, pandas; from utils import eda, charts, nlp, dataset, streaming, cruzamento, temporal, instrumentacao, tarefas, correlacao",
+    "agente_eda": "import agente_eda",
+    "utils.eda": "import utils.eda",
+    "utils.charts": "import utils.charts",
+    "utils.nlp": "import utils.nlp",
+    "utils.dataset": "import utils.dataset",
+}
+
+_LINHA = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def _medir(codigo: str) -> tuple:
+    """(ms total dos imports de nível superior, {módulo: ms cumulativo}) numa execução."""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo], cwd=RAIZ,
+                          capture_output=True, text=True, env={**os.environ, "MPLBACKEND": "Agg"})
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    total, modulos = 0, {}
+    for m in _LINHA.finditer(proc.stderr):
+        cumulativo, nivel, nome = int(m.group(2)), len(m.group(3)), m.group(4)
+        modulos[nome] = cumulativo / 1000
+        if nivel == 1:
+            total += cumulativo
+    return total / 1000, modulos
+
+
+def _commit() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                                capture_output=True, text=True).stdout.strip()
+        alterado = subprocess.run(["git", "diff", "--quiet", "HEAD", "--", "."], cwd=RAIZ).returncode != 0
+    except OSError:
+        return ""
+    return f"{commit}+alterado" if commit and alterado else commit
+
+
+def _mediana(codigo: str, repeticoes: int) -> tuple:
+    """(mediana dos totais, módulos da última execução) de `repeticoes` execuções."""
+    medidas = [_medir(codigo) for _ in range(repeticoes)]
+    return statistics.median(m[0] for m in medidas), medidas[-1][1]
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--repeticoes", type=int, default=5, help="mediana de N execuções por alvo")
+    ap.add_argument("--alvos", nargs="+", default=list(ALVOS))
+    ap.add_argument("--registrar", action="store_true", help="acrescenta o resultado ao histórico")
+    ap.add_argument("--detalhar", type=int, default=0, help="mostra os N módulos mais pesados")
+    ap.add_argument("--nota", default="", help="comentário gravado junto no histórico")
+    args = ap.parse_args()
+
+    with open(ORCAMENTO, encoding="utf-8") as f:
+        orcamento = json.load(f)
+
+    resultados, estourou = {}, False
+    print(f"{'alvo':<14}{'mediana':>10}{'orçamento':>12}")
+    for alvo in args.alvos:
+        _medir(ALVOS[alvo])  # aquecimento: a 1ª execução paga o cache de disco/bytecode
+        ms, modulos = _mediana(ALVOS[alvo], args.repeticoes)
+        limite = orcamento.get(alvo)
+        if limite is not None and ms > limite:
+            # confirma antes de acusar: uma rodada ruim da máquina não é regressão
+            ms, modulos = _mediana(ALVOS[alvo], 3 * args.repeticoes)
+        resultados[alvo] = round(ms, 1)
+        status = "" if limite is None else ("  OK" if ms <= limite else "  ACIMA")
+        estourou |= limite is not None and ms > limite
+        print(f"{alvo:<14}{ms:>8.0f}ms{(limite or 0):>10.0f}ms{status}")
+        if args.detalhar:
+            pesados = sorted(modulos.items(), key=lambda kv: -kv[1])
+            for nome, t in [kv for kv in pesados if "." not in kv[0]][:args.detalhar]:
+                print(f"    {nome:<30}{t:>8.0f}ms")
+
+    if args.registrar:
+        with open(HISTORICO, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"data": datetime.now().isoformat(timespec="seconds"), "commit": _commit(),
+                                "python": sys.version.split()[0], "nota": args.nota,
+                                "ms": resultados}, ensure_ascii=False) + "\n")
+    sys.exit(1 if estourou else 0)
+
+
+if __name__ == "__main__":
+    main()
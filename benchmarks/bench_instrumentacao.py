@@ -0,0 +1,71 @@
+# benchmarks/bench_instrumentacao.py
+"""
+Custo da instrumentação (utils.instrumentacao) desligada, ligada e ligada com tracemalloc:
+- por span vazio (limite inferior do custo);
+- por pergunta respondida (nlp.interpretar_pergunta + eda.responder, caches quentes).
+
+    python benchmarks/bench_instrumentacao.py
+    python benchmarks/bench_instrumentacao.py --linhas 200000 --repeticoes 50
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import eda, instrumentacao, nlp  # noqa: E402
+
+PERGUNTAS = ["tipos de dados", "intervalo", "média", "variância", "frequentes", "outliers",
+             "correlação", "variáveis mais influentes", "distribuição de variáveis", "tabela cruzada"]
+
+
+def _span_vazio(n: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(n):
+        with instrumentacao.span("x"):
+            pass
+    return (time.perf_counter() - t0) / n * 1e6
+
+
+def _perguntas(df, repeticoes: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeticoes):
+        for q in PERGUNTAS:
+            with instrumentacao.pergunta(q):
+                eda.responder(df, q, intencao=nlp.interpretar_pergunta(q))
+    return (time.perf_counter() - t0) / (repeticoes * len(PERGUNTAS)) * 1e3
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=100_000)
+    ap.add_argument("--repeticoes", type=int, default=20)
+    ap.add_argument("--spans", type=int, default=200_000)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    df = pd.DataFrame({
+        "a": rng.normal(size=args.linhas), "b": rng.exponential(size=args.linhas),
+        "c": rng.integers(0, 100, args.linhas), "g": rng.choice(list("xyzw"), args.linhas),
+        "h": rng.choice(["p", "q", "r"], args.linhas),
+    })
+    os.environ.pop("HF_TOKEN", None)  # só o roteador local: mede o agente, não a rede
+    _perguntas(df, 1)  # aquece os caches
+
+    print(f"{args.linhas:,} linhas, {len(PERGUNTAS)} perguntas × {args.repeticoes}")
+    print(f"{'modo':<22}{'span vazio (µs)':>18}{'por pergunta (ms)':>20}")
+    for modo in ("desligada", "ligada", "ligada + memória"):
+        instrumentacao.desativar()
+        if modo != "desligada":
+            instrumentacao.ativar(memoria=modo.endswith("memória"))
+        print(f"{modo:<22}{_span_vazio(args.spans):>18.3f}{_perguntas(df, args.repeticoes):>20.3f}")
+    instrumentacao.desativar()
+
+
+if __name__ == "__main__":
+    main()
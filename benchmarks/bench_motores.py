@@ -0,0 +1,114 @@
+# benchmarks/bench_motores.py
+"""
+Compara os motores de utils.motores com o pandas: mesmas tabelas (dentro da tolerância)
+e tempo de cada função.
+
+    python benchmarks/bench_motores.py                        # 1M linhas, CSV gerado (semente fixa)
+    python benchmarks/bench_motores.py --linhas 5000000 --parquet
+    python benchmarks/bench_motores.py --arquivo dados.csv --motores duckdb
+
+Sai com código 1 se algum motor divergir do pandas. Motores não instalados são pulados.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import motores  # noqa: E402
+
+FUNCOES = ("tipos", "intervalo", "tendencia_central", "variabilidade", "frequencias",
+           "outliers_iqr", "efeito_outliers", "crosstab")
+
+
+def gerar(linhas: int, seed: int = 42) -> pd.DataFrame:
+    """Numéricas com nulos e caudas pesadas, inteiros, duas categóricas e uma coluna de data."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "normal": rng.normal(100, 15, linhas),
+        "cauda": rng.standard_t(3, linhas) * 10,
+        "inteiro": rng.integers(0, 1000, linhas),
+        "loja": rng.choice([f"loja_{i:02d}" for i in range(30)], linhas),
+        "canal": rng.choice(["site", "app", "telefone", "balcao"], linhas, p=[0.5, 0.3, 0.15, 0.05]),
+        "date": pd.Timestamp("2024-01-01") + pd.to_timedelta(rng.integers(0, 365, linhas), unit="D"),
+    })
+    df.loc[rng.random(linhas) < 0.05, "normal"] = np.nan
+    return df
+
+
+def _calcular(m, funcao: str, cats):
+    if funcao == "crosstab":
+        return m.crosstab(cats[0], cats[1]).tabela if len(cats) >= 2 else None
+    if funcao == "tipos":
+        # o tipo detectado tem o nome de cada motor; compara categoria e contagem de nulos
+        return m.tipos()[0].set_index("Coluna")[["Não nulos", "Nulos (%)"]].sort_index()
+    return getattr(m, funcao)()
+
+
+def _divergencia(a, b, rtol: float) -> str:
+    """'' se iguais dentro da tolerância; senão a descrição da diferença."""
+    if isinstance(a, dict):
+        if a.keys() != b.keys():
+            return f"colunas diferentes: {sorted(set(a) ^ set(b))}"
+        for c in a:
+            # empates na contagem podem vir em outra ordem: compara as contagens ordenadas
+            if not np.array_equal(np.sort(a[c].to_numpy()), np.sort(b[c].to_numpy())):
+                return f"contagens de {c}"
+        return ""
+    if a is None or b is None:
+        return "" if a is None and b is None else "um dos motores não gerou a tabela"
+    if isinstance(a, pd.Series):
+        a, b = a.to_frame(), b.to_frame()
+    b = b.reindex(index=a.index, columns=a.columns)
+    x, y = a.to_numpy(dtype="float64"), b.to_numpy(dtype="float64")
+    if x.shape != y.shape or not np.allclose(x, y, rtol=rtol, atol=1e-9, equal_nan=True):
+        return f"máx. diferença {np.nanmax(np.abs(x - y)):.3g}"
+    return ""
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=1_000_000)
+    ap.add_argument("--arquivo", help="CSV/Parquet existente (em vez do gerado)")
+    ap.add_argument("--parquet", action="store_true", help="grava o arquivo gerado em Parquet")
+    ap.add_argument("--motores", nargs="+", default=[m for m in motores.MOTORES if m != "pandas"])
+    ap.add_argument("--rtol", type=float, default=1e-7)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        arquivo = args.arquivo
+        if arquivo is None:
+            df = gerar(args.linhas)
+            arquivo = os.path.join(tmp, "dados.parquet" if args.parquet else "dados.csv")
+            df.to_parquet(arquivo) if args.parquet else df.to_csv(arquivo, index=False)
+
+        referencia = motores.abrir(arquivo, "pandas")
+        cats = referencia.categoricas
+        esperado = {f: _calcular(referencia, f, cats) for f in FUNCOES}
+
+        falhou = False
+        print(f"{'motor':<8}{'função':<20}{'tempo':>10}  resultado")
+        for nome in args.motores:
+            if nome not in motores.disponiveis():
+                print(f"{nome:<8}(não instalado)")
+                continue
+            t0 = time.perf_counter()
+            m = motores.abrir(arquivo, nome)
+            print(f"{nome:<8}{'abrir':<20}{(time.perf_counter() - t0) * 1000:>8.0f}ms")
+            for f in FUNCOES:
+                t0 = time.perf_counter()
+                obtido = _calcular(m, f, cats)
+                ms = (time.perf_counter() - t0) * 1000
+                erro = _divergencia(esperado[f], obtido, args.rtol)
+                falhou |= bool(erro)
+                print(f"{nome:<8}{f:<20}{ms:>8.0f}ms  {erro or 'OK'}")
+    sys.exit(1 if falhou else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+# benchmarks/bench_nlp.py
+"""
+Confere a camada de LLM (utils.nlp) contra um servidor HTTP local que imita a API do Hugging
+Face: resposta válida, lenta (estoura o timeout de leitura), corpo que não é JSON, erro 500 e
+categoria inexistente. Sem rede e sem token de verdade.
+
+    python benchmarks/bench_nlp.py
+    python benchmarks/bench_nlp.py --timeout 0.5 --falhas 2 --espera 1
+
+Verifica: fallback por regras no timeout e no corpo malformado; cache em memória e no JSON
+(repetições não vão ao servidor); o disjuntor abre após --falhas falhas seguidas, não chama o
+servidor enquanto aberto e, passada a espera, libera uma única tentativa (que fecha o circuito
+ou o reabre). Mostra a latência de cada caminho. Sai com código 1 se alguma conferência falhar.
+
+O endpoint e os limites de utils.nlp são lidos na importação: as variáveis de ambiente são
+definidas antes do `import utils.nlp`.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Stub(BaseHTTPRequestHandler):
+    """Responde conforme `modo` do servidor e conta as requisições recebidas."""
+
+    def do_POST(self):
+        srv = self.server
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with srv.lock:
+            srv.requisicoes += 1
+        modo = srv.modo
+        if modo in ("lento", "ok_lento"):
+            time.sleep(srv.atraso)
+        if modo == "erro":
+            self.send_response(500)
+            self.end_headers()
+            return
+        corpo = {"ok": json.dumps([{"generated_text": srv.categoria}]),
+                 "ok_lento": json.dumps([{"generated_text": srv.categoria}]),
+                 "lento": json.dumps([{"generated_text": srv.categoria}]),
+                 "fora": json.dumps([{"generated_text": "banana"}]),
+                 "malformado": "<html>502 Bad Gateway</html>"}[modo]
+        dados = corpo.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(dados)))
+        self.end_headers()
+        try:
+            self.wfile.write(dados)
+        except (BrokenPipeError, ConnectionResetError):  # o cliente já desistiu (timeout)
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+def _servidor():
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Stub)
+    srv.daemon_threads = True
+    srv.lock = threading.Lock()
+    srv.requisicoes = 0
+    srv.modo, srv.categoria, srv.atraso = "ok", "correlacao", 0.0
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    return srv
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--timeout", type=float, default=0.3, help="timeout de leitura do cliente (s)")
+    ap.add_argument("--falhas", type=int, default=3, help="falhas seguidas até abrir o disjuntor")
+    ap.add_argument("--espera", type=float, default=0.5, help="tempo do disjuntor aberto (s)")
+    args = ap.parse_args()
+
+    srv = _servidor()
+    os.environ.update({
+        "AGENTE_EDA_HF_URL": f"http://127.0.0.1:{srv.server_address[1]}/models/stub",
+        "AGENTE_EDA_HF_TIMEOUT_CONEXAO": "1",
+        "AGENTE_EDA_HF_TIMEOUT_LEITURA": str(args.timeout),
+        "AGENTE_EDA_HF_FALHAS": str(args.falhas),
+        "AGENTE_EDA_HF_ESPERA": str(args.espera),
+        "AGENTE_EDA_CACHE_DIR": tempfile.mkdtemp(prefix="bench_nlp-"),
+        "HF_TOKEN": "stub",
+    })
+    from utils import nlp  # noqa: E402  (depois das variáveis de ambiente)
+
+    erros, linhas = [], []
+    perguntas = iter(f"pergunta {i} sobre os dados?" for i in range(1000))
+
+    def conferir(condicao: bool, descricao: str) -> None:
+        if not condicao:
+            erros.append(descricao)
+
+    def perguntar(modo: str, pergunta: str = None, categoria: str = "correlacao"):
+        """(resposta, segundos, requisições ao servidor) de uma pergunta com o stub em `modo`."""
+        srv.modo, srv.categoria = modo, categoria
+        pergunta = pergunta or next(perguntas)
+        antes = srv.requisicoes
+        t0 = time.perf_counter()
+        resposta = nlp.interpretar_pergunta(pergunta)
+        dt = time.perf_counter() - t0
+        return resposta, dt, srv.requisicoes - antes, pergunta
+
+    def registrar(caso: str, dt: float, req: int, resposta: str) -> None:
+        linhas.append(f"{caso:<44} {dt * 1000:9.2f} ms  {req} req  → {resposta}")
+
+    srv.atraso = args.timeout * 3
+
+    # 1) resposta válida, depois cache em memória e no JSON
+    r, dt, req, q = perguntar("ok", "Existe correlação entre as variáveis?")
+    registrar("stub respondeu", dt, req, r)
+    conferir(r == "correlacao" and req == 1, "resposta válida do stub não foi usada")
+    r, dt, req, _ = perguntar("erro", "  existe CORRELAÇÃO entre as variáveis  ")
+    registrar("cache em memória (pergunta normalizada)", dt, req, r)
+    conferir(r == "correlacao" and req == 0, "repetição normalizada foi ao servidor")
+    nlp.limpar_cache()  # só a memória: o JSON continua
+    r, dt, req, _ = perguntar("erro", q)
+    registrar("cache no JSON (memória limpa)", dt, req, r)
+    conferir(r == "correlacao" and req == 0, "a intenção persistida no JSON não foi reaproveitada")
+    with open(nlp._arquivo_cache(), encoding="utf-8") as f:
+        conferir(json.load(f).get(nlp.normalizar(q)) == "correlacao", "intenção não gravada no JSON")
+
+    # 2) categoria inexistente: resposta válida (não é falha), mas o fallback decide e nada é guardado
+    r, dt, req, q = perguntar("fora")
+    registrar("categoria inexistente → regras", dt, req, r)
+    conferir(r == nlp._chutar_regra(q) and req == 1 and nlp._DISJUNTOR.falhas == 0,
+             "saída fora das categorias não caiu nas regras (ou contou como falha)")
+    conferir(nlp._INTENCOES.get(nlp.normalizar(q)) is None, "saída fora das categorias foi para o cache")
+
+    # 3) falhas seguidas: timeout, corpo malformado, erro HTTP → fallback e disjuntor abre
+    for modo in ["lento", "malformado", "erro"] * args.falhas:
+        if nlp._DISJUNTOR.aberto:
+            break
+        r, dt, req, q = perguntar(modo)
+        registrar(f"{modo} → regras", dt, req, r)
+        conferir(r == nlp._chutar_regra(q) and req == 1, f"{modo}: sem fallback para as regras")
+        if modo == "lento":
+            conferir(dt < args.timeout + 1.0, f"timeout não respeitado ({dt:.2f} s)")
+    conferir(nlp._DISJUNTOR.aberto and nlp._DISJUNTOR.falhas == args.falhas,
+             f"disjuntor não abriu após {args.falhas} falhas")
+
+    # 4) aberto: nenhuma chamada ao servidor, mesmo com ele respondendo bem
+    r, dt, req, q = perguntar("ok")
+    registrar("disjuntor aberto → regras", dt, req, r)
+    conferir(req == 0 and r == nlp._chutar_regra(q), "disjuntor aberto chamou o servidor")
+
+    # 5) meio-aberto: passada a espera, uma única tentativa entre várias perguntas simultâneas
+    def tentativa(modo: str):
+        time.sleep(args.espera + 0.05)
+        srv.modo, srv.atraso = modo, args.timeout / 2 if modo == "ok_lento" else args.timeout * 3
+        antes = srv.requisicoes
+        respostas = {}
+        t0 = time.perf_counter()
+        threads = [threading.Thread(target=lambda i=i: respostas.__setitem__(
+            i, nlp.interpretar_pergunta(f"simultânea {modo} {i}?"))) for i in range(6)]
+        for t in threads:
+            t.start()
+            time.sleep(0.005)
+        for t in threads:
+            t.join()
+        return srv.requisicoes - antes, respostas, time.perf_counter() - t0
+
+    req, _, dt = tentativa("lento")
+    registrar("meio-aberto, tentativa falha (6 simultâneas)", dt, req, "reabre")
+    conferir(req == 1, f"meio-aberto liberou {req} tentativas (esperado 1)")
+    conferir(nlp._DISJUNTOR.aberto, "tentativa que falhou não reabriu o disjuntor")
+    r, _, req, _ = perguntar("ok")
+    conferir(req == 0, "disjuntor reaberto chamou o servidor antes da espera")
+
+    req, respostas, dt = tentativa("ok_lento")
+    registrar("meio-aberto, tentativa ok (6 simultâneas)", dt, req, "fecha")
+    conferir(req == 1, f"meio-aberto liberou {req} tentativas (esperado 1)")
+    conferir(not nlp._DISJUNTOR.aberto and nlp._DISJUNTOR.falhas == 0, "tentativa bem-sucedida não fechou")
+    conferir(list(respostas.values()).count("correlacao") == 1, "a tentativa não usou a resposta do stub")
+    r, dt, req, _ = perguntar("ok")
+    registrar("fechado de novo", dt, req, r)
+    conferir(r == "correlacao" and req == 1, "circuito fechado não voltou a chamar o servidor")
+
+    srv.shutdown()
+    print(f"stub em {nlp.HF_API_URL} (timeout {args.timeout} s, {args.falhas} falhas, espera {args.espera} s)")
+    for linha in linhas:
+        print(linha)
+    if erros:
+        print(f"\n{len(erros)} conferência(s) falharam:")
+        for e in erros:
+            print(f"  {e}")
+        sys.exit(1)
+    print("\ntodas as conferências passaram")
+
+
+if __name__ == "__main__":
+    main()
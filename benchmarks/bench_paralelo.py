@@ -0,0 +1,62 @@
+# benchmarks/bench_paralelo.py
+"""
+Escalonamento do cálculo por coluna (utils.paralelo) com 1, 4, 16 e 32 workers.
+
+    python benchmarks/bench_paralelo.py                         # 1M linhas × 400 colunas
+    python benchmarks/bench_paralelo.py --linhas 200000 --colunas 100 --backend process
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import charts, distribuicao, eda, paralelo  # noqa: E402
+
+
+def _resumo(df, col):
+    # sem cache: mede o cálculo em si
+    return distribuicao._numerico(df[col], 30)
+
+
+def _grafico(df, col):
+    return charts.para_bytes(charts.hist(df, col))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=1_000_000)
+    ap.add_argument("--colunas", type=int, default=400)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 32])
+    ap.add_argument("--backend", choices=["thread", "process"], default="thread")
+    ap.add_argument("--graficos", type=int, default=64, help="nº de colunas renderizadas")
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    df = pd.DataFrame({f"s{i}": rng.integers(0, 1000, args.linhas) for i in range(args.colunas)})
+    print(f"{args.linhas:,} linhas × {args.colunas} colunas, backend={args.backend}, cpus={os.cpu_count()}")
+
+    tarefas = {
+        "value_counts (frequencias)": (eda._top_valores, list(df.columns)),
+        "resumo de distribuição": (_resumo, list(df.columns)),
+        "render de histogramas": (_grafico, list(df.columns[:args.graficos])),
+    }
+    print(f"{'tarefa':<28}" + "".join(f"{w:>10}w" for w in args.workers))
+    for nome, (func, cols) in tarefas.items():
+        tempos = []
+        for w in args.workers:
+            distribuicao._RESUMOS.clear()
+            t0 = time.perf_counter()
+            paralelo.por_coluna(df, func, cols, workers=w, backend=args.backend)
+            tempos.append(time.perf_counter() - t0)
+        print(f"{nome:<28}" + "".join(f"{t:>10.2f}s" for t in tempos)
+              + f"   (speedup máx {tempos[0] / min(tempos):.1f}×)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/bench_perfil.py
+"""
+Compara o caminho antigo (cada função de estatística varrendo o DataFrame de novo)
+com o DatasetProfile (uma construção + consultas). Antes de mostrar os tempos, confere que os
+dois caminhos devolvem as mesmas tabelas (tolerância de ponto flutuante).
+
+    python benchmarks/bench_perfil.py                      # 10M linhas × 50 colunas (~4 GB)
+    python benchmarks/bench_perfil.py --linhas 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.perfil import DatasetProfile  # noqa: E402
+
+
+def _antes(df: pd.DataFrame):
+    """Sequência de cálculos do responder antes do perfil (uma varredura por pergunta)."""
+    num = df.select_dtypes("number")
+    intervalo = num.agg(["min", "max"]).T
+    num = df.select_dtypes("number")
+    tendencia = num.agg(["mean", "median"]).T.rename(columns={"mean": "Média", "median": "Mediana"})
+    num = df.select_dtypes("number")
+    variabilidade = num.agg(["std", "var"]).T
+    for _ in range(2):  # outliers_iqr + efeito_outliers montavam a máscara duas vezes
+        num = df.select_dtypes("number")
+        q1, q3 = num.quantile(0.25), num.quantile(0.75)
+        iqr = q3 - q1
+        mask = num.lt(q1 - 1.5 * iqr) | num.gt(q3 + 1.5 * iqr)
+    outliers = (mask.sum() / len(num) * 100).sort_values(ascending=False).round(2)
+    sem_out = num.loc[~mask.any(axis=1)]
+    efeito = pd.DataFrame({"mean_com_out": num.mean(), "mean_sem_out": sem_out.mean(),
+                           "std_com_out": num.std(), "std_sem_out": sem_out.std()})
+    efeito["delta_mean_abs"] = (efeito["mean_sem_out"] - efeito["mean_com_out"]).abs()
+    efeito["delta_std_abs"] = (efeito["std_sem_out"] - efeito["std_com_out"]).abs()
+    return intervalo, tendencia, variabilidade, outliers, efeito
+
+
+def _depois(df: pd.DataFrame):
+    p = DatasetProfile(df)
+    return p.intervalo(), p.tendencia_central(), p.variabilidade(), p.outliers_iqr(), p.efeito_outliers()
+
+
+def _conferir(antes, depois) -> None:
+    """Levanta AssertionError se o perfil não devolver as mesmas tabelas que o caminho antigo."""
+    nomes = ("intervalo", "tendencia_central", "variabilidade", "outliers_iqr", "efeito_outliers")
+    for nome, a, d in zip(nomes, antes, depois):
+        # outliers_iqr vem ordenado pelo percentual: empates podem sair em outra ordem
+        a, d = a.sort_index(), d.sort_index()
+        try:
+            if isinstance(a, pd.Series):
+                pd.testing.assert_series_equal(d, a, check_names=False, check_dtype=False, rtol=1e-9)
+            else:
+                pd.testing.assert_frame_equal(d, a, check_names=False, check_dtype=False, rtol=1e-9)
+        except AssertionError as e:
+            raise AssertionError(f"{nome}: DatasetProfile difere do cálculo antigo\n{e}") from None
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--linhas", type=int, default=10_000_000)
+    ap.add_argument("--colunas", type=int, default=50)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    df = pd.DataFrame({f"c{i}": rng.standard_normal(args.linhas) for i in range(args.colunas)})
+    print(f"{args.linhas:,} linhas × {args.colunas} colunas")
+
+    tempos, saidas = {}, {}
+    for nome, func in (("antes (pandas, várias varreduras)", _antes), ("DatasetProfile", _depois)):
+        t0 = time.perf_counter()
+        saidas[nome] = func(df)
+        tempos[nome] = time.perf_counter() - t0
+    _conferir(*saidas.values())
+
+    for nome, dt in tempos.items():
+        print(f"{nome:<36} {dt:8.2f} s")
+    base, dt = tempos.values()
+    print(f"speedup: {base / dt:.1f}×")
+
+
+if __name__ == "__main__":
+    main()
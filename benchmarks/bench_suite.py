@@ -0,0 +1,251 @@
+# benchmarks/bench_suite.py
+"""
+Suíte de desempenho: todas as funções públicas de utils/eda.py, todos os gráficos de
+utils/charts.py (backend Agg, até o PNG) e nlp._chutar_regra, sobre os datasets sintéticos de
+benchmarks/geradores.py, comparados com a linha de base em benchmarks/linha_base_suite.json.
+
+    python benchmarks/bench_suite.py                              # 10k e 100k linhas, compara com a base
+    python benchmarks/bench_suite.py --tamanhos 10k 100k 1M 10M   # escala completa (10M: alguns minutos)
+    python benchmarks/bench_suite.py --casos outliers charts.     # só os casos que contêm os textos
+    python benchmarks/bench_suite.py --gravar-base                # mede e grava/atualiza a linha de base
+
+Cada caso roda com os caches vazios (utils.cache.limpar): mede o cálculo, não o cache.
+- tempo: mediana de --repeticoes execuções; um caso acima da base é medido de novo
+  (2 × --repeticoes) antes de contar como regressão;
+- memória: pico alocado durante uma execução extra com tracemalloc (NumPy/pandas incluídos).
+Sai com código 1 se algum caso passar da base além da tolerância (relativa e com piso absoluto,
+para o ruído dos casos de poucos milissegundos não contar); a tolerância de tempo padrão (+50%)
+cobre a variação entre execuções numa máquina compartilhada. A base depende da máquina: grave-a
+de novo ao trocar de máquina e compare só execuções da mesma máquina.
+"""
+import argparse
+import gc
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import geradores  # noqa: E402
+from utils import cache, charts, eda, nlp  # noqa: E402
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASE = os.path.join(RAIZ, "benchmarks", "linha_base_suite.json")
+HISTORICO = os.path.join(RAIZ, "benchmarks", "historico_suite.jsonl")
+
+# tolerâncias padrão (a base pode trazer as suas em "tolerancias")
+TOLERANCIAS = {"tempo": 0.50, "memoria": 0.20, "piso_ms": 25.0, "piso_mb": 2.0}
+
+PERGUNTAS = ["quais os tipos de dados?", "qual o intervalo de cada variável?", "média e mediana",
+             "variância e desvio", "valores mais frequentes", "existem outliers?", "correlação entre as variáveis",
+             "dispersão de x e y", "tendência temporal", "clusters", "variáveis mais influentes",
+             "distribuição de variáveis", "histograma de valor", "tabela cruzada"]
+
+# colunas usadas pelos casos, por formato
+_CATEGORICAS = {"alto": ("grupo", "regiao"), "categorico": ("cidade", "produto")}
+_BARRAS = {"alto": "regiao", "categorico": "produto"}
+
+
+def _png(fazer):
+    return lambda df: charts.para_bytes(fazer(df))
+
+
+def _pesada(df):
+    """eda.pesada com o limite de linhas zerado: mede o roteamento, não só a comparação de tamanho."""
+    limite, eda.SEGUNDO_PLANO = eda.SEGUNDO_PLANO, 0
+    try:
+        return [eda.pesada(df, q) for q in PERGUNTAS]
+    finally:
+        eda.SEGUNDO_PLANO = limite
+
+
+# (nome, formatos, função do DataFrame); formato None = caso sem dados
+CASOS = [
+    ("eda.tipos", ("alto", "largo", "categorico"), eda.tipos),
+    ("eda.intervalo", ("alto", "largo"), eda.intervalo),
+    ("eda.tendencia_central", ("alto", "largo"), eda.tendencia_central),
+    ("eda.variabilidade", ("alto", "largo"), eda.variabilidade),
+    ("eda.frequencias", ("alto", "categorico"), eda.frequencias),
+    ("eda.outliers_iqr", ("alto", "largo"), eda.outliers_iqr),
+    ("eda.efeito_outliers", ("alto",), eda.efeito_outliers),
+    ("eda.outliers_metodos", ("alto", "largo"), eda.outliers_metodos),
+    ("eda.crosstab", ("alto", "categorico"), lambda df: eda.crosstab(df, *_CATEGORICAS[df.attrs["formato"]])),
+    ("eda.detectar_tempo", ("temporal",), eda.detectar_tempo),
+    ("eda.serie_temporal", ("temporal",), eda.serie_temporal),
+    ("eda.clusters", ("alto",), eda.clusters),
+    ("eda.variaveis_mais_influentes", ("alto", "largo"), eda.variaveis_mais_influentes),
+    ("eda.responder", ("alto",), lambda df: eda.responder(df, "existem outliers?")),
+    ("eda.pesada", ("alto",), _pesada),
+    ("eda.agendar", ("alto",), lambda df: eda.agendar(df, "correlação entre as variáveis").result()),
+    ("eda.refinar", ("alto",), lambda df: eda.refinar(df, "média e mediana").result()),
+    ("eda.responder_lote", ("alto",), lambda df: eda.responder_lote(df, PERGUNTAS)),
+    ("eda.registrar", (None,), lambda _: [eda.registrar(q, ("", None, {"conclusion": q})) for q in PERGUNTAS]),
+    ("charts.hist", ("alto",), _png(lambda df: charts.hist(df, "valor"))),
+    ("charts.box", ("alto",), _png(lambda df: charts.box(df, "valor"))),
+    ("charts.scatter", ("alto",), _png(lambda df: charts.scatter(df, "x", "y"))),
+    ("charts.heatmap_corr", ("alto", "largo"), _png(charts.heatmap_corr)),
+    ("charts.timeseries", ("temporal",), _png(lambda df: charts.timeseries(df, "timestamp", "vendas"))),
+    ("charts.decomposicao", ("temporal",), _png(lambda df: charts.decomposicao(df, "timestamp", "vendas"))),
+    ("charts.bar_counts", ("alto", "categorico"), _png(lambda df: charts.bar_counts(df, _BARRAS[df.attrs["formato"]]))),
+    # 100 perguntas por execução: uma só leva microssegundos
+    ("nlp._chutar_regra", (None,), lambda _: [nlp._chutar_regra(q) for _ in range(8) for q in PERGUNTAS]),
+]
+
+
+def _tamanho(texto: str) -> int:
+    mult = {"k": 1_000, "m": 1_000_000}.get(texto[-1].lower(), 1)
+    return int(float(texto[:-1] if mult > 1 else texto) * mult)
+
+
+def _rotulo(n: int) -> str:
+    return f"{n // 1_000_000}M" if n >= 1_000_000 and n % 1_000_000 == 0 else \
+        f"{n // 1_000}k" if n % 1_000 == 0 else str(n)
+
+
+def _dados(formato, n: int, seed: int):
+    if formato is None:
+        return None
+    df = geradores.gerar(formato, n, seed)
+    df.attrs["formato"] = formato
+    return df
+
+
+def _medir(func, df, repeticoes: int, memoria: bool) -> dict:
+    tempos = []
+    for _ in range(repeticoes):
+        cache.limpar()
+        t0 = time.perf_counter()
+        func(df)
+        tempos.append((time.perf_counter() - t0) * 1000)
+    out = {"ms": round(statistics.median(tempos), 2)}
+    if memoria:
+        cache.limpar()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            base = tracemalloc.get_traced_memory()[0]
+            func(df)
+            out["pico_mb"] = round((tracemalloc.get_traced_memory()[1] - base) / 2**20, 2)
+        finally:
+            tracemalloc.stop()
+    return out
+
+
+def _aquecer(casos, seed: int) -> None:
+    """Uma execução pequena de cada caso: imports tardios (seaborn, sklearn) e temas fora da medição."""
+    for formato in sorted({f for _, fs, _ in casos for f in fs}, key=str):
+        df = _dados(formato, 1_000, seed)
+        for _, fs, func in casos:
+            if formato in fs:
+                func(df)
+    cache.limpar()
+
+
+def _regressao(atual: dict, base: dict, tol: dict) -> list:
+    """Motivos de regressão do caso (lista vazia se está dentro da tolerância)."""
+    motivos = []
+    if "ms" in base and atual["ms"] > base["ms"] * (1 + tol["tempo"]) and atual["ms"] - base["ms"] > tol["piso_ms"]:
+        motivos.append(f"tempo {atual['ms'] / base['ms']:.2f}×")
+    if "pico_mb" in base and "pico_mb" in atual and \
+            atual["pico_mb"] > base["pico_mb"] * (1 + tol["memoria"]) and atual["pico_mb"] - base["pico_mb"] > tol["piso_mb"]:
+        motivos.append(f"memória {atual['pico_mb'] / max(base['pico_mb'], 1e-9):.2f}×")
+    return motivos
+
+
+def _meta() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                                capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = ""
+    return {"data": datetime.now().isoformat(timespec="seconds"), "commit": commit,
+            "python": sys.version.split()[0], "pandas": pd.__version__, "numpy": np.__version__,
+            "cpus": os.cpu_count()}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tamanhos", nargs="+", default=["10k", "100k"], help="linhas (ex.: 10k 100k 1M 10M)")
+    ap.add_argument("--formatos", nargs="+", default=list(geradores.FORMATOS), choices=list(geradores.FORMATOS))
+    ap.add_argument("--casos", nargs="+", default=[], help="só os casos cujo nome contém algum destes textos")
+    ap.add_argument("--repeticoes", type=int, default=5, help="mediana de N execuções por caso")
+    ap.add_argument("--sem-memoria", action="store_true", help="não mede o pico de memória (mais rápido)")
+    ap.add_argument("--tolerancia-tempo", type=float, help="aumento relativo aceito (ex.: 0.5 = +50%%)")
+    ap.add_argument("--tolerancia-memoria", type=float, help="idem para o pico de memória")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--gravar-base", action="store_true", help="grava os resultados como linha de base")
+    ap.add_argument("--registrar", action="store_true", help="acrescenta os resultados ao histórico")
+    ap.add_argument("--nota", default="", help="comentário gravado junto no histórico")
+    args = ap.parse_args()
+
+    casos = [(nome, tuple(f for f in fs if f is None or f in args.formatos), func) for nome, fs, func in CASOS
+             if not args.casos or any(t in nome for t in args.casos)]
+    casos = [c for c in casos if c[1]]
+    base = {}
+    if os.path.exists(BASE):
+        with open(BASE, encoding="utf-8") as f:
+            base = json.load(f)
+    tol = {**TOLERANCIAS, **base.get("tolerancias", {})}
+    if args.tolerancia_tempo is not None:
+        tol["tempo"] = args.tolerancia_tempo
+    if args.tolerancia_memoria is not None:
+        tol["memoria"] = args.tolerancia_memoria
+    base_casos = base.get("casos", {})
+
+    _aquecer(casos, args.seed)
+    resultados, regressoes = {}, []
+    print(f"{'caso':<40}{'ms':>10}{'pico MB':>10}{'base ms':>10}{'base MB':>10}")
+    # casos sem dados rodam uma vez só (não dependem do tamanho)
+    grupos = [(None, 0)] + [(f, n) for n in map(_tamanho, args.tamanhos) for f in args.formatos]
+    for formato, n in grupos:
+        selecionados = [(nome, func) for nome, fs, func in casos if formato in fs]
+        if not selecionados:
+            continue
+        df = _dados(formato, n, args.seed)
+        for nome, func in selecionados:
+            chave = nome if formato is None else f"{formato}/{_rotulo(n)}/{nome}"
+            atual = _medir(func, df, args.repeticoes, not args.sem_memoria)
+            resultados[chave] = atual
+            anterior = base_casos.get(chave, {})
+            motivos = _regressao(atual, anterior, tol)
+            if any(m.startswith("tempo") for m in motivos):
+                # confirma com o dobro de execuções antes de acusar (ruído de máquina compartilhada)
+                atual["ms"] = _medir(func, df, 2 * args.repeticoes, False)["ms"]
+                motivos = _regressao(atual, anterior, tol)
+            regressoes += [(chave, m) for m in motivos]
+            print(f"{chave:<40}{atual['ms']:>10.1f}{atual.get('pico_mb', float('nan')):>10.1f}"
+                  f"{anterior.get('ms', float('nan')):>10.1f}{anterior.get('pico_mb', float('nan')):>10.1f}"
+                  + (f"  REGRESSÃO ({', '.join(motivos)})" if motivos else ""))
+        del df
+        gc.collect()
+
+    if args.gravar_base:
+        base = {"_meta": _meta(), "tolerancias": tol, "casos": {**base_casos, **resultados}}
+        with open(BASE, "w", encoding="utf-8") as f:
+            json.dump(base, f, ensure_ascii=False, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"linha de base gravada em {os.path.relpath(BASE, RAIZ)} ({len(resultados)} casos)")
+    if args.registrar:
+        with open(HISTORICO, "a", encoding="utf-8") as f:
+            f.write(json.dumps({**_meta(), "nota": args.nota, "casos": resultados}, ensure_ascii=False) + "\n")
+
+    if regressoes and not args.gravar_base:
+        print(f"\n{len(regressoes)} regressão(ões) acima da tolerância "
+              f"(tempo +{tol['tempo']:.0%} e +{tol['piso_ms']:g} ms; memória +{tol['memoria']:.0%} e +{tol['piso_mb']:g} MB):")
+        for chave, motivo in regressoes:
+            print(f"  {chave}: {motivo}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
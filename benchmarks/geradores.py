@@ -0,0 +1,97 @@
+# benchmarks/geradores.py
+"""
+Datasets sintéticos reprodutíveis (mesma semente → mesmo DataFrame) para os benchmarks.
+
+Formatos:
+- "alto": poucas colunas, muitas linhas (numéricas com assimetria/outliers/nulos e categóricas de baixa cardinalidade);
+- "largo": 200 colunas numéricas correlacionadas em blocos, n // 50 linhas (mín. 200): n·4 células;
+- "categorico": colunas de alta cardinalidade (IDs, cidades e produtos com frequências Zipf);
+- "temporal": timestamp por minuto com lacunas, colunas com tendência + sazonalidade + ruído.
+
+Os DataFrames já saem com a chave de cache (como os carregados por utils.dataset), para que o
+hash das linhas não entre no tempo medido.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import dataset  # noqa: E402
+
+COLUNAS_LARGO = 200
+
+
+def _texto(codigos: np.ndarray, prefixo: str, k: int) -> pd.Series:
+    """Códigos 0..k-1 → strings "prefixo_i" (via categorias: uma string por valor distinto)."""
+    rotulos = [f"{prefixo}_{i}" for i in range(k)]
+    return pd.Series(pd.Categorical.from_codes(codigos, rotulos)).astype("str")
+
+
+def _zipf(rng, n: int, k: int, a: float = 1.2) -> np.ndarray:
+    """n códigos em 0..k-1 com frequência ∝ 1/rank^a."""
+    p = 1.0 / np.arange(1, k + 1) ** a
+    return rng.choice(k, size=n, p=p / p.sum())
+
+
+def alto(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    base = rng.normal(size=n)
+    valor = rng.lognormal(3, 1, n)
+    valor[rng.random(n) < 0.001] *= 100  # outliers
+    renda = rng.normal(5000, 1500, n)
+    renda[rng.random(n) < 0.02] = np.nan
+    return pd.DataFrame({
+        "id": np.arange(n),
+        "x": base,
+        "y": 2 * base + rng.normal(scale=0.5, size=n),
+        "valor": valor,
+        "renda": renda,
+        "idade": rng.integers(18, 90, n),
+        "grupo": _texto(rng.integers(0, 5, n), "g", 5),
+        "regiao": _texto(_zipf(rng, n, 20), "r", 20),
+    })
+
+
+def largo(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    linhas = max(n // 50, 200)
+    blocos = rng.normal(size=(linhas, COLUNAS_LARGO // 10))
+    dados = np.repeat(blocos, 10, axis=1) + rng.normal(scale=1.0, size=(linhas, COLUNAS_LARGO))
+    return pd.DataFrame(dados, columns=[f"v{i:03d}" for i in range(COLUNAS_LARGO)])
+
+
+def categorico(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "cliente": _texto(rng.integers(0, max(n // 2, 1), n), "c", max(n // 2, 1)),
+        "cidade": _texto(_zipf(rng, n, 5000), "cid", 5000),
+        "produto": _texto(_zipf(rng, n, 50_000, a=1.05), "p", 50_000),
+        "canal": _texto(rng.integers(0, 5, n), "canal", 5),
+        "valor": rng.gamma(2.0, 50.0, n),
+    })
+
+
+def temporal(n: int, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # um minuto entre as linhas, com ~1% de lacunas de até 1 hora
+    passos = np.where(rng.random(n) < 0.01, rng.integers(2, 60, n), 1).astype("int64")
+    minutos = np.cumsum(passos) - passos[0]
+    t = minutos / (60 * 24)  # em dias
+    return pd.DataFrame({
+        "timestamp": pd.Timestamp("2020-01-01") + pd.to_timedelta(minutos, unit="min"),
+        "vendas": 100 + 0.05 * t + 10 * np.sin(2 * np.pi * t) + rng.normal(scale=3, size=n),
+        "temperatura": 20 + 5 * np.sin(2 * np.pi * t / 365) + rng.normal(size=n),
+        "acessos": rng.poisson(30, n),
+        "loja": _texto(rng.integers(0, 10, n), "loja", 10),
+    })
+
+
+FORMATOS = {"alto": alto, "largo": largo, "categorico": categorico, "temporal": temporal}
+
+
+def gerar(formato: str, n: int, seed: int = 42) -> pd.DataFrame:
+    """DataFrame `formato` de tamanho `n` (ver o docstring do módulo), com a chave de cache marcada."""
+    return dataset.marcar(FORMATOS[formato](n, seed), f"sintetico-{formato}-{n}-{seed}")
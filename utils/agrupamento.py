@@ -0,0 +1,146 @@
+# utils/agrupamento.py
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset, paralelo, perfil, tarefas
+from utils.cache import RESULTADOS_MB, LRUCache
+
+if TYPE_CHECKING:  # o sklearn só é importado na primeira clusterização
+    from sklearn.cluster import MiniBatchKMeans
+
+_MODELOS = LRUCache(maxsize=8, nome="agrupamento", max_mb=RESULTADOS_MB, disco="agrupamento")
+
+# Linhas por lote (float32): memória do lote = LOTE × colunas × 4 bytes
+LOTE = 8192
+CANDIDATOS_K = tuple(range(2, 9))
+AMOSTRA_SILHUETA = 5_000
+
+
+@dataclass
+class ResultadoClusters:
+    """Modelo ajustado em todas as linhas + rótulos e perfil de cada cluster."""
+    k: int
+    criterio: str
+    colunas: list
+    modelo: "MiniBatchKMeans"
+    rotulos: np.ndarray
+    perfil: pd.DataFrame
+    avaliacao: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+
+def _lotes(num: pd.DataFrame, medias: np.ndarray, desvios: np.ndarray, tamanho: int = LOTE):
+    """Lotes padronizados em float32; nulos viram 0 (= imputação pela média)."""
+    for ini in range(0, len(num), tamanho):
+        fim = min(ini + tamanho, len(num))
+        X = np.empty((fim - ini, num.shape[1]), dtype="float32")
+        for j, c in enumerate(num.columns):
+            X[:, j] = num[c].iloc[ini:fim].to_numpy(dtype="float32", na_value=np.nan)
+        X -= medias
+        X /= desvios
+        np.nan_to_num(X, copy=False)
+        yield X
+
+
+def _ajustar(num, medias, desvios, k: int, random_state: int) -> "MiniBatchKMeans":
+    """Uma passada completa pelos dados com partial_fit (o 1º lote inicializa os centróides)."""
+    from sklearn.cluster import MiniBatchKMeans
+    modelo = MiniBatchKMeans(n_clusters=k, batch_size=LOTE, n_init=3, random_state=random_state)
+    # lotes de pelo menos k linhas: um lote menor que k não pode ser usado no partial_fit
+    for X in _lotes(num, medias, desvios, tamanho=max(LOTE, k)):
+        if len(X) >= k:
+            modelo.partial_fit(X)
+    return modelo
+
+
+def _cotovelo(ks, inercias) -> int:
+    """k no 'joelho' da curva de inércia: ponto mais distante da reta entre os extremos."""
+    x = np.asarray(ks, dtype=float)
+    y = np.asarray(inercias, dtype=float)
+    x = (x - x[0]) / ((x[-1] - x[0]) or 1)
+    y = (y - y[-1]) / ((y[0] - y[-1]) or 1)
+    return int(ks[int(np.argmax(np.abs(1 - x - y)))])
+
+
+def _calcular(df: pd.DataFrame, k, candidatos, criterio: str, random_state: int) -> ResultadoClusters:
+    num = df.select_dtypes("number")
+    stats = perfil.perfil(df).stats.loc[num.columns]
+    medias = stats["mean"].fillna(0).to_numpy(dtype="float32")
+    desvios = stats["std"].fillna(0).to_numpy(dtype="float32")
+    desvios[desvios == 0] = 1
+
+    # subamostra fixa para silhueta/inércia de cada candidato
+    rng = np.random.default_rng(random_state)
+    idx = np.sort(rng.choice(len(num), size=min(AMOSTRA_SILHUETA, len(num)), replace=False))
+    Xa = next(_lotes(num.iloc[idx], medias, desvios, tamanho=len(idx)))
+
+    ks = [k] if k else [c for c in candidatos if c < len(Xa)]
+    tarefas.etapa(f"ajustando k = {', '.join(map(str, ks))}")
+    # threads: os candidatos leem o mesmo df (o sklearn libera o GIL no cálculo de distâncias)
+    modelos = paralelo.mapear(lambda kk: _ajustar(num, medias, desvios, kk, random_state), ks,
+                              backend="thread")
+    avaliacao = pd.DataFrame({"k": ks, "inercia": [-m.score(Xa) for m in modelos]})
+    if len(ks) > 1:
+        if criterio == "cotovelo":
+            escolhido = _cotovelo(ks, avaliacao["inercia"])
+        else:
+            from sklearn.metrics import silhouette_score
+            silhueta = []
+            for m in modelos:
+                lab = m.predict(Xa)
+                silhueta.append(silhouette_score(Xa, lab) if len(np.unique(lab)) > 1 else np.nan)
+            avaliacao["silhueta"] = silhueta
+            # silhueta indefinida em todos (ex.: colunas constantes, um cluster só): o menor k
+            validos = avaliacao["silhueta"].notna()
+            escolhido = int(avaliacao.loc[avaliacao["silhueta"].idxmax(), "k"]) if validos.any() else ks[0]
+    else:
+        escolhido = ks[0]
+    modelo = modelos[ks.index(escolhido)]
+
+    # rótulos de todas as linhas + somas por cluster (centróides na escala original)
+    tarefas.etapa(f"rotulando as linhas (k = {escolhido})")
+    rotulos = np.empty(len(num), dtype="int32")
+    soma = np.zeros((escolhido, num.shape[1]))
+    pos = 0
+    for X in _lotes(num, medias, desvios):
+        lab = modelo.predict(X)
+        rotulos[pos:pos + len(X)] = lab
+        pos += len(X)
+        tarefas.progresso(pos, len(num))
+        original = X.astype("float64") * desvios + medias
+        for j in range(num.shape[1]):
+            soma[:, j] += np.bincount(lab, weights=original[:, j], minlength=escolhido)
+    contagem = np.bincount(rotulos, minlength=escolhido)
+
+    centros_z = pd.DataFrame(modelo.cluster_centers_, columns=num.columns)
+    centros = pd.DataFrame(soma / np.maximum(contagem, 1)[:, None], columns=num.columns)
+    distintivas = [
+        ", ".join(f"{c} ({'+' if centros_z.loc[i, c] >= 0 else '−'}{abs(centros_z.loc[i, c]):.2f}σ)"
+                  for c in centros_z.loc[i].abs().nlargest(3).index)
+        for i in range(escolhido)
+    ]
+    resumo = pd.DataFrame({
+        "contagem": contagem,
+        "%": (contagem / max(len(num), 1) * 100).round(2),
+        "variáveis distintivas": distintivas,
+    })
+    resumo = pd.concat([resumo, centros.round(4)], axis=1)
+    resumo.index.name = "cluster"
+    return ResultadoClusters(escolhido, "fixo" if k else criterio, list(num.columns),
+                             modelo, rotulos, resumo, avaliacao)
+
+
+def ajustar(df: pd.DataFrame, k: int = None, candidatos=CANDIDATOS_K, criterio: str = "silhueta",
+            random_state: int = 42) -> ResultadoClusters:
+    """
+    MiniBatchKMeans (float32, em lotes) sobre todas as linhas numéricas.
+    - k: nº de clusters; None escolhe entre `candidatos` (ajustes em paralelo)
+    - criterio: "silhueta" (em subamostra) ou "cotovelo" (inércia)
+    O resultado fica em cache por dataset para as próximas perguntas.
+    """
+    if k and k > len(df):
+        raise ValueError(f"k = {k} maior que o número de linhas ({len(df)}).")
+    chave = (dataset.chave(df), k, tuple(candidatos), criterio, random_state)
+    return _MODELOS.get_or_compute(chave, lambda: _calcular(df, k, candidatos, criterio, random_state))
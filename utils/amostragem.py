@@ -0,0 +1,163 @@
+# utils/amostragem.py
+import os
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils import correlacao, dataset, perfil
+from utils.cache import LRUCache
+
+_AMOSTRAS = LRUCache(maxsize=8, nome="amostragem")
+
+# Linhas da amostra do modo aproximado (datasets menores respondem exato)
+AMOSTRA_PADRAO = int(os.getenv("AGENTE_EDA_AMOSTRA", "100000"))
+CONFIANCA = 0.95
+
+
+def _alocar(tamanhos: np.ndarray, n: int) -> np.ndarray:
+    """Alocação proporcional (maiores restos) de n linhas entre os estratos."""
+    cota = tamanhos / tamanhos.sum() * n
+    base = np.floor(cota).astype("int64")
+    resto = int(n - base.sum())
+    if resto > 0:
+        base[np.argsort(-(cota - base), kind="stable")[:resto]] += 1
+    return np.minimum(base, tamanhos)
+
+
+def _sortear(df: pd.DataFrame, n: int, estrato, random_state: int) -> np.ndarray:
+    rng = np.random.default_rng(random_state)
+    if estrato is None:
+        return np.sort(rng.choice(len(df), size=n, replace=False))
+    codigos, _ = pd.factorize(df[estrato], use_na_sentinel=False)
+    tamanhos = np.bincount(codigos)
+    cotas = _alocar(tamanhos, n)
+    ordem = np.argsort(codigos, kind="stable")
+    inicios = np.concatenate([[0], np.cumsum(tamanhos)[:-1]])
+    partes = [ordem[ini + rng.choice(t, size=c, replace=False)]
+              for ini, t, c in zip(inicios, tamanhos, cotas) if c]
+    return np.sort(np.concatenate(partes))
+
+
+def amostra(df: pd.DataFrame, n: int = AMOSTRA_PADRAO, estrato: str = None, random_state: int = 42) -> pd.DataFrame:
+    """
+    Amostra sem reposição do dataset, sorteada uma vez e reaproveitada por todas as intenções.
+    - estrato: coluna para amostragem estratificada (alocação proporcional: a amostra continua
+      autoponderada, então as estimativas não precisam de pesos)
+    Datasets com até `n` linhas voltam inteiros.
+    """
+    if len(df) <= n:
+        return df
+    origem = dataset.chave(df)
+
+    def construir():
+        # chave própria: perfil, correlação e gráficos da amostra também ficam em cache
+        am = dataset.marcar(df.iloc[_sortear(df, n, estrato, random_state)],
+                            f"{origem}-amostra-{n}-{estrato}-{random_state}")
+        am.attrs["linhas_populacao"] = len(df)
+        return am
+    return _AMOSTRAS.get_or_compute((origem, n, estrato, random_state), construir)
+
+
+# ---------------------- Intervalos de confiança ----------------------
+def _z(confianca: float) -> float:
+    return NormalDist().inv_cdf(0.5 + confianca / 2)
+
+
+def _fpc(n, N: int):
+    """Correção de população finita (a amostra é sem reposição)."""
+    return np.sqrt(np.clip((N - n) / max(N - 1, 1), 0, 1))
+
+
+def _ic_quantil(v: np.ndarray, p: float, z: float):
+    """IC livre de distribuição para o quantil p: estatísticas de ordem em n·p ± z·√(n·p·(1−p))."""
+    n = v.size
+    if n == 0:
+        return np.nan, np.nan
+    meia = z * np.sqrt(n * p * (1 - p))
+    lo = int(np.clip(np.floor(n * p - meia), 0, n - 1))
+    hi = int(np.clip(np.ceil(n * p + meia), 0, n - 1))
+    return float(v[lo]), float(v[hi])
+
+
+def _valores(am: pd.DataFrame, col) -> np.ndarray:
+    v = am[col].to_numpy(dtype="float64", na_value=np.nan)
+    return np.sort(v[~np.isnan(v)])
+
+
+def ic_tendencia_central(am: pd.DataFrame, N: int, confianca: float = CONFIANCA) -> pd.DataFrame:
+    """Média (IC normal com correção de população finita) e mediana/quartis (IC por ordem)."""
+    z, linhas = _z(confianca), {}
+    for c in am.select_dtypes("number").columns:
+        v = _valores(am, c)
+        n = v.size
+        media = v.mean() if n else np.nan
+        ep = v.std(ddof=1) / np.sqrt(n) * _fpc(n, N) if n > 1 else np.nan
+        linha = {"mean": media, "mean_ic_inf": media - z * ep, "mean_ic_sup": media + z * ep}
+        for nome, p in (("q1", 0.25), ("median", 0.5), ("q3", 0.75)):
+            linha[nome] = float(np.quantile(v, p)) if n else np.nan
+            linha[f"{nome}_ic_inf"], linha[f"{nome}_ic_sup"] = _ic_quantil(v, p, z)
+        linhas[c] = linha
+    return pd.DataFrame.from_dict(linhas, orient="index")
+
+
+def ic_variabilidade(am: pd.DataFrame, N: int, confianca: float = CONFIANCA) -> pd.DataFrame:
+    """Desvio-padrão com erro-padrão assintótico pelo 4º momento (não supõe normalidade)."""
+    z, linhas = _z(confianca), {}
+    for c in am.select_dtypes("number").columns:
+        v = _valores(am, c)
+        n = v.size
+        s = v.std(ddof=1) if n > 1 else np.nan
+        m4 = np.mean((v - v.mean()) ** 4) if n else np.nan
+        ep = np.sqrt(max(m4 - s ** 4, 0) / n) / (2 * s) * _fpc(n, N) if n > 1 and s > 0 else np.nan
+        linhas[c] = {"std": s, "std_ic_inf": max(s - z * ep, 0), "std_ic_sup": s + z * ep}
+    return pd.DataFrame.from_dict(linhas, orient="index")
+
+
+def ic_outliers(am: pd.DataFrame, N: int, confianca: float = CONFIANCA) -> pd.DataFrame:
+    """% de outliers (IQR da amostra) com IC de Wilson."""
+    z = _z(confianca)
+    stats = perfil.perfil(am).stats
+    n = np.maximum(stats["n"].to_numpy(dtype="float64"), 1)
+    p = stats["n_outliers"].to_numpy(dtype="float64") / n
+    z2 = z * z / n
+    centro = (p + z2 / 2) / (1 + z2)
+    meia = z * np.sqrt(p * (1 - p) / n + z2 / (4 * n)) / (1 + z2) * _fpc(n, N)
+    return pd.DataFrame({
+        "pct_linhas_outlier": p * 100,
+        "ic_inf": np.clip(centro - meia, 0, 1) * 100,
+        "ic_sup": np.clip(centro + meia, 0, 1) * 100,
+    }, index=stats.index).sort_values("pct_linhas_outlier", ascending=False)
+
+
+def ic_correlacao(am: pd.DataFrame, N: int, confianca: float = CONFIANCA, top: int = 20) -> pd.DataFrame:
+    """Pares com maior |r| na amostra e o IC de Fisher (correlacao.erro_amostral)."""
+    corr = correlacao.matriz(am).copy()
+    corr.attrs["amostra"] = True
+    meia = correlacao.erro_amostral(corr, confianca).to_numpy()
+    r = corr.to_numpy()
+    i, j = np.triu_indices_from(r, k=1)
+    pares = pd.DataFrame({
+        "var_1": corr.index[i], "var_2": corr.columns[j], "r": r[i, j],
+        "ic_inf": np.clip(r[i, j] - meia[i, j], -1, 1), "ic_sup": np.clip(r[i, j] + meia[i, j], -1, 1),
+    }).dropna(subset=["r"])
+    return pares.reindex(pares["r"].abs().sort_values(ascending=False).index).head(top).reset_index(drop=True)
+
+
+# Intenção → intervalos de confiança mostrados com a resposta aproximada
+# ("intervalo" fica de fora: mínimo e máximo da amostra não têm IC útil, e a tabela de médias e
+# quartis responderia outra pergunta)
+_INTERVALOS = {
+    "tendencia_central": ic_tendencia_central,
+    "variabilidade": ic_variabilidade,
+    "outliers": ic_outliers,
+    "correlacao": ic_correlacao,
+    "influencia": ic_correlacao,
+}
+
+
+def intervalos(intencao: str, am: pd.DataFrame, N: int, confianca: float = CONFIANCA):
+    """Tabela de ICs para a intenção (None se ela não tiver estimativas com IC)."""
+    func = _INTERVALOS.get(intencao)
+    return func(am, N, confianca) if func is not None else None
+
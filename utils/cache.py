@@ -0,0 +1,266 @@
+# utils/cache.py
+import hashlib
+import os
+import pickle
+import stat
+import sys
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from utils import instrumentacao
+
+# Diretório dos caches em disco (datasets em Parquet, intenções). Pode ser trocado pela variável de ambiente.
+DIR_CACHE = os.getenv("AGENTE_EDA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "agente_eda"))
+
+# Orçamento de memória de cada cache de resultados compartilhado entre as sessões (MB)
+RESULTADOS_MB = float(os.getenv("AGENTE_EDA_RESULTADOS_MB", "512"))
+# Camada em disco dos caches criados com `disco=` (resultados em pickle); 0 desliga
+DISCO_MB = float(os.getenv("AGENTE_EDA_RESULTADOS_DISCO_MB", "0"))
+# Versão do formato dos valores em disco: suba ao mudar o que os caches guardam (ex.: campos de
+# ResultadoClusters/Outliers); cada versão tem sua pasta, e arquivos de outra nunca são lidos
+VERSAO = 1
+# Pickle executa código ao ser lido: a camada em disco só lê pastas e arquivos do próprio
+# usuário, sem acesso de mais ninguém. Sem como conferir o dono (Windows), fica desligada.
+_DONO = os.getuid() if hasattr(os, "getuid") else None
+_PASTA_RESULTADOS = os.path.join(DIR_CACHE, "resultados")
+
+# Caches nomeados, para os contadores de acerto/falta (painel de depuração)
+_NOMEADOS = weakref.WeakSet()
+
+
+def tamanho(valor, _vistos=None) -> int:
+    """Bytes (aproximados) ocupados por `valor`: DataFrames, arrays e os contêineres/objetos que os guardam."""
+    vistos = _vistos if _vistos is not None else set()
+    if id(valor) in vistos:
+        return 0
+    vistos.add(id(valor))
+    # sem importar pandas/numpy (utils.nlp não os carrega): se não foram importados, o valor não é deles
+    pd, np = sys.modules.get("pandas"), sys.modules.get("numpy")
+    if pd is not None and isinstance(valor, pd.DataFrame):
+        return int(valor.memory_usage(deep=True).sum())
+    if pd is not None and isinstance(valor, (pd.Series, pd.Index)):
+        return int(valor.memory_usage(deep=True))
+    if np is not None and isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, dict):
+        return sys.getsizeof(valor) + sum(tamanho(k, vistos) + tamanho(v, vistos) for k, v in valor.items())
+    if isinstance(valor, (list, tuple, set, frozenset)):
+        return sys.getsizeof(valor) + sum(tamanho(v, vistos) for v in valor)
+    if hasattr(valor, "__dict__") and not isinstance(valor, type):
+        return sys.getsizeof(valor) + tamanho(vars(valor), vistos)
+    return sys.getsizeof(valor)
+
+
+class LRUCache:
+    """
+    Cache em memória com despejo LRU (o item menos usado sai primeiro).
+    Seguro para uso a partir de várias threads (o Streamlit roda um script por sessão): é do
+    processo, então sessões diferentes reaproveitam os mesmos resultados, e faltas simultâneas
+    da mesma chave esperam um único cálculo.
+    - nome: conta acertos/faltas (ver `estatisticas`) e mede os cálculos das faltas;
+    - max_mb: orçamento de memória (além de `maxsize` itens), medido com `tamanho`;
+    - disco: subdiretório de DIR_CACHE onde os valores também são gravados (com AGENTE_EDA_RESULTADOS_DISCO_MB > 0);
+      a chave precisa de um repr estável entre processos (ex.: hash do conteúdo + parâmetros).
+      As pastas são criadas só para o usuário (0700) e conferidas antes de cada leitura.
+    """
+
+    def __init__(self, maxsize: int = 8, nome: str = None, max_mb: float = None, disco: str = None):
+        self.maxsize = maxsize
+        self.nome = nome
+        self.max_bytes = max_mb * 2**20 if max_mb else None
+        self.disco = (os.path.join(_PASTA_RESULTADOS, f"v{VERSAO}", disco)
+                      if disco and DISCO_MB > 0 and _DONO is not None else None)
+        self.acertos = self.faltas = 0
+        self.bytes = 0
+        self._itens = OrderedDict()
+        self._tamanhos = {}
+        self._calculando = {}  # chave → Future do cálculo em andamento
+        self._lock = threading.RLock()
+        if nome:
+            _NOMEADOS.add(self)
+
+    def get(self, chave, default=None):
+        with self._lock:
+            if chave in self._itens:
+                self.acertos += 1
+                self._itens.move_to_end(chave)
+                return self._itens[chave]
+        valor = self._ler_disco(chave, default)
+        with self._lock:
+            if valor is default:
+                self.faltas += 1
+                return default
+            self.acertos += 1
+        self._guardar(chave, valor)
+        return valor
+
+    def set(self, chave, valor) -> None:
+        self._guardar(chave, valor)
+        self._gravar_disco(chave, valor)
+
+    def _guardar(self, chave, valor) -> None:
+        n = tamanho(valor) if self.max_bytes else 0
+        with self._lock:
+            if self.max_bytes and n > self.max_bytes:
+                return  # maior que o orçamento inteiro: não fica em memória
+            self.bytes += n - self._tamanhos.get(chave, 0)
+            self._itens[chave] = valor
+            self._tamanhos[chave] = n
+            self._itens.move_to_end(chave)
+            while len(self._itens) > self.maxsize or (self.max_bytes and self.bytes > self.max_bytes):
+                velha, _ = self._itens.popitem(last=False)
+                self.bytes -= self._tamanhos.pop(velha)
+
+    def get_or_compute(self, chave, func):
+        """
+        Retorna o valor em cache ou calcula com `func()` e guarda. Se outra thread já está
+        calculando a mesma chave, espera por ela (se o cálculo dela falhar, calcula aqui).
+        """
+        faltando = object()
+        valor = self.get(chave, faltando)
+        if valor is not faltando:
+            return valor
+        while True:
+            with self._lock:
+                if chave in self._itens:
+                    self._itens.move_to_end(chave)
+                    return self._itens[chave]
+                futuro = self._calculando.get(chave)
+                if futuro is None:
+                    futuro = self._calculando[chave] = Future()
+                    break
+            try:
+                return futuro.result()
+            except Exception:
+                continue  # falhou ou foi cancelado na thread de outra sessão
+        try:
+            with instrumentacao.span(f"cache:{self.nome or 'anonimo'}"):
+                valor = func()
+            self.set(chave, valor)
+            futuro.set_result(valor)
+            return valor
+        except BaseException as e:
+            futuro.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calculando[chave]
+
+    # ---------------------- Camada em disco ----------------------
+    def _arquivo(self, chave) -> str:
+        nome = hashlib.blake2b(repr(chave).encode(), digest_size=20).hexdigest()
+        return os.path.join(self.disco, f"{nome}.pkl")
+
+    def _pastas(self) -> list:
+        """Da pasta de resultados até a deste cache: nenhuma pode ser de outro usuário ou aberta a ele."""
+        return [_PASTA_RESULTADOS, os.path.dirname(self.disco), self.disco]
+
+    def _ler_disco(self, chave, default):
+        if self.disco is None or not all(_privado(p, stat.S_ISDIR) for p in self._pastas()):
+            return default
+        caminho = self._arquivo(chave)
+        try:
+            fd = os.open(caminho, os.O_RDONLY | getattr(os, "O_NOFOLLOW", 0))
+        except OSError:
+            return default  # inexistente (ou link simbólico)
+        try:
+            with os.fdopen(fd, "rb") as f:
+                if not _privado(f.fileno(), stat.S_ISREG):
+                    return default  # de outro usuário ou gravável por ele: não desserializa
+                valor = pickle.load(f)
+            os.utime(caminho)  # último uso, para a poda
+            return valor
+        except Exception:
+            return default  # incompleto ou ilegível: recalcula
+
+    def _gravar_disco(self, chave, valor) -> None:
+        if self.disco is None:
+            return
+        caminho = self._arquivo(chave)
+        tmp = f"{caminho}.{os.getpid()}-{threading.get_ident()}.tmp"
+        try:
+            if not _criar_privadas(self._pastas()):
+                return  # pasta de outro usuário: só memória
+            with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "wb") as f:
+                pickle.dump(valor, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, caminho)
+        except Exception:
+            # sem disco (ou valor que não serializa): fica só em memória
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            return
+        _podar_disco(self.disco)
+
+    def __contains__(self, chave) -> bool:
+        with self._lock:
+            return chave in self._itens
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._itens)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._itens.clear()
+            self._tamanhos.clear()
+            self.bytes = 0
+
+
+def _privado(caminho, tipo) -> bool:
+    """`caminho` (ou descritor) é do tipo esperado, do usuário atual, e ninguém mais pode escrever nele (pastas: nem ler)."""
+    try:
+        st = os.stat(caminho) if isinstance(caminho, int) else os.lstat(caminho)
+    except OSError:
+        return False
+    fechado = 0o077 if stat.S_ISDIR(st.st_mode) else 0o022
+    return tipo(st.st_mode) and st.st_uid == _DONO and not st.st_mode & fechado
+
+
+def _criar_privadas(pastas) -> bool:
+    """Cria as pastas com 0700 (fecha as que já são do usuário) e confere que ficaram privadas."""
+    os.makedirs(DIR_CACHE, exist_ok=True)
+    for p in pastas:
+        try:
+            os.mkdir(p, 0o700)
+        except FileExistsError:
+            st = os.lstat(p)
+            if stat.S_ISDIR(st.st_mode) and st.st_uid == _DONO and st.st_mode & 0o077:
+                os.chmod(p, 0o700)  # criada por uma versão anterior, sem restringir o acesso
+        if not _privado(p, stat.S_ISDIR):
+            return False
+    return True
+
+
+def _podar_disco(pasta: str) -> None:
+    """Apaga os arquivos mais antigos (por último uso) até a pasta caber em DISCO_MB."""
+    try:
+        arquivos = [e for e in os.scandir(pasta) if e.name.endswith(".pkl")]
+        infos = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in arquivos]
+    except OSError:
+        return
+    total = sum(t for _, t, _ in infos)
+    for _, t, caminho in sorted(infos):
+        if total <= DISCO_MB * 2**20:
+            break
+        try:
+            os.remove(caminho)
+        except OSError:
+            pass
+        total -= t
+
+
+def estatisticas() -> dict:
+    """{nome: (acertos, faltas)} dos caches nomeados (somados, se houver mais de um com o mesmo nome)."""
+    out = {}
+    for c in list(_NOMEADOS):
+        a, f = out.get(c.nome, (0, 0))
+        out[c.nome] = (a + c.acertos, f + c.faltas)
+    return out
+
+
+def limpar() -> None:
+    """Esvazia todos os caches nomeados (ex.: benchmarks que medem o cálculo, não o cache)."""
+    for c in list(_NOMEADOS):
+        c.clear()
@@ -1,15 +1,46 @@
 # utils/charts.py
-import matplotlib.pyplot as plt
-import seaborn as sns
+import io
+
+import numpy as np
 import pandas as pd
 
-sns.set_theme(context="notebook")
+from utils import correlacao, distribuicao, instrumentacao, paralelo, tarefas, temporal
+from utils.cache import LRUCache
+
+# PNGs já renderizados: (dataset, tipo, parâmetros, figsize, formato) → bytes
+_FIGURAS = LRUCache(maxsize=256, nome="figuras")
+
+# Acima deste nº de pontos, scatter/timeseries agregam em grade de pixels antes de desenhar
+LIMITE_PONTOS = 50_000
+PIXELS_POR_POLEGADA = 100
+
+_SNS = None
+
+def _sns():
+    """seaborn importado (e tema aplicado) só no primeiro gráfico: não pesa no início do app."""
+    global _SNS
+    if _SNS is None:
+        import seaborn as sns
+        sns.set_theme(context="notebook")
+        _SNS = sns
+    return _SNS
+
+def _figura(figsize, linhas: int = 1):
+    """Figura fora do pyplot (sem registro global): pode ser criada em várias threads."""
+    from matplotlib.figure import Figure  # matplotlib/seaborn só no primeiro gráfico
+    _sns()  # tema do seaborn antes de criar os eixos
+    fig = Figure(figsize=figsize)
+    return fig, fig.subplots(linhas, 1, sharex=linhas > 1)
 
 def hist(df: pd.DataFrame, col: str, bins: int = 30, figsize=(6, 4)):
-    """Histograma para coluna numérica."""
-    serie = pd.to_numeric(df[col], errors="coerce").dropna()
-    fig, ax = plt.subplots(figsize=figsize)
-    sns.histplot(serie, bins=bins, ax=ax)
+    """Histograma para coluna numérica (desenhado a partir do resumo em cache)."""
+    r = distribuicao.resumo_numerico(df, col, bins)
+    fig, ax = _figura(figsize)
+    if r.n:
+        # bins já contados: cada barra vira um ponto no centro com peso = contagem
+        centros = (r.bordas[:-1] + r.bordas[1:]) / 2
+        barras = pd.DataFrame({"centro": centros, "contagem": r.contagens})
+        _sns().histplot(data=barras, x="centro", weights="contagem", bins=list(r.bordas), ax=ax)
     ax.set_title(f"Histograma de {col}")
     ax.set_xlabel(col)
     ax.set_ylabel("Contagem")
@@ -17,53 +48,105 @@ def hist(df: pd.DataFrame, col: str, bins: int = 30, figsize=(6, 4)):
     return fig
 
 def box(df: pd.DataFrame, col: str, figsize=(6, 4)):
-    """Boxplot para coluna numérica."""
-    serie = pd.to_numeric(df[col], errors="coerce").dropna()
-    fig, ax = plt.subplots(figsize=figsize)
-    sns.boxplot(x=serie, ax=ax)
+    """Boxplot para coluna numérica (cinco números + fliers vindos do resumo em cache)."""
+    r = distribuicao.resumo_numerico(df, col)
+    fig, ax = _figura(figsize)
+    if r.n:
+        cor = _sns().color_palette()[0]
+        ax.bxp([r.stats_boxplot()], orientation="horizontal", widths=0.8, patch_artist=True,
+               boxprops={"facecolor": cor, "edgecolor": "0.25"},
+               medianprops={"color": "0.25"}, whiskerprops={"color": "0.25"}, capprops={"color": "0.25"},
+               flierprops={"marker": "d", "markerfacecolor": "0.25", "markeredgecolor": "0.25", "markersize": 4})
+        ax.set_yticks([])
     ax.set_title(f"Boxplot de {col}")
     ax.set_xlabel(col)
     fig.tight_layout()
     return fig
 
-def scatter(df_num: pd.DataFrame, x: str, y: str, figsize=(6, 4)):
-    """Dispersão entre duas colunas numéricas."""
+def _agregar(modo: str, n: int) -> bool:
+    """modo: 'auto' (agrega acima de LIMITE_PONTOS), 'agregado' ou 'exato'."""
+    return modo == "agregado" or (modo == "auto" and n > LIMITE_PONTOS)
+
+def _indices_grade(v: np.ndarray, bins: int):
+    """Índice do bin (0..bins-1) de cada valor numa grade uniforme entre min e max."""
+    lo, hi = float(v.min()), float(v.max())
+    largura = (hi - lo) or 1.0
+    idx = ((v - lo) * (bins / largura)).astype(np.int64)
+    np.clip(idx, 0, bins - 1, out=idx)
+    return idx, lo, lo + largura
+
+def scatter(df_num: pd.DataFrame, x: str, y: str, figsize=(6, 4), modo: str = "auto"):
+    """
+    Dispersão entre duas colunas numéricas.
+    Com muitos pontos vira um raster de densidade (contagem por pixel, escala log).
+    """
     # garante numérico
     x_s = pd.to_numeric(df_num[x], errors="coerce")
     y_s = pd.to_numeric(df_num[y], errors="coerce")
     tmp = pd.DataFrame({x: x_s, y: y_s}).dropna()
-    fig, ax = plt.subplots(figsize=figsize)
-    sns.scatterplot(data=tmp, x=x, y=y, ax=ax, s=12)
-    ax.set_title(f"Dispersão: {x} vs {y}")
+    fig, ax = _figura(figsize)
+    if _agregar(modo, len(tmp)):
+        from matplotlib.colors import LogNorm
+        nx = int(figsize[0] * PIXELS_POR_POLEGADA)
+        ny = int(figsize[1] * PIXELS_POR_POLEGADA)
+        ix, x0, x1 = _indices_grade(tmp[x].to_numpy(dtype="float64"), nx)
+        iy, y0, y1 = _indices_grade(tmp[y].to_numpy(dtype="float64"), ny)
+        grade = np.bincount(ix * ny + iy, minlength=nx * ny).reshape(nx, ny).T
+        grade = np.ma.masked_equal(grade, 0)
+        im = ax.imshow(grade, origin="lower", extent=(x0, x1, y0, y1), aspect="auto",
+                       cmap="viridis", norm=LogNorm(), interpolation="nearest")
+        fig.colorbar(im, ax=ax, label="Pontos")
+        ax.set_xlabel(x)
+        ax.set_ylabel(y)
+        ax.set_title(f"Dispersão: {x} vs {y} (densidade, {len(tmp):,} pontos)")
+    else:
+        _sns().scatterplot(data=tmp, x=x, y=y, ax=ax, s=12)
+        ax.set_title(f"Dispersão: {x} vs {y}")
     fig.tight_layout()
     return fig
 
-def heatmap_corr(df: pd.DataFrame, figsize=(8, 6)):
-    """Mapa de correlação para colunas numéricas."""
+def heatmap_corr(df: pd.DataFrame, figsize=(8, 6), metodo: str = "pearson"):
+    """Mapa de correlação (Pearson ou Spearman) para colunas numéricas."""
     num = df.select_dtypes("number")
     if num.shape[1] == 0:
         # evita erro caso não haja numéricas
-        fig, ax = plt.subplots(figsize=figsize)
+        fig, ax = _figura(figsize)
         ax.text(0.5, 0.5, "Sem colunas numéricas para correlação",
                 ha="center", va="center", fontsize=12)
         ax.axis("off")
         return fig
-    corr = num.corr()
-    fig, ax = plt.subplots(figsize=figsize)
-    sns.heatmap(corr, cmap="coolwarm", center=0, ax=ax)
-    ax.set_title("Mapa de correlação")
+    corr = correlacao.matriz(df, metodo=metodo)
+    fig, ax = _figura(figsize)
+    _sns().heatmap(corr, cmap="coolwarm", center=0, ax=ax)
+    ax.set_title("Mapa de correlação" if metodo == "pearson" else f"Mapa de correlação ({metodo.capitalize()})")
     fig.tight_layout()
     return fig
 
-def timeseries(df: pd.DataFrame, tcol: str, ycol: str, figsize=(8, 4)):
-    """Série temporal (converte tcol se necessário)."""
-    x = df[tcol]
-    if not pd.api.types.is_datetime64_any_dtype(x):
-        x = pd.to_datetime(x, errors="coerce")
-    y = pd.to_numeric(df[ycol], errors="coerce")
-    tmp = pd.DataFrame({tcol: x, ycol: y}).dropna()
-    fig, ax = plt.subplots(figsize=figsize)
-    sns.lineplot(data=tmp, x=tcol, y=ycol, ax=ax)
+def timeseries(df: pd.DataFrame, tcol: str, ycol: str, figsize=(8, 4), modo: str = "auto", freq=None,
+               janela: int = None):
+    """
+    Série temporal a partir do eixo convertido uma vez (utils.temporal).
+    Com muitos pontos (ou com `freq`) desenha a média e a faixa mín–máx de cada balde, com até um
+    balde por pixel; `janela` acrescenta a média móvel (em baldes).
+    """
+    e = temporal.eixo(df, tcol)
+    fig, ax = _figura(figsize)
+    serie = None
+    if freq or janela or _agregar(modo, e.validos):
+        serie = temporal.reamostrar(df, tcol, freq, max_baldes=int(figsize[0] * PIXELS_POR_POLEGADA))
+    if serie is not None and ycol in serie.media.columns:
+        x = serie.media.index
+        ax.fill_between(x, serie.minimo[ycol], serie.maximo[ycol], alpha=0.3, linewidth=0,
+                        label=f"mín–máx por {temporal.descrever(serie.freq)}")
+        ax.plot(x, serie.media[ycol], linewidth=1, label="média")
+        if janela:
+            ax.plot(x, serie.movel(janela)[0][ycol], linewidth=1.5, label=f"média móvel ({janela})")
+        ax.legend(loc="best")
+    else:
+        y = pd.to_numeric(df[ycol], errors="coerce")
+        tmp = pd.DataFrame({tcol: e.como_serie(df.index), ycol: y}).dropna()
+        # errorbar=None: sem bootstrap de IC quando há tempos repetidos
+        _sns().lineplot(data=tmp, x=tcol, y=ycol, ax=ax, errorbar=None)
     ax.set_title(f"Série temporal: {ycol} por {tcol}")
     ax.set_xlabel(tcol)
     ax.set_ylabel(ycol)
@@ -71,13 +154,80 @@ def timeseries(df: pd.DataFrame, tcol: str, ycol: str, figsize=(8, 4)):
     fig.tight_layout()
     return fig
 
+def decomposicao(df: pd.DataFrame, tcol: str, ycol: str, freq=None, figsize=(8, 6)):
+    """Decomposição sazonal aditiva (observado, tendência, sazonal, resíduo) da série reamostrada."""
+    serie = temporal.reamostrar(df, tcol, freq)
+    partes = serie.decompor() if serie is not None else None
+    fig, axes = _figura(figsize, linhas=4)
+    if partes is None:
+        axes[0].set_title("Série curta demais para a decomposição (menos de dois períodos)")
+    else:
+        for ax, (nome, quadro) in zip(axes, partes.items()):
+            ax.plot(quadro.index, quadro[ycol], linewidth=1)
+            ax.set_ylabel(nome)
+        axes[0].set_title(f"Decomposição de {ycol} (por {temporal.descrever(serie.freq, tcol)})")
+    fig.autofmt_xdate()
+    fig.tight_layout()
+    return fig
+
 def bar_counts(df: pd.DataFrame, col: str, topn: int = 20, figsize=(6, 4)):
-    """Gráfico de barras para contagens (categóricas)."""
-    vc = df[col].astype(str).value_counts(dropna=True).head(topn)
-    fig, ax = plt.subplots(figsize=figsize)
-    sns.barplot(x=vc.values, y=vc.index, ax=ax)
+    """Gráfico de barras para contagens (categóricas), a partir do resumo em cache."""
+    vc = distribuicao.resumo_categorico(df, col, topn).top
+    fig, ax = _figura(figsize)
+    _sns().barplot(x=vc.values, y=vc.index, ax=ax)
     ax.set_title(f"Top {topn} valores de {col}")
     ax.set_xlabel("Contagem")
     ax.set_ylabel(col)
     fig.tight_layout()
     return fig
+
+# ---------------------- Renderização com cache ----------------------
+def para_bytes(fig, formato: str = "png", dpi: int = 200) -> bytes:
+    """Serializa a figura (mesmos padrões do st.pyplot) e a esvazia para liberar memória."""
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format=formato, dpi=dpi, bbox_inches="tight")
+    finally:
+        # figuras de _figura não ficam no registro do pyplot: basta soltar os artistas
+        fig.clear()
+    return buf.getvalue()
+
+def renderizar(chave: tuple, make_fig, figsize=(6, 4), formato: str = "png") -> bytes:
+    """
+    Bytes da figura para `chave` = (hash do dataset, tipo do gráfico, parâmetros...).
+    A figura só é criada na primeira vez; depois vem do cache.
+    """
+    def gerar():
+        with instrumentacao.span("figura", tipo=chave[1] if len(chave) > 1 else None):
+            fig = make_fig(figsize=figsize)
+        with instrumentacao.span(formato):
+            return para_bytes(fig, formato)
+
+    return _FIGURAS.get_or_compute((*chave, tuple(figsize), formato), gerar)
+
+def _png_distribuicao(df: pd.DataFrame, item) -> bytes:
+    tipo, col, figsize = item
+    with instrumentacao.span("figura", tipo=tipo, coluna=col):
+        fig = hist(df, col, figsize=figsize) if tipo == "hist" else bar_counts(df, col, topn=20, figsize=figsize)
+    with instrumentacao.span("png"):
+        return para_bytes(fig)
+
+@instrumentacao.medir("charts.distribuicoes")
+def renderizar_distribuicoes(df: pd.DataFrame, chave_dataset: str, resultados, figsize=(6, 4),
+                             workers: int = None, backend: str = None) -> None:
+    """
+    Pré-renderiza em paralelo (utils.paralelo) os gráficos do 'multi_plot' que ainda não estão
+    no cache, com as mesmas chaves usadas pelo app: (dataset, "hist", col) e (dataset, "bar_counts", col, 20).
+    """
+    faltando = {}
+    for tipo, col in resultados:
+        chave = (chave_dataset, "hist", col) if tipo == "hist" else (chave_dataset, "bar_counts", col, 20)
+        chave = (*chave, tuple(figsize), "png")
+        if chave not in _FIGURAS:
+            faltando[chave] = (tipo, col, tuple(figsize))
+    if not faltando:
+        return
+    tarefas.etapa(f"gerando {len(faltando)} gráficos")
+    pngs = paralelo.por_coluna(df, _png_distribuicao, list(faltando.values()), workers, backend)
+    for chave, png in zip(faltando, pngs):
+        _FIGURAS.set(chave, png)
@@ -0,0 +1,250 @@
+# utils/contagem.py
+"""
+Contagem de valores frequentes com memória limitada por coluna.
+
+A coluna é lida em blocos de hashes de 64 bits (um hash por valor, calculado uma vez):
+- HyperLogLog estima quantos valores distintos ela tem;
+- até LIMITE_EXATO distintos a contagem é exata (tabela hash → contagem);
+- acima disso vira Space-Saving (candidatos) + Count-Min (refina a contagem dos candidatos);
+- colunas quase únicas (IDs, texto livre, medidas contínuas) não têm valores "frequentes":
+  numéricas viram faixas (histograma) e as demais são puladas.
+Colunas `category` são contadas direto pelos códigos (sem hash).
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Linhas por bloco (limita as tabelas temporárias de cada passo)
+BLOCO = 1 << 22
+# Até quantos valores distintos a contagem é exata
+LIMITE_EXATO = 1 << 18
+# Linhas iniciais que decidem se vale medir a cardinalidade da coluna toda
+PREFIXO = 1 << 16
+# distintos / não nulos a partir do qual a coluna é "quase única"
+LIMIAR_UNICA = 0.9
+MIN_LINHAS_UNICA = 100
+# Candidatos guardados pelo Space-Saving quando a contagem deixa de ser exata
+CAPACIDADE_SKETCH = 1024
+
+
+class HyperLogLog:
+    """Estimativa de valores distintos com 2^p registros de 1 byte (erro relativo ~1.04/√2^p)."""
+
+    def __init__(self, p: int = 12):
+        self.p = p
+        self.registros = np.zeros(1 << p, dtype="uint8")
+
+    def atualizar(self, hashes: np.ndarray) -> None:
+        if hashes.size == 0:
+            return
+        idx = (hashes >> np.uint64(64 - self.p)).astype(np.intp)
+        resto = hashes & np.uint64((1 << (64 - self.p)) - 1)
+        # posição do primeiro bit 1 nos 64-p bits restantes (frexp dá o número de bits de `resto`)
+        _, bits = np.frexp(resto.astype("float64"))
+        posto = 64 - self.p + 1 - bits
+        # maior posto por registro sem np.maximum.at: bincount de (registro, posto) e o último presente
+        presentes = np.bincount(idx * 64 + posto, minlength=self.registros.size * 64)
+        presentes = presentes.reshape(-1, 64) > 0
+        maior = np.where(presentes.any(axis=1), 63 - np.argmax(presentes[:, ::-1], axis=1), 0)
+        np.maximum(self.registros, maior.astype("uint8"), out=self.registros)
+
+    def merge(self, outro: "HyperLogLog") -> "HyperLogLog":
+        np.maximum(self.registros, outro.registros, out=self.registros)
+        return self
+
+    @property
+    def estimativa(self) -> int:
+        m = self.registros.size
+        alfa = 0.7213 / (1 + 1.079 / m)
+        e = alfa * m * m / np.exp2(-self.registros.astype("float64")).sum()
+        zeros = int((self.registros == 0).sum())
+        if e <= 2.5 * m and zeros:
+            e = m * np.log(m / zeros)  # correção para cardinalidades pequenas (linear counting)
+        return int(round(e))
+
+
+class CountMin:
+    """
+    Sketch Count-Min: `profundidade` linhas de `largura` contadores; a estimativa (mínimo entre as
+    linhas) nunca fica abaixo da contagem real. Cada linha usa 16 bits diferentes do hash.
+    """
+
+    def __init__(self, largura_bits: int = 16, profundidade: int = 4):
+        self.largura_bits = largura_bits
+        self.tabela = np.zeros((profundidade, 1 << largura_bits), dtype="int64")
+
+    def _posicoes(self, hashes: np.ndarray, linha: int) -> np.ndarray:
+        mascara = np.uint64((1 << self.largura_bits) - 1)
+        return ((hashes >> np.uint64(linha * self.largura_bits)) & mascara).astype(np.intp)
+
+    def somar(self, hashes: np.ndarray, contagens: np.ndarray) -> None:
+        """Soma `contagens` aos hashes (já agregados: um hash por valor distinto do bloco)."""
+        largura = self.tabela.shape[1]
+        for r in range(self.tabela.shape[0]):
+            self.tabela[r] += np.bincount(self._posicoes(hashes, r), weights=contagens,
+                                          minlength=largura).astype("int64")
+
+    def estimar(self, hashes: np.ndarray) -> np.ndarray:
+        return np.min([self.tabela[r, self._posicoes(hashes, r)] for r in range(self.tabela.shape[0])], axis=0)
+
+
+class ContagemTopK:
+    """
+    Contagem de valores frequentes (Space-Saving mesclável) com no máximo `capacidade` itens.
+    Contagens exatas enquanto a coluna tiver até `capacidade` valores distintos; depois, limites superiores.
+    """
+
+    def __init__(self, capacidade: int = 1000):
+        self.capacidade = capacidade
+        self.contagens = pd.Series(dtype="int64")
+
+    @property
+    def minimo(self) -> int:
+        return int(self.contagens.min()) if len(self.contagens) >= self.capacidade else 0
+
+    def atualizar(self, serie: pd.Series) -> None:
+        vc = serie.value_counts(dropna=True)
+        self._mesclar(vc, 0)
+
+    def somar(self, contagens: pd.Series) -> None:
+        """Soma as contagens exatas de um bloco (índice = valor), resumidas antes ao mesmo tamanho."""
+        if len(contagens) > self.capacidade:
+            contagens = contagens.nlargest(self.capacidade)
+            self._mesclar(contagens, int(contagens.iloc[-1]))
+        else:
+            self._mesclar(contagens, 0)
+
+    def merge(self, outro: "ContagemTopK") -> "ContagemTopK":
+        self._mesclar(outro.contagens, outro.minimo)
+        return self
+
+    def _mesclar(self, outras: pd.Series, minimo_outras: int) -> None:
+        if outras.empty:
+            return
+        if self.contagens.empty:
+            soma = outras
+        else:
+            idx = self.contagens.index.union(outras.index)
+            soma = (self.contagens.reindex(idx, fill_value=self.minimo)
+                    + outras.reindex(idx, fill_value=minimo_outras))
+        self.contagens = soma.nlargest(self.capacidade).astype("int64")
+
+    def top(self, n: int = 10) -> pd.Series:
+        return self.contagens.nlargest(n)
+
+
+@dataclass
+class Contagem:
+    """Top-k de uma coluna e como foi obtido."""
+    top: pd.Series  # None quando a coluna é quase única e foi pulada
+    total: int      # valores não nulos
+    distintos: int  # exato até LIMITE_EXATO; acima, estimativa do HyperLogLog
+    metodo: str     # "exato" | "sketch" | "faixas" | "quase_unica"
+
+
+def _serie_top(valores, contagens, nome, topn: int) -> pd.Series:
+    contagens = np.asarray(contagens, dtype="int64")
+    # ordem estável: empates ficam na ordem de primeira aparição, como no value_counts
+    ordem = np.argsort(-contagens, kind="stable")[:topn]
+    indice = pd.Index([valores[i] for i in ordem], name=nome)
+    return pd.Series(contagens[ordem], index=indice, name="count")
+
+
+def _categorias(serie: pd.Series, topn: int) -> Contagem:
+    codigos = serie.cat.codes.to_numpy()
+    codigos = codigos[codigos >= 0]  # -1 = nulo
+    n_cat = len(serie.cat.categories)
+    contagens = np.bincount(codigos, minlength=n_cat)
+    # categorias na ordem de primeira aparição (desempate igual ao value_counts)
+    primeira = np.full(n_cat, codigos.size)
+    np.minimum.at(primeira, codigos, np.arange(codigos.size))
+    presentes = np.flatnonzero(contagens)
+    presentes = presentes[np.argsort(primeira[presentes], kind="stable")]
+    top = _serie_top(serie.cat.categories[presentes], contagens[presentes], serie.name, topn)
+    return Contagem(top, int(contagens.sum()), int(presentes.size), "exato")
+
+
+def _faixas(serie: pd.Series, topn: int, total: int, distintos: int) -> Contagem:
+    """Coluna numérica quase única: contagem por faixa de valores (histograma de `topn` faixas)."""
+    v = serie.to_numpy(dtype="float64", na_value=np.nan)
+    v = v[np.isfinite(v)]
+    contagens, bordas = np.histogram(v, bins=topn)
+    rotulos = [f"[{a:.4g}, {b:.4g}{']' if i == topn - 1 else ')'}"
+               for i, (a, b) in enumerate(zip(bordas[:-1], bordas[1:]))]
+    return Contagem(_serie_top(rotulos, contagens, serie.name, topn), total, distintos, "faixas")
+
+
+def _hashes(valores) -> np.ndarray:
+    return pd.util.hash_pandas_object(valores, index=False, categorize=False).to_numpy()
+
+
+def _quase_unica(total: int, distintos: int) -> bool:
+    return total >= MIN_LINHAS_UNICA and distintos >= LIMIAR_UNICA * total
+
+
+def _sem_top(s: pd.Series, topn: int, total: int, distintos: int) -> Contagem:
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return _faixas(s, topn, total, distintos)
+    return Contagem(None, total, distintos, "quase_unica")
+
+
+def _resumir(vc: pd.Series, topk: ContagemTopK, cms: CountMin, hll: HyperLogLog) -> None:
+    """Passa as contagens exatas de um bloco para os sketches."""
+    hashes = _hashes(vc.index)
+    cms.somar(hashes, vc.to_numpy())
+    topk.somar(vc)
+    hll.atualizar(hashes)  # HLL ignora repetição: basta o hash dos distintos de cada bloco
+
+
+def contar(serie: pd.Series, topn: int = 10) -> Contagem:
+    """
+    Top `topn` valores da coluna (sem nulos) com memória limitada.
+    Colunas quase únicas: numéricas viram faixas; as demais voltam com top=None.
+    """
+    # os nulos ficam na série (dropna copiaria a coluna): value_counts já os ignora
+    s = serie
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return _categorias(s, topn)
+    total = int(s.count())
+    hll = None
+    exato, topk, cms = s.iloc[:PREFIXO].value_counts(sort=False), None, None
+
+    if _quase_unica(int(exato.sum()), len(exato)) and len(s) > PREFIXO:
+        # início quase sem repetição: confirma com HyperLogLog na coluna toda (só hash, sem contar)
+        hll = HyperLogLog()
+        for ini in range(0, len(s), BLOCO):
+            hll.atualizar(_hashes(s.iloc[ini:ini + BLOCO].dropna()))
+        if _quase_unica(total, hll.estimativa):
+            return _sem_top(s, topn, total, hll.estimativa)
+
+    for ini in range(PREFIXO, len(s), BLOCO):
+        # contagem exata só do bloco (tabela limitada a BLOCO valores), sem ordenar
+        vc = s.iloc[ini:ini + BLOCO].value_counts(sort=False)
+        if topk is None:
+            if len(vc) <= LIMITE_EXATO:
+                exato = pd.concat([exato, vc]).groupby(level=0, sort=False).sum()
+                if len(exato) <= LIMITE_EXATO:
+                    continue
+                vc, exato = exato, pd.Series(dtype="int64")
+            # passou do limite: as tabelas exatas viram Space-Saving + Count-Min
+            topk, cms = ContagemTopK(CAPACIDADE_SKETCH), CountMin()
+            hll = hll or HyperLogLog()
+            if not exato.empty:
+                _resumir(exato, topk, cms, hll)
+            exato = None
+        _resumir(vc, topk, cms, hll)
+
+    if topk is None:
+        distintos = len(exato)
+        if _quase_unica(total, distintos):
+            return _sem_top(s, topn, total, distintos)
+        return Contagem(_serie_top(exato.index, exato.to_numpy(), s.name, topn), total, distintos, "exato")
+
+    distintos = max(hll.estimativa, LIMITE_EXATO + 1)
+    if _quase_unica(total, distintos):
+        return _sem_top(s, topn, total, distintos)
+    # Space-Saving e Count-Min superestimam: o menor dos dois é o limite mais justo
+    cand = topk.contagens
+    estimadas = np.minimum(cand.to_numpy(), cms.estimar(_hashes(cand.index)))
+    return Contagem(_serie_top(cand.index, estimadas, s.name, topn), total, distintos, "sketch")
@@ -0,0 +1,190 @@
+# utils/correlacao.py
+from statistics import NormalDist
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset, tarefas
+from utils.cache import RESULTADOS_MB, LRUCache
+
+_MATRIZES = LRUCache(maxsize=16, nome="correlacao", max_mb=RESULTADOS_MB, disco="correlacao")
+
+# Tamanho alvo de cada bloco de linhas (n_linhas × p colunas em float64)
+BLOCO_BYTES = 64 * 1024 * 1024
+# Postos guardados ao mesmo tempo no Spearman (dois grupos de colunas)
+POSTOS_BYTES = 256 * 1024 * 1024
+
+
+def _linhas_por_bloco(p: int) -> int:
+    return max(1024, BLOCO_BYTES // (8 * max(p, 1)))
+
+
+def _bloco(num: pd.DataFrame, ini: int, fim: int, medias: np.ndarray) -> np.ndarray:
+    """Fatia [ini, fim) das colunas, centrada pelas médias, em float64 contíguo."""
+    X = np.empty((fim - ini, num.shape[1]), dtype="float64")
+    for j, c in enumerate(num.columns):
+        X[:, j] = num[c].iloc[ini:fim].to_numpy(dtype="float64", na_value=np.nan)
+    X -= medias
+    return X
+
+
+def _pearson(num: pd.DataFrame) -> np.ndarray:
+    """
+    Pearson par a par (como o pandas: só linhas válidas nas duas colunas) acumulando
+    produtos matriciais (BLAS) por blocos de linhas. Nunca materializa a cópia n×p inteira.
+    """
+    n, p = num.shape
+    medias = np.array([num[c].mean() for c in num.columns], dtype="float64")
+    medias = np.nan_to_num(medias)
+    tem_nulos = any(num[c].hasnans for c in num.columns)
+
+    sxy = np.zeros((p, p))
+    if tem_nulos:
+        cont = np.zeros((p, p))  # linhas válidas nas duas colunas
+        sx = np.zeros((p, p))    # soma de x_i onde x_j também é válido
+        sxx = np.zeros((p, p))
+    passo = _linhas_por_bloco(p)
+    tarefas.etapa("correlação por blocos de linhas")
+    for ini in range(0, n, passo):
+        X = _bloco(num, ini, min(ini + passo, n), medias)
+        if tem_nulos:
+            M = (~np.isnan(X)).astype("float64")
+            np.nan_to_num(X, copy=False)
+            cont += M.T @ M
+            sx += X.T @ M
+            sxx += np.square(X).T @ M
+        sxy += X.T @ X
+        tarefas.progresso(min(ini + passo, n), n)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if tem_nulos:
+            cov = cont * sxy - sx * sx.T
+            var_i = cont * sxx - sx * sx
+            corr = cov / np.sqrt(var_i * var_i.T)
+            corr[cont < 2] = np.nan
+        else:
+            d = np.sqrt(np.diag(sxy))
+            corr = sxy / np.outer(d, d)
+    np.clip(corr, -1.0, 1.0, out=corr)
+    diag = np.diag(corr).copy()
+    corr[np.diag_indices(p)] = np.where(np.isnan(diag), np.nan, 1.0)
+    return corr
+
+
+def _postos(num: pd.DataFrame, colunas, dtype) -> np.ndarray:
+    """Postos (média nos empates; NaN fica NaN) das `colunas`, como array linhas × colunas."""
+    R = np.empty((len(num), len(colunas)), dtype=dtype, order="F")
+    for j, c in enumerate(colunas):
+        R[:, j] = num[c].rank(method="average").to_numpy(dtype=dtype, na_value=np.nan)
+    return R
+
+
+def _cruzada(A: np.ndarray, B: np.ndarray) -> np.ndarray:
+    """
+    Pearson entre cada coluna de A e cada coluna de B (só linhas válidas nas duas), por blocos
+    de linhas como em `_pearson`.
+    """
+    n = A.shape[0]
+    ma, mb = np.nan_to_num(np.nanmean(A, axis=0)), np.nan_to_num(np.nanmean(B, axis=0))
+    cont = np.zeros((A.shape[1], B.shape[1]))
+    sxy, sx, sy, sxx, syy = (np.zeros_like(cont) for _ in range(5))
+    passo = _linhas_por_bloco(A.shape[1] + B.shape[1])
+    for ini in range(0, n, passo):
+        X = A[ini:ini + passo].astype("float64") - ma
+        Y = B[ini:ini + passo].astype("float64") - mb
+        MX, MY = (~np.isnan(X)).astype("float64"), (~np.isnan(Y)).astype("float64")
+        np.nan_to_num(X, copy=False)
+        np.nan_to_num(Y, copy=False)
+        cont += MX.T @ MY
+        sxy += X.T @ Y
+        sx += X.T @ MY
+        sy += MX.T @ Y
+        sxx += np.square(X).T @ MY
+        syy += MX.T @ np.square(Y)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        corr = (cont * sxy - sx * sy) / np.sqrt((cont * sxx - sx * sx) * (cont * syy - sy * sy))
+    corr[cont < 2] = np.nan
+    return corr
+
+
+def _spearman(num: pd.DataFrame) -> np.ndarray:
+    """
+    Spearman = Pearson dos postos de cada coluna inteira (o pandas re-ranqueia por par quando há
+    nulos). As colunas vão em grupos de até POSTOS_BYTES de postos: só os postos de dois grupos
+    existem ao mesmo tempo, e cada par de grupos é um bloco da matriz. Se o n×p inteiro não
+    cabe, os postos dos grupos internos são recalculados a cada grupo externo.
+    """
+    n, p = num.shape
+    dtype = "float32" if n <= 2**23 else "float64"  # float32 enquanto os postos forem exatos
+    por_grupo = max(1, POSTOS_BYTES // (np.dtype(dtype).itemsize * max(n, 1) * 2))
+    grupos = [list(num.columns[i:i + por_grupo]) for i in range(0, p, por_grupo)]
+    inicio = np.cumsum([0] + [len(g) for g in grupos])
+    corr = np.empty((p, p))
+    total, feitos = len(grupos) * (len(grupos) + 1) // 2, 0
+    tarefas.etapa("correlação de Spearman por blocos de colunas")
+    for a, ga in enumerate(grupos):
+        A = _postos(num, ga, dtype)
+        for b in range(a, len(grupos)):
+            B = A if b == a else _postos(num, grupos[b], dtype)
+            bloco = _cruzada(A, B)
+            corr[inicio[a]:inicio[a + 1], inicio[b]:inicio[b + 1]] = bloco
+            corr[inicio[b]:inicio[b + 1], inicio[a]:inicio[a + 1]] = bloco.T
+            feitos += 1
+            tarefas.progresso(feitos, total)
+    np.clip(corr, -1.0, 1.0, out=corr)
+    diag = np.diag(corr).copy()
+    corr[np.diag_indices(p)] = np.where(np.isnan(diag), np.nan, 1.0)
+    return corr
+
+
+def _calcular(df: pd.DataFrame, metodo: str, amostra, random_state: int) -> pd.DataFrame:
+    num = df.select_dtypes("number")
+    if amostra is not None and amostra < len(num):
+        rng = np.random.default_rng(random_state)
+        linhas = np.sort(rng.choice(len(num), size=amostra, replace=False))
+        num = num.iloc[linhas]
+    if metodo not in ("pearson", "spearman"):
+        raise ValueError(f"Método de correlação desconhecido: {metodo}")
+    valores = _spearman(num) if metodo == "spearman" else _pearson(num)
+    corr = pd.DataFrame(valores, index=num.columns, columns=num.columns)
+    corr.attrs["metodo"] = metodo
+    corr.attrs["n_linhas"] = len(num)
+    corr.attrs["amostra"] = amostra is not None and amostra < len(df)
+    return corr
+
+
+def matriz(df: pd.DataFrame, metodo: str = "pearson", amostra: int = None, random_state: int = 42) -> pd.DataFrame:
+    """
+    Matriz de correlação (Pearson ou Spearman) das colunas numéricas, calculada uma vez por dataset.
+    - amostra: nº de linhas sorteadas (None = todas); veja `erro_amostral`
+    """
+    chave = (dataset.chave(df), metodo, amostra, random_state)
+    return _MATRIZES.get_or_compute(chave, lambda: _calcular(df, metodo, amostra, random_state))
+
+
+def par_mais_forte(df: pd.DataFrame, metodo: str = "pearson"):
+    """(x, y, r) do par de colunas numéricas com maior |r| na matriz em cache; None se não houver."""
+    corr = matriz(df, metodo)
+    i, j = np.triu_indices(corr.shape[0], k=1)
+    r = np.abs(corr.to_numpy()[i, j])
+    if r.size == 0 or np.isnan(r).all():
+        return None
+    k = int(np.nanargmax(r))
+    return corr.index[i[k]], corr.columns[j[k]], float(corr.iat[i[k], j[k]])
+
+
+def erro_amostral(corr: pd.DataFrame, confianca: float = 0.95) -> pd.DataFrame:
+    """
+    Meia-largura do intervalo de confiança (transformação z de Fisher) de cada correlação
+    calculada em amostra. Para matrizes exatas retorna zeros.
+    """
+    if not corr.attrs.get("amostra"):
+        return pd.DataFrame(0.0, index=corr.index, columns=corr.columns)
+    z_crit = NormalDist().inv_cdf(0.5 + confianca / 2)
+    n = corr.attrs["n_linhas"]
+    # Spearman: fator de Fieller-Hartley-Pearson (1,03) no erro-padrão
+    ep = (1.03 if corr.attrs.get("metodo") == "spearman" else 1.0) / np.sqrt(max(n - 3, 1))
+    r = corr.to_numpy().clip(-0.999999, 0.999999)
+    z = np.arctanh(r)
+    meia = np.maximum(np.tanh(z + z_crit * ep) - r, r - np.tanh(z - z_crit * ep))
+    return pd.DataFrame(meia, index=corr.index, columns=corr.columns)
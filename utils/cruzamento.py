@@ -0,0 +1,171 @@
+# utils/cruzamento.py
+"""
+Tabela cruzada de duas colunas sem montar a tabela densa inteira.
+
+As colunas viram códigos inteiros (factorize ordenado, ou os códigos de `category`) e os pares
+são contados com um único bincount sobre a chave combinada a·nB + b (ou tabela hash, quando
+nA·nB passa de LIMITE_DENSO). A partir das contagens não nulas saem, na mesma passada:
+- a matriz completa (esparsa), para exportar;
+- a tabela de exibição com as TOP linhas/colunas mais frequentes e o resto em "Outros";
+- qui-quadrado de independência e V de Cramér.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset
+from utils.cache import LRUCache
+
+_CRUZAMENTOS = LRUCache(maxsize=32, nome="cruzamento")
+
+# Linhas/colunas mostradas (as demais somam em "Outros")
+TOP = 50
+OUTROS = "Outros"
+# Até quantas células (nA·nB) a contagem usa bincount direto
+LIMITE_DENSO = 1 << 24
+# Densidade abaixo da qual a tabela completa sai esparsa
+LIMIAR_ESPARSA = 0.1
+
+
+@dataclass
+class Cruzamento:
+    """Contagens de a × b, tabela de exibição e medidas de associação."""
+    tabela: pd.DataFrame      # até TOP × TOP (+ "Outros"), densa
+    matriz: object            # scipy.sparse.csr_matrix com todas as contagens
+    rotulos_linhas: pd.Index
+    rotulos_colunas: pd.Index
+    n: int
+    qui2: float
+    gl: int
+    p_valor: float
+    v_cramer: float
+
+    @property
+    def truncada(self) -> bool:
+        return self.tabela.shape != self.matriz.shape
+
+    @property
+    def densidade(self) -> float:
+        celulas = self.matriz.shape[0] * self.matriz.shape[1]
+        return self.matriz.nnz / celulas if celulas else 0.0
+
+    def completa(self) -> pd.DataFrame:
+        """Tabela inteira: esparsa (pandas SparseDtype) se tiver poucas células preenchidas."""
+        a, b = self.tabela.index.name, self.tabela.columns.name
+        celulas = self.matriz.shape[0] * self.matriz.shape[1]
+        if self.densidade < LIMIAR_ESPARSA or celulas > LIMITE_DENSO:
+            df = pd.DataFrame.sparse.from_spmatrix(self.matriz, index=self.rotulos_linhas,
+                                                   columns=self.rotulos_colunas)
+        else:
+            df = pd.DataFrame(self.matriz.toarray(), index=self.rotulos_linhas, columns=self.rotulos_colunas)
+        df.index.name, df.columns.name = a, b
+        return df
+
+    def longa(self) -> pd.DataFrame:
+        """Só as combinações presentes, uma por linha (a, b, contagem): cabe mesmo quando a completa não cabe."""
+        m = self.matriz.tocoo()
+        return pd.DataFrame({self.tabela.index.name: self.rotulos_linhas[m.row],
+                             self.tabela.columns.name: self.rotulos_colunas[m.col],
+                             "contagem": m.data.astype("int64")})
+
+    def resumo(self) -> str:
+        """Uma linha com a associação (para textos e conclusões)."""
+        if np.isnan(self.v_cramer):
+            return "associação indefinida (uma das colunas tem um só valor)"
+        forca = "fraca" if self.v_cramer < 0.1 else "moderada" if self.v_cramer < 0.3 else "forte"
+        p = "p < 0.001" if self.p_valor < 0.001 else f"p = {self.p_valor:.3f}"
+        return f"V de Cramér = {self.v_cramer:.3f} (associação {forca}; χ² = {self.qui2:,.1f}, gl = {self.gl:,}, {p})"
+
+
+def _codigos(s: pd.Series):
+    if isinstance(s.dtype, pd.CategoricalDtype):
+        return s.cat.codes.to_numpy().astype("int64"), s.cat.categories
+    codigos, rotulos = pd.factorize(s, sort=True)
+    return codigos.astype("int64"), pd.Index(rotulos)
+
+
+def _top(totais: np.ndarray, top: int):
+    """(novo índice de cada linha, linhas mantidas): as `top` maiores na ordem dos rótulos; o resto vai para Outros."""
+    escolhidas = np.sort(np.argsort(-totais, kind="stable")[:top])
+    novo = np.full(totais.size, escolhidas.size, dtype="int64")  # escolhidas.size = posição de "Outros"
+    novo[escolhidas] = np.arange(escolhidas.size)
+    return novo, escolhidas
+
+
+def _rotulos(rotulos: pd.Index, escolhidas: np.ndarray, outros: bool, nome) -> pd.Index:
+    if not outros:
+        return rotulos[escolhidas].rename(nome)
+    return pd.Index(list(rotulos[escolhidas]) + [OUTROS], name=nome)
+
+
+def de_contagens(i, j, n, rotulos_a, rotulos_b, a, b, top: int = TOP) -> Cruzamento:
+    """
+    Monta o Cruzamento a partir das células não nulas (linha i, coluna j, contagem n).
+    Linhas e colunas sem nenhuma contagem são descartadas (como no pd.crosstab).
+    """
+    from scipy import sparse, stats
+
+    i, j, n = (np.asarray(x, dtype="int64") for x in (i, j, n))
+    lin = np.bincount(i, weights=n, minlength=len(rotulos_a))
+    col = np.bincount(j, weights=n, minlength=len(rotulos_b))
+    # descarta linhas/colunas vazias e renumera
+    vivas_a, vivas_b = np.flatnonzero(lin), np.flatnonzero(col)
+    mapa_a = np.cumsum(lin > 0) - 1
+    mapa_b = np.cumsum(col > 0) - 1
+    i, j = mapa_a[i], mapa_b[j]
+    lin, col = lin[vivas_a], col[vivas_b]
+    rotulos_a, rotulos_b = pd.Index(rotulos_a)[vivas_a], pd.Index(rotulos_b)[vivas_b]
+    R, C, total = lin.size, col.size, int(n.sum())
+
+    # qui-quadrado só com as células preenchidas: Σ(O−E)²/E = N·Σ O²/(linha·coluna) − N
+    if total and R > 1 and C > 1:
+        qui2 = float(total * np.sum(n.astype("float64") ** 2 / (lin[i] * col[j])) - total)
+        gl = (R - 1) * (C - 1)
+        p_valor = float(stats.chi2.sf(qui2, gl))
+        v = float(np.sqrt(qui2 / (total * min(R - 1, C - 1))))
+    else:
+        qui2, gl, p_valor, v = np.nan, 0, np.nan, np.nan
+
+    matriz = sparse.csr_matrix((n, (i, j)), shape=(R, C))
+
+    # tabela de exibição: TOP linhas/colunas mais frequentes + "Outros"
+    ni, esc_a = _top(lin, top)
+    nj, esc_b = _top(col, top)
+    k_a, k_b = esc_a.size + (R > top), esc_b.size + (C > top)
+    densa = np.bincount(ni[i] * k_b + nj[j], weights=n, minlength=k_a * k_b).reshape(k_a, k_b)
+    tabela = pd.DataFrame(densa.astype("int64"),
+                          index=_rotulos(rotulos_a, esc_a, R > top, a),
+                          columns=_rotulos(rotulos_b, esc_b, C > top, b))
+    return Cruzamento(tabela, matriz, rotulos_a, rotulos_b, total, qui2, gl, p_valor, v)
+
+
+def _cruzar(df: pd.DataFrame, a: str, b: str, top: int) -> Cruzamento:
+    ca, rot_a = _codigos(df[a])
+    cb, rot_b = _codigos(df[b])
+    validos = (ca >= 0) & (cb >= 0)
+    ca, cb = ca[validos], cb[validos]
+    na, nb = len(rot_a), len(rot_b)
+    chave = ca * nb + cb
+    if na * nb <= LIMITE_DENSO:
+        cont = np.bincount(chave, minlength=na * nb)
+        celulas = np.flatnonzero(cont)
+        n = cont[celulas]
+    else:
+        # muitas combinações possíveis: conta só as que aparecem (tabela hash)
+        codigos, celulas = pd.factorize(chave)
+        n = np.bincount(codigos)
+    return de_contagens(celulas // nb, celulas % nb, n, rot_a, rot_b, a, b, top)
+
+
+def cruzar(df: pd.DataFrame, a: str, b: str, top: int = TOP) -> Cruzamento:
+    """Tabela cruzada a × b (sem nulos) do DataFrame, calculada uma vez por dataset/colunas."""
+    return _CRUZAMENTOS.get_or_compute((dataset.chave(df), a, b, top), lambda: _cruzar(df, a, b, top))
+
+
+def de_pares(pares, a: str, b: str, top: int = TOP) -> Cruzamento:
+    """Cruzamento a partir de [(valor de a, valor de b, contagem)] (ex.: GROUP BY de um motor)."""
+    va, vb, n = zip(*pares) if pares else ((), (), ())
+    ia, rot_a = pd.factorize(pd.Series(va, dtype=object), sort=True)
+    ib, rot_b = pd.factorize(pd.Series(vb, dtype=object), sort=True)
+    return de_contagens(ia, ib, n, pd.Index(rot_a), pd.Index(rot_b), a, b, top)
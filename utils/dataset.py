@@ -0,0 +1,304 @@
+# utils/dataset.py
+import hashlib
+import io
+import os
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from utils.cache import DIR_CACHE, LRUCache
+
+_ATTR_OTIM = "otimizacao_tipos"
+_BLOCO = 8 * 1024 * 1024
+
+# Poucos datasets em memória: cada um pode ter vários GB.
+_MEMORIA = LRUCache(maxsize=int(os.getenv("AGENTE_EDA_CACHE_DATASETS", "2")), nome="dataset")
+
+
+# ---------------------- Hash do conteúdo ----------------------
+def hash_conteudo(arquivo) -> str:
+    """
+    Hash (blake2b) dos bytes do arquivo enviado.
+    Aceita bytes, caminho ou objeto tipo arquivo (ex.: UploadedFile do Streamlit).
+    """
+    h = hashlib.blake2b(digest_size=20)
+    if isinstance(arquivo, (bytes, bytearray, memoryview)):
+        h.update(arquivo)
+    elif isinstance(arquivo, (str, os.PathLike)):
+        with open(arquivo, "rb") as f:
+            for bloco in iter(lambda: f.read(_BLOCO), b""):
+                h.update(bloco)
+    elif hasattr(arquivo, "getbuffer"):
+        # BytesIO/UploadedFile: lê o buffer sem copiar
+        h.update(arquivo.getbuffer())
+    else:
+        pos = arquivo.tell()
+        arquivo.seek(0)
+        for bloco in iter(lambda: arquivo.read(_BLOCO), b""):
+            h.update(bloco)
+        arquivo.seek(pos)
+    return h.hexdigest()
+
+
+def chave(df: pd.DataFrame) -> str:
+    """
+    Identificador do conteúdo de um DataFrame, usado como chave dos caches.
+    Datasets registrados por `marcar` (os de `carregar`, as amostras) guardam a chave e têm os
+    arrays somente leitura: uma escrita no lugar falha (colunas Arrow, imutáveis, trocam de array
+    e perdem a chave) em vez de deixar a chave velha. Os demais recebem um hash das linhas (uma
+    passada vetorizada) a cada chamada.
+    """
+    guardado = _CHAVES.get(id(df))
+    if guardado is not None and guardado[0]() is df:
+        if _mesmas_colunas(guardado[2], df):
+            return guardado[1]
+        del _CHAVES[id(df)]  # coluna trocada, acrescentada ou removida: volta a ser um df comum
+    linhas = pd.util.hash_pandas_object(df, index=True).to_numpy()
+    h = hashlib.blake2b(linhas.tobytes(), digest_size=20)
+    h.update(repr((list(df.columns), [str(t) for t in df.dtypes])).encode())
+    return h.hexdigest()
+
+
+# id(df) → (weakref do df, chave, (forma, colunas, dtypes, índice, dados de cada coluna))
+_CHAVES = {}
+
+
+def _dados_colunas(df: pd.DataFrame, congelar: bool = False):
+    """
+    O que guarda os valores de cada coluna: o ChunkedArray (Arrow, imutável: uma escrita troca o
+    objeto) ou o array numpy (com `congelar`, somente leitura). None se alguma coluna for de outra
+    extensão (inteiros com máscara, esparsas...), que não há como congelar.
+    """
+    dados = []
+    for _, s in df.items():
+        arr = s.array
+        if isinstance(arr, pd.arrays.ArrowExtensionArray):
+            dados.append(arr.__arrow_array__())
+            continue
+        if isinstance(arr, pd.Categorical):
+            v = arr.codes
+        elif isinstance(arr, (pd.arrays.DatetimeArray, pd.arrays.TimedeltaArray, pd.arrays.PeriodArray)):
+            v = arr.asi8
+        elif isinstance(arr, pd.arrays.NumpyExtensionArray):
+            v = np.asarray(arr)
+        else:
+            return None
+        if congelar:
+            base = v
+            while isinstance(base, np.ndarray):  # a visão e os arrays por trás dela
+                base.flags.writeable = False
+                base = base.base
+        dados.append(v)
+    return dados
+
+
+def _mesmas_colunas(assinatura: tuple, df: pd.DataFrame) -> bool:
+    forma, colunas, tipos, indice, dados = assinatura
+    if df.shape != forma or tuple(df.columns) != colunas or tuple(df.dtypes) != tipos or df.index is not indice:
+        return False
+    atuais = _dados_colunas(df)
+    if atuais is None:
+        return False
+    # os arrays guardados seguram a memória: o mesmo endereço é o mesmo array (congelado)
+    return all(a is b or (isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and a.shape == b.shape
+                          and a.__array_interface__["data"][0] == b.__array_interface__["data"][0])
+               for a, b in zip(atuais, dados))
+
+
+def marcar(df: pd.DataFrame, h: str) -> pd.DataFrame:
+    """
+    Cópia de `df` registrada com a chave `h` (enquanto existir e mantiver as mesmas colunas), sem
+    o hash das linhas: o hash do arquivo, ou uma chave derivada da de outro df (ex.: a amostra).
+    A cópia tem arrays próprios, somente leitura (congelar as visões que o pandas monta sobre um
+    array alheio não impediria a escrita). Se alguma coluna não puder ser congelada, volta o
+    próprio `df`, sem registro.
+    """
+    copia = df.copy()
+    dados = _dados_colunas(copia, congelar=True)
+    if dados is None:
+        return df
+    df, i = copia, id(copia)
+
+    def esquecer(ref):
+        if _CHAVES.get(i, (None,))[0] is ref:
+            del _CHAVES[i]
+    _CHAVES[i] = (weakref.ref(df, esquecer), h, (df.shape, tuple(df.columns), tuple(df.dtypes), df.index, dados))
+    return df
+
+
+# ---------------------- Cache em disco ----------------------
+def _caminho(h: str, ext: str) -> str:
+    return os.path.join(DIR_CACHE, f"{h}.{ext}")
+
+
+def _ler_disco(h: str):
+    # só Parquet: o diretório pode ser compartilhado, e ler um pickle dele executaria código
+    caminho = _caminho(h, "parquet")
+    if os.path.exists(caminho):
+        try:
+            return pd.read_parquet(caminho)
+        except Exception:
+            # arquivo corrompido/incompleto: ignora e reprocessa o CSV
+            pass
+    return None
+
+
+def _gravar_disco(df: pd.DataFrame, h: str) -> None:
+    """Grava em Parquet (Arrow); se a tabela ainda assim não couber no schema Arrow, fica só na memória."""
+    try:
+        os.makedirs(DIR_CACHE, exist_ok=True)
+    except OSError:
+        return
+    destino = _caminho(h, "parquet")
+    tmp = f"{destino}.{os.getpid()}.tmp"
+    try:
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, destino)  # escrita atômica
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _texto_misturado(df: pd.DataFrame) -> pd.DataFrame:
+    """Colunas object com tipos misturados (ex.: números e texto) viram texto, como o Parquet as guarda."""
+    misturadas = [c for c in df.columns if pd.api.types.is_object_dtype(df[c])
+                  and pd.api.types.infer_dtype(df[c], skipna=True) in ("mixed", "mixed-integer")]
+    return df.astype({c: str for c in misturadas}) if misturadas else df
+
+
+# ---------------------- Otimização de tipos ----------------------
+def _arrow_disponivel() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _compactar_coluna(s: pd.Series, limite_categoria: float, max_categorias: int) -> pd.Series:
+    """Versão mais compacta da coluna, sem perda de informação (ou a própria coluna)."""
+    if pd.api.types.is_bool_dtype(s) or isinstance(s.dtype, pd.CategoricalDtype):
+        return s
+    if pd.api.types.is_integer_dtype(s):
+        return pd.to_numeric(s, downcast="integer")
+    if pd.api.types.is_float_dtype(s):
+        f32 = s.astype("float32")
+        # só rebaixa se todos os valores voltarem idênticos para float64
+        if np.array_equal(f32.to_numpy(dtype="float64"), s.to_numpy(dtype="float64"), equal_nan=True):
+            return f32
+        return s
+    if pd.api.types.is_object_dtype(s) or pd.api.types.is_string_dtype(s):
+        if pd.api.types.infer_dtype(s, skipna=True) not in ("string", "empty"):
+            return s  # mistura de tipos: mantém object para não converter números em texto
+        distintos = s.nunique(dropna=True) if len(s) else 0
+        if len(s) and distintos <= max_categorias and distintos / len(s) <= limite_categoria:
+            return s.astype("category")
+        arrow = isinstance(s.dtype, pd.StringDtype) and s.dtype.storage == "pyarrow"
+        if not arrow and _arrow_disponivel():
+            return s.astype(pd.StringDtype("pyarrow"))
+    return s
+
+
+def otimizar_tipos(df: pd.DataFrame, limite_categoria: float = 0.05, max_categorias: int = 10_000):
+    """
+    Compacta os tipos do DataFrame:
+    - inteiros/floats rebaixados quando não há perda (int8..int64, float32)
+    - texto com poucos valores distintos (≤ limite_categoria × linhas e ≤ max_categorias) → category
+    - demais textos → string Arrow
+    Retorna (df_otimizado, relatorio) com a memória por coluna antes/depois.
+    """
+    antes = df.memory_usage(deep=True, index=False)
+    out = pd.DataFrame({c: _compactar_coluna(df[c], limite_categoria, max_categorias) for c in df.columns}, index=df.index)
+    depois = out.memory_usage(deep=True, index=False)
+    relatorio = pd.DataFrame({
+        "Coluna": df.columns,
+        "Tipo original": df.dtypes.astype(str).values,
+        "Tipo otimizado": out.dtypes.astype(str).values,
+        "Antes (MB)": (antes.values / 2**20).round(3),
+        "Depois (MB)": (depois.values / 2**20).round(3),
+    })
+    relatorio["Economia (%)"] = (
+        (1 - depois.values / np.maximum(antes.values, 1)) * 100
+    ).round(1)
+    return out, relatorio
+
+
+def relatorio_otimizacao(df: pd.DataFrame):
+    """Relatório salvo por `carregar(..., otimizar=True)` (ou None se o df não foi otimizado)."""
+    dados = df.attrs.get(_ATTR_OTIM)
+    return pd.DataFrame(dados) if dados else None
+
+
+# ---------------------- Carregamento ----------------------
+def preparar_tempo(df: pd.DataFrame):
+    """Detecta a coluna temporal e converte texto para datetime (no próprio df, recém-lido). Retorna o nome."""
+    from utils import eda  # adiado: eda (e seus módulos) importam dataset
+
+    tcol = eda.detectar_tempo(df)
+    if tcol and (pd.api.types.is_object_dtype(df[tcol]) or pd.api.types.is_string_dtype(df[tcol])):
+        df[tcol] = pd.to_datetime(df[tcol], errors="coerce")
+    return tcol
+
+
+def _rebobinar(arquivo):
+    if isinstance(arquivo, (bytes, bytearray, memoryview)):
+        return io.BytesIO(arquivo)
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+    return arquivo
+
+
+def _ler_csv(arquivo, otimizar: bool = False) -> pd.DataFrame:
+    arquivo = _rebobinar(arquivo)
+    parse_dates = None
+    if otimizar:
+        # a coluna temporal já sai do parser como datetime64 (detecção pelas primeiras linhas;
+        # colunas numéricas como 'Time' em segundos continuam numéricas)
+        from utils import eda  # adiado: eda (e seus módulos) importam dataset
+
+        cabeca = pd.read_csv(arquivo, nrows=1000)
+        tcol = eda.detectar_tempo(cabeca.iloc[:0])
+        if tcol and not pd.api.types.is_numeric_dtype(cabeca[tcol]):
+            parse_dates = [tcol]
+        arquivo = _rebobinar(arquivo)
+    df = pd.read_csv(arquivo, low_memory=False, parse_dates=parse_dates)
+
+    # tipagem + ordenação por tempo (feitas uma única vez por conteúdo)
+    tcol = preparar_tempo(df)
+    if tcol:
+        df = df.sort_values(tcol).reset_index(drop=True)
+    # o mesmo df na primeira carga e nas seguintes (do Parquet)
+    df = _texto_misturado(df)
+
+    if otimizar:
+        df, relatorio = otimizar_tipos(df)
+        df.attrs[_ATTR_OTIM] = relatorio.to_dict("list")
+    return df
+
+
+def carregar(arquivo, h: str = None, otimizar: bool = False) -> pd.DataFrame:
+    """
+    Carrega o CSV uma única vez por conteúdo:
+    memória (LRU) → disco (Parquet) → leitura do CSV (tipagem + ordenação por tempo).
+    - arquivo: bytes, caminho ou objeto tipo arquivo
+    - h: hash já conhecido do conteúdo (evita recalcular)
+    - otimizar: compacta os tipos na carga (ver `otimizar_tipos`)
+    """
+    h = h or hash_conteudo(arquivo)
+    if otimizar:
+        # tipos diferentes → entrada de cache (e chave de dataset) diferente
+        h = f"{h}-otimizado"
+
+    df = _MEMORIA.get(h)
+    if df is not None:
+        return df
+
+    df = _ler_disco(h)
+    if df is None:
+        df = _ler_csv(arquivo, otimizar=otimizar)
+        _gravar_disco(df, h)
+
+    df = marcar(df, h)
+    _MEMORIA.set(h, df)
+    return df
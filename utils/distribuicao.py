@@ -0,0 +1,92 @@
+# utils/distribuicao.py
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils import contagem, dataset
+from utils.cache import LRUCache
+
+_RESUMOS = LRUCache(maxsize=4096, nome="distribuicao")
+
+# Máximo de pontos "fliers" guardados de cada lado do boxplot
+MAX_FLIERS = 1000
+
+
+@dataclass
+class ResumoNumerico:
+    """Tudo que histograma e boxplot precisam de uma coluna numérica."""
+    n: int
+    bordas: np.ndarray
+    contagens: np.ndarray
+    q1: float
+    mediana: float
+    q3: float
+    bigode_inf: float
+    bigode_sup: float
+    fliers: np.ndarray
+    n_fliers: int
+
+    def stats_boxplot(self, label: str = "") -> dict:
+        """Formato aceito por `Axes.bxp`."""
+        return {"label": label, "q1": self.q1, "med": self.mediana, "q3": self.q3,
+                "whislo": self.bigode_inf, "whishi": self.bigode_sup, "fliers": self.fliers}
+
+
+@dataclass
+class ResumoCategorico:
+    """Top-k contagens (rótulos como texto) de uma coluna."""
+    top: pd.Series
+    total: int
+    distintos: int
+
+
+def _numerico(serie: pd.Series, bins: int) -> ResumoNumerico:
+    v = pd.to_numeric(serie, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    v = v[~np.isnan(v)]
+    n = int(v.size)
+    if n == 0:
+        vazio = np.empty(0)
+        return ResumoNumerico(0, vazio, vazio, np.nan, np.nan, np.nan, np.nan, np.nan, vazio, 0)
+
+    contagens, bordas = np.histogram(v, bins=bins)
+    q1, mediana, q3 = np.percentile(v, [25, 50, 75])
+    iqr = q3 - q1
+    lim_inf, lim_sup = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+    dentro = (v >= lim_inf) & (v <= lim_sup)
+    bigode_inf = float(v[dentro].min()) if dentro.any() else q1
+    bigode_sup = float(v[dentro].max()) if dentro.any() else q3
+
+    # fliers: no máximo MAX_FLIERS mais extremos de cada lado
+    baixo, alto = v[v < lim_inf], v[v > lim_sup]
+    if baixo.size > MAX_FLIERS:
+        baixo = np.partition(baixo, MAX_FLIERS)[:MAX_FLIERS]
+    if alto.size > MAX_FLIERS:
+        alto = np.partition(alto, -MAX_FLIERS)[-MAX_FLIERS:]
+    n_fliers = int(n - dentro.sum())
+    return ResumoNumerico(n, bordas, contagens, float(q1), float(mediana), float(q3),
+                          bigode_inf, bigode_sup, np.concatenate([baixo, alto]), n_fliers)
+
+
+def _categorico(serie: pd.Series, topn: int) -> ResumoCategorico:
+    # contagem com memória limitada (utils.contagem); só os candidatos viram texto
+    cont = contagem.contar(serie, 2 * topn)
+    vc = cont.top
+    if vc is None:
+        # quase única (IDs, texto livre): nada se repete o bastante; mostra os valores do início
+        vc = serie.iloc[:contagem.PREFIXO].value_counts(dropna=True).head(2 * topn)
+    # mesmos rótulos do astype(str): valores como 1 e "1" somam juntos
+    vc = vc.groupby(vc.index.astype(str)).sum().sort_values(ascending=False, kind="stable")
+    return ResumoCategorico(vc.head(topn), cont.total, cont.distintos)
+
+
+def resumo_numerico(df: pd.DataFrame, col: str, bins: int = 30) -> ResumoNumerico:
+    """Bordas/contagens do histograma + cinco números do boxplot, calculados uma vez por coluna."""
+    return _RESUMOS.get_or_compute((dataset.chave(df), "num", col, bins),
+                                   lambda: _numerico(df[col], bins))
+
+
+def resumo_categorico(df: pd.DataFrame, col: str, topn: int = 20) -> ResumoCategorico:
+    """Top-k contagens da coluna, calculadas uma vez por coluna."""
+    return _RESUMOS.get_or_compute((dataset.chave(df), "cat", col, topn),
+                                   lambda: _categorico(df[col], topn))
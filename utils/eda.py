@@ -1,9 +1,12 @@
 # utils/eda.py
+import os
+
 import pandas as pd
 import numpy as np
-import unicodedata
-from sklearn.cluster import KMeans
-from utils import memory
+from functools import partial, wraps
+from utils import memory, perfil, correlacao, paralelo, agrupamento, roteador, amostragem, contagem, cruzamento, outliers, temporal
+from utils import dataset, instrumentacao, tarefas
+from utils.cache import RESULTADOS_MB, LRUCache
 
 
 # ---------------------- Utilitários base ----------------------
@@ -16,32 +19,47 @@ def _save_conclusion(pergunta: str, conclusion: str) -> str:
     return conclusion
 
 
-def _norm(s: str) -> str:
-    """Normaliza para minúsculo, removendo acentos."""
-    s = s or ""
-    s = s.strip().lower()
-    s = unicodedata.normalize("NFD", s)
-    return "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+def _aceita_motor(func):
+    """
+    A função também aceita um motor de utils.motores (DuckDB/Polars sobre o arquivo)
+    no lugar do DataFrame: nesse caso delega para o método de mesmo nome do motor.
+    """
+    @wraps(func)
+    def envolver(df, *args, **kwargs):
+        if isinstance(df, pd.DataFrame):
+            return func(df, *args, **kwargs)
+        return getattr(df, func.__name__)(*args, **kwargs)
+    return envolver
 
 
 # ---------------------- Tipos / Resumos ----------------------
+@_aceita_motor
 def tipos(df: pd.DataFrame):
     """Retorna uma tabela detalhada de tipos + resumo (numérica, data/tempo, categórica)."""
-    categorias = []
-    for col in df.columns:
-        if pd.api.types.is_numeric_dtype(df[col]):
-            categorias.append("Numérica")
-        elif pd.api.types.is_datetime64_any_dtype(df[col]):
-            categorias.append("Data/Tempo")
-        else:
-            categorias.append("Categórica")
+    categorias = [_categoria(t) for t in df.dtypes]
+
+    # contagem de não nulos vem do perfil (sem montar um DataFrame booleano do tamanho dos dados)
+    nao_nulos = perfil.perfil(df).nao_nulos.reindex(df.columns).values
+    nulos_pct = ((1 - nao_nulos / len(df)) * 100).round(2) if len(df) else np.full(len(nao_nulos), np.nan)
+    return _tabela_tipos(df.columns, df.dtypes.astype(str).values, categorias, nao_nulos, nulos_pct)
 
+
+def _categoria(dtype) -> str:
+    if pd.api.types.is_numeric_dtype(dtype):
+        return "Numérica"
+    if pd.api.types.is_datetime64_any_dtype(dtype):
+        return "Data/Tempo"
+    return "Categórica"
+
+
+def _tabela_tipos(colunas, dtypes, categorias, nao_nulos, nulos_pct):
+    """Monta a tabela de tipos (ordenada por categoria) e o resumo por categoria."""
     tipos_df = pd.DataFrame({
-        "Coluna": df.columns,
-        "Tipo detectado": df.dtypes.astype(str),
+        "Coluna": colunas,
+        "Tipo detectado": dtypes,
         "Categoria": categorias,
-        "Não nulos": df.notna().sum().values,
-        "Nulos (%)": (df.isna().mean().values * 100).round(2)
+        "Não nulos": nao_nulos,
+        "Nulos (%)": nulos_pct
     })
 
     ordem = {"Numérica": 0, "Data/Tempo": 1, "Categórica": 2}
@@ -55,95 +73,118 @@ def tipos(df: pd.DataFrame):
     return tipos_df, resumo
 
 
+# As estatísticas por coluna são consultas ao DatasetProfile (calculado uma vez por dataset).
+@_aceita_motor
 def intervalo(df: pd.DataFrame):
-    return df.select_dtypes("number").agg(["min", "max"]).T
+    return perfil.perfil(df).intervalo()
 
 
+@_aceita_motor
 def tendencia_central(df: pd.DataFrame):
-    # renomeando colunas da agregação para pt-br
-    out = df.select_dtypes("number").agg(["mean", "median"]).T
-    return out.rename(columns={"mean": "Média", "median": "Mediana"})
+    return perfil.perfil(df).tendencia_central()
 
 
+@_aceita_motor
 def variabilidade(df: pd.DataFrame):
-    return df.select_dtypes("number").agg(["std", "var"]).T
+    return perfil.perfil(df).variabilidade()
+
 
+def _top_valores(df: pd.DataFrame, col: str, topn: int = 10):
+    return contagem.contar(df[col], topn).top
 
+
+@_aceita_motor
 def frequencias(df: pd.DataFrame, topn=10):
+    """
+    Top valores por coluna (utils.contagem: exato, sketch ou faixas), em paralelo (utils.paralelo).
+    Colunas quase únicas não numéricas (IDs, texto livre) ficam de fora; numéricas viram faixas.
+    """
+    tops = paralelo.por_coluna(df, partial(_top_valores, topn=topn))
     out = {}
-    for c in df.columns:
-        vc = df[c].value_counts(dropna=True).head(topn)
-        if not vc.empty:
+    for c, vc in zip(df.columns, tops):
+        if vc is not None and not vc.empty:
             out[c] = vc
     return out
 
 
-# ---------------------- Outliers (IQR) ----------------------
+# ---------------------- Outliers ----------------------
 def outliers_iqr_mask(num: pd.DataFrame):
-    Q1 = num.quantile(0.25)
-    Q3 = num.quantile(0.75)
-    IQR = Q3 - Q1
-    return (num.lt(Q1 - 1.5 * IQR)) | (num.gt(Q3 + 1.5 * IQR))
+    """Máscara (linhas × colunas numéricas) dos outliers por IQR, com os limites do DatasetProfile."""
+    limites = perfil.perfil(num).stats.reindex(num.columns)
+    return num.lt(limites["lim_inf"]) | num.gt(limites["lim_sup"])
 
 
+@_aceita_motor
 def outliers_iqr(df: pd.DataFrame):
-    num = df.select_dtypes("number")
-    if num.empty:
+    if len(df) == 0:
         return pd.Series(dtype=float)
-    mask = outliers_iqr_mask(num)
-    pct = mask.sum() / len(num) * 100
-    return pct.sort_values(ascending=False).round(2)
+    return perfil.perfil(df).outliers_iqr()
 
 
+@_aceita_motor
 def efeito_outliers(df: pd.DataFrame):
     """Compara média e desvio com/sem outliers (IQR) para mostrar impacto."""
-    num = df.select_dtypes("number")
-    if num.empty:
-        return pd.DataFrame()
-    mask_linha_com_out = outliers_iqr_mask(num).any(axis=1)
-    sem_out = num.loc[~mask_linha_com_out]
-    comp = pd.DataFrame({
-        "mean_com_out": num.mean(),
-        "mean_sem_out": sem_out.mean(),
-        "std_com_out":  num.std(),
-        "std_sem_out":  sem_out.std()
-    })
-    comp["delta_mean_abs"] = (comp["mean_sem_out"] - comp["mean_com_out"]).abs()
-    comp["delta_std_abs"]  = (comp["std_sem_out"]  - comp["std_com_out"]).abs()
-    return comp
+    return perfil.perfil(df).efeito_outliers()
+
+
+def outliers_metodos(df: pd.DataFrame, metodos=outliers.METODOS):
+    """IQR, MAD e z-score (e IsolationForest, se pedido) de cada coluna numérica; ver utils.outliers."""
+    return outliers.analisar(df, metodos)
+
+
+# ---------------------- Tabela cruzada ----------------------
+@_aceita_motor
+def crosstab(df: pd.DataFrame, a: str, b: str, top: int = cruzamento.TOP):
+    """
+    Tabela cruzada a × b (utils.cruzamento): contagem por códigos com bincount, tabela de
+    exibição com as `top` categorias de cada lado (+ "Outros"), qui-quadrado e V de Cramér.
+    """
+    return cruzamento.cruzar(df, a, b, top)
+
+
+def _categoricas(df) -> list:
+    if not isinstance(df, pd.DataFrame):
+        return df.categoricas
+    return [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])]
 
 
 # ---------------------- Tempo / Clusters / Influência ----------------------
 def detectar_tempo(df: pd.DataFrame):
     """
-    Detecta a melhor coluna temporal:
-    - Se existir 'time', 'timestamp', 'date' ou 'datetime': tenta converter para datetime (se object).
-    - Se existir 'year': usa como temporal, mas mantém numérico (não converte).
+    Nome da melhor coluna temporal (não altera o df; a conversão fica com utils.temporal):
+    - 'time', 'timestamp', 'date' ou 'datetime' (texto, datetime ou numérica, ex.: segundos);
+    - 'year' (numérica);
+    - senão, a primeira coluna já em datetime64.
     """
     for c in df.columns:
-        cl = c.lower()
-        if cl in ("time", "timestamp", "date", "datetime"):
-            if df[c].dtype == "object":
-                try:
-                    df[c] = pd.to_datetime(df[c], errors="coerce")
-                except Exception:
-                    pass
+        if str(c).lower() in ("time", "timestamp", "date", "datetime", "year"):
             return c
-        if cl == "year":
+    for c in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[c]):
             return c
     return None
 
 
-def clusters(df: pd.DataFrame, k=3, sample=5000, random_state=42):
-    num = df.select_dtypes("number")
-    if num.shape[1] < 2 or len(num) < 2:
+def serie_temporal(df: pd.DataFrame, tcol: str = None, freq=None):
+    """
+    Colunas numéricas reamostradas ao longo de `tcol` (padrão: detectar_tempo) com a tendência de
+    cada uma; ver utils.temporal. None se não houver coluna temporal com valores válidos.
+    """
+    tcol = tcol or detectar_tempo(df)
+    return temporal.reamostrar(df, tcol, freq) if tcol else None
+
+
+def clusters(df: pd.DataFrame, k=None, criterio="silhueta", random_state=42):
+    """
+    Clusterização de todas as linhas (MiniBatchKMeans em lotes; ver utils.agrupamento).
+    Retorna (perfil por cluster: contagem, %, variáveis distintivas e centróides; mensagem).
+    """
+    num_cols = df.select_dtypes("number").columns
+    if len(num_cols) < 2 or len(df) < max(3, k or 0):
         return None, "Dados numéricos insuficientes para clusterização."
-    X = num.sample(n=min(sample, len(num)), random_state=random_state).fillna(num.mean())
-    Xn = (X - X.mean()) / X.std(ddof=0)
-    km = KMeans(n_clusters=k, n_init="auto", random_state=random_state)
-    labs = km.fit_predict(Xn)
-    resumo = pd.Series(labs).value_counts().sort_index().rename("contagem")
-    return resumo, f"Clusters (k={k}) em amostra de {len(X)} linhas."
+    res = agrupamento.ajustar(df, k=k, criterio=criterio, random_state=random_state)
+    como = f"escolhido por {res.criterio}" if res.criterio != "fixo" else "fixo"
+    return res.perfil, f"Clusters (k={res.k}, {como}) em todas as {len(df):,} linhas (MiniBatchKMeans)."
 
 
 def variaveis_mais_influentes(df: pd.DataFrame):
@@ -151,173 +192,378 @@ def variaveis_mais_influentes(df: pd.DataFrame):
     num = df.select_dtypes("number")
     if num.shape[1] < 2:
         return pd.Series(dtype=float)
-    corr = num.corr().abs()
+    corr = correlacao.matriz(df).abs()
     score = corr.mean().sort_values(ascending=False)
     return score
 
 
 # ---------------------- “Agente” por palavras-chave ----------------------
-def responder(df: pd.DataFrame, pergunta: str):
-    # normaliza e cria uma versão sem acentos para casar palavras-chave com/sem acento
-    q_raw = (pergunta or "").strip().lower()
-    q = _norm(pergunta)
-
+# Cada intenção tem uma função (df, pergunta, rota) → (texto, ação, params), ou None para
+# deixar a próxima candidata responder (ex.: tendência temporal sem coluna de tempo).
+def _colunas_por_tipo(df: pd.DataFrame):
     num_cols = df.select_dtypes("number").columns.tolist()
     cat_cols = [c for c in df.columns if c not in num_cols]
-
-    # ---------------- PRIORIDADE ALTA ----------------
-    # OUTLIERS
-    if "outlier" in q or "atipic" in q:
-        texto = "Outliers (IQR) e impacto:"
-        pct = outliers_iqr(df)
-        if pct.empty or (pct == 0).all():
-            conclusion = _save_conclusion(pergunta, "Não foram detectados outliers pelo critério IQR nas colunas numéricas.")
-        else:
-            top = pct[pct > 0].head(5)
-            pares = ", ".join([f"{c}: {v:.2f}%" for c, v in top.items()])
-            conclusion = _save_conclusion(pergunta, f"Outliers identificados (IQR). Maiores incidências → {pares}.")
-        return texto, "dupla_tabela", {
-            "pct": pct.to_frame("pct_linhas_outlier"),
-            "efeito": efeito_outliers(df),
-            "conclusion": conclusion
-        }
-
-    # TENDÊNCIA CENTRAL (média / mediana) – com sinônimos e acentos
-    if ("tendencia central" in q or "tendência central" in q or
-        "medidas de tendencia" in q or "medidas de tendência" in q or
-        "media" in q or "média" in q or "mediana" in q):
-        texto = "Tendência central (média/mediana):"
-        tc = tendencia_central(df)
-        conclusion = _save_conclusion(pergunta, f"Cálculo de média e mediana para {tc.shape[0]} coluna(s) numérica(s).")
-        return texto, "tabela", {"data": tc, "conclusion": conclusion}
-
-    # INTERVALO (min/max)
-    if any(k in q for k in ("intervalo", "min", "max", "minimo", "máximo", "maximo", "mínimo")):
-        texto = "Intervalos (min/max) por coluna numérica:"
-        inter = intervalo(df)
-        conclusion = _save_conclusion(pergunta, f"Gerados mínimos e máximos para {inter.shape[0]} coluna(s) numérica(s).")
-        return texto, "tabela", {"data": inter, "conclusion": conclusion}
-
-    # VARIABILIDADE
-    if "desvio" in q or "varianc" in q or "variânc" in q:
-        texto = "Variabilidade (desvio/variância):"
-        var = variabilidade(df)
-        conclusion = _save_conclusion(pergunta, f"Desvio-padrão e variância calculados para {var.shape[0]} coluna(s) numérica(s).")
-        return texto, "tabela", {"data": var, "conclusion": conclusion}
-
-    # FREQUÊNCIAS
-    if "frequent" in q or "frequente" in q or "moda" in q:
-        texto = "Top frequências por coluna (top 10):"
-        mapa = frequencias(df)
-        qtd = len(mapa)
-        conclusion = _save_conclusion(pergunta, f"Listadas frequências para {qtd} coluna(s).")
-        return texto, "dict_series", {"mapa": mapa, "conclusion": conclusion}
-
-    # CORRELAÇÃO
-    if "correlac" in q or "correlação" in q or "correlacao" in q:
-        if len(num_cols) < 2:
-            return "Preciso de pelo menos duas colunas numéricas para calcular correlação.", None, {}
-        texto = "Mapa de correlação (on-demand)."
-        conclusion = _save_conclusion(pergunta, f"Heatmap de correlação entre {len(num_cols)} variáveis numéricas.")
-        return texto, "heatmap_corr", {"conclusion": conclusion}
-
-    # DISPERSÃO
-    if "dispers" in q or "dispersao" in q or "dispersão" in q or "scatter" in q:
-        if len(num_cols) >= 2:
-            texto = f"Dispersão entre {num_cols[0]} e {num_cols[1]}:"
-            conclusion = _save_conclusion(pergunta, f"Gráfico de dispersão gerado para {num_cols[0]} vs {num_cols[1]}.")
-            return texto, "scatter", {"x": num_cols[0], "y": num_cols[1], "conclusion": conclusion}
+    return num_cols, cat_cols
+
+
+def _resp_outliers(df, rota):
+    texto = "Outliers (IQR) e impacto:"
+    pct = outliers_iqr(df)
+    if pct.empty or (pct == 0).all():
+        conclusion = "Não foram detectados outliers pelo critério IQR nas colunas numéricas."
+    else:
+        top = pct[pct > 0].head(5)
+        pares = ", ".join([f"{c}: {v:.2f}%" for c, v in top.items()])
+        conclusion = f"Outliers identificados (IQR). Maiores incidências → {pares}."
+    params = {
+        "pct": pct.to_frame("pct_linhas_outlier"),
+        "efeito": efeito_outliers(df),
+        "conclusion": conclusion
+    }
+    if isinstance(df, pd.DataFrame) and not pct.empty:
+        # os motores (DuckDB/Polars) só calculam o IQR
+        res = outliers_metodos(df)
+        params["metodos"], params["efeito_metodos"] = res.pct, res.efeito
+        texto = f"Outliers ({', '.join(res.pct.columns)}) e impacto:"
+        maiores = [f"{m}: {res.pct[m].idxmax()} ({res.pct[m].max():.2f}%)" for m in res.pct.columns if res.pct[m].max() > 0]
+        if maiores:
+            params["conclusion"] += " Maior incidência por método → " + ", ".join(maiores) + "."
+    return texto, "dupla_tabela", params
+
+
+def _resp_tendencia_central(df, rota):
+    texto = "Tendência central (média/mediana):"
+    tc = tendencia_central(df)
+    conclusion = f"Cálculo de média e mediana para {tc.shape[0]} coluna(s) numérica(s)."
+    return texto, "tabela", {"data": tc, "conclusion": conclusion}
+
+
+def _resp_intervalo(df, rota):
+    texto = "Intervalos (min/max) por coluna numérica:"
+    inter = intervalo(df)
+    conclusion = f"Gerados mínimos e máximos para {inter.shape[0]} coluna(s) numérica(s)."
+    return texto, "tabela", {"data": inter, "conclusion": conclusion}
+
+
+def _resp_variabilidade(df, rota):
+    texto = "Variabilidade (desvio/variância):"
+    var = variabilidade(df)
+    conclusion = f"Desvio-padrão e variância calculados para {var.shape[0]} coluna(s) numérica(s)."
+    return texto, "tabela", {"data": var, "conclusion": conclusion}
+
+
+def _resp_frequencias(df, rota):
+    texto = "Top frequências por coluna (top 10):"
+    mapa = frequencias(df)
+    qtd = len(mapa)
+    conclusion = f"Listadas frequências para {qtd} coluna(s)."
+    puladas = [str(c) for c in df.columns if c not in mapa]
+    if puladas:
+        conclusion += f" Sem valores repetidos relevantes (quase únicas ou vazias): {', '.join(puladas[:5])}."
+    return texto, "dict_series", {"mapa": mapa, "conclusion": conclusion}
+
+
+def _resp_correlacao(df, rota):
+    num_cols, _ = _colunas_por_tipo(df)
+    if len(num_cols) < 2:
+        return "Preciso de pelo menos duas colunas numéricas para calcular correlação.", None, {}
+    texto = "Mapa de correlação (on-demand)."
+    conclusion = f"Heatmap de correlação entre {len(num_cols)} variáveis numéricas."
+    return texto, "heatmap_corr", {"conclusion": conclusion}
+
+
+def _resp_dispersao(df, rota):
+    num_cols, _ = _colunas_por_tipo(df)
+    if len(num_cols) < 2:
         return "Colunas numéricas insuficientes para dispersão.", None, {}
+    # as duas colunas citadas na pergunta; senão o par de maior |r| (matriz de correlação em cache)
+    citadas = [c for c in rota.colunas if c in num_cols]
+    par = None if len(citadas) >= 2 else correlacao.par_mais_forte(df)
+    x, y = citadas[:2] if len(citadas) >= 2 else par[:2] if par else num_cols[:2]
+    texto = f"Dispersão entre {x} e {y}:"
+    if par:
+        texto = f"Dispersão entre {x} e {y} (par de maior correlação, r = {par[2]:.2f}):"
+    conclusion = f"Gráfico de dispersão gerado para {x} vs {y}."
+    return texto, "scatter", {"x": x, "y": y, "conclusion": conclusion}
+
+
+def _resp_temporal(df, rota):
+    tcol = detectar_tempo(df)
+    if not tcol:
+        return None  # sem coluna temporal: segue para a próxima intenção
+    serie = serie_temporal(df, tcol)
+    if serie is None or serie.media.empty:
+        return (f"Identifiquei a coluna temporal '{tcol}', mas não encontrei nenhuma outra "
+                "variável numérica para comparar."), None, {}
+    tend = serie.tendencia
+    # coluna citada na pergunta; senão a de tendência linear mais forte (ou a primeira, se nenhuma tiver)
+    citadas = [c for c in rota.colunas if c in tend.index]
+    forca = tend["r"].abs().fillna(0)
+    ycol = citadas[0] if citadas else forca.idxmax() if forca.max() >= 0.1 else tend.index[0]
+    incl, r = tend.loc[ycol].iloc[0], tend.loc[ycol, "r"]
+    por = "dia" if temporal.eixo(df, tcol).datas else f"unidade de {tcol}"
+    if np.isnan(r) or abs(r) < 0.1:
+        resumo = f"sem tendência linear clara (r = {r:.2f})"
+    else:
+        resumo = f"tendência de {'alta' if incl > 0 else 'queda'} de {incl:+.4g} por {por} (r = {r:.2f})"
+    texto = f"Série temporal de {ycol} vs {tcol} (média por {temporal.descrever(serie.freq, tcol)}):"
+    conclusion = f"Série temporal de {ycol} ao longo de {tcol}: {resumo}."
+    return texto, "timeseries", {"tcol": tcol, "ycol": ycol, "freq": serie.freq, "tendencias": tend,
+                                 "conclusion": conclusion}
+
+
+def _resp_clusters(df, rota):
+    resumo, msg = clusters(df)
+    if resumo is None:
+        return msg, None, {}
+    texto = msg
+    conclusion = f"Clusterização executada ({resumo.shape[0]} grupos)."
+    return texto, "tabela", {"data": resumo, "conclusion": conclusion}
+
+
+def _resp_influencia(df, rota):
+    num_cols, _ = _colunas_por_tipo(df)
+    if len(num_cols) < 2:
+        return "Preciso de pelo menos duas colunas numéricas para estimar influência por correlação.", None, {}
+    score = variaveis_mais_influentes(df)
+    texto = "Variáveis com maior correlação média (heurística de influência):"
+    # pequeno destaque das 3 primeiras
+    top = score.head(3)
+    destaque = ", ".join([f"{c} ({v:.3f})" for c, v in top.items()])
+    conclusion = f"Maior centralidade de correlação: {destaque}."
+    return texto, "serie", {"serie": score, "conclusion": conclusion}
+
+
+def _resp_distribuicao(df, rota):
+    num_cols, cat_cols = _colunas_por_tipo(df)
+    resultados = []
+    for c in num_cols:
+        resultados.append(("hist", c))
+    for c in cat_cols:
+        resultados.append(("bar", c))
+
+    if not resultados:
+        msg = "Não há colunas numéricas nem categóricas para gerar distribuição."
+        conclusion = msg
+        return msg, None, {"conclusion": conclusion}
+
+    texto = "Distribuição de variáveis numéricas e categóricas."
+    conclusion = f"Gerados {len(num_cols)} histogramas e {len(cat_cols)} gráficos de barras."
+    return texto, "multi_plot", {"resultados": resultados, "conclusion": conclusion}
+
+
+def _resp_histograma(df, rota):
+    num_cols, _ = _colunas_por_tipo(df)
+    # colunas citadas na pergunta (índice de nomes do roteador)
+    alvos = list(rota.colunas)
+    if not alvos and num_cols:
+        alvos = [num_cols[0]]
+    if alvos:
+        texto = f"Histograma de {alvos[0]}:"
+        conclusion = f"Histograma exibido para {alvos[0]}."
+        return texto, "hist", {"col": alvos[0], "conclusion": conclusion}
+    return "Não encontrei coluna apropriada para histograma.", None, {}
+
+
+def _resp_tabela_cruzada(df, rota):
+    cats = _categoricas(df)
+    if len(cats) >= 2:
+        ct = crosstab(df, cats[0], cats[1])
+        texto = f"Tabela cruzada entre {cats[0]} e {cats[1]}:"
+        if ct.truncada:
+            texto += (f" {ct.matriz.shape[0]:,} × {ct.matriz.shape[1]:,} categorias; mostrando as "
+                      f"{cruzamento.TOP} mais frequentes de cada lado (demais em '{cruzamento.OUTROS}').")
+        conclusion = f"Tabela cruzada gerada para {cats[0]} × {cats[1]}: {ct.resumo()}."
+        return texto, "tabela", {"data": ct.tabela, "conclusion": conclusion}
+    return "Não encontrei duas colunas categóricas para tabela cruzada.", None, {}
+
+
+def _resp_tipos(df, rota):
+    tipos_df, resumo = tipos(df)
+    texto = (f"Detectadas {int(resumo.get('Numérica', 0))} colunas **numéricas**, "
+             f"{int(resumo.get('Data/Tempo', 0))} de **data/tempo** e "
+             f"{int(resumo.get('Categórica', 0))} **categóricas**.")
+    conclusion = (
+        f"Tipos de dados: {int(resumo.get('Numérica', 0))} num., "
+        f"{int(resumo.get('Data/Tempo', 0))} tempo, "
+        f"{int(resumo.get('Categórica', 0))} categ."
+    )
+    return texto, "tabela", {"data": tipos_df, "conclusion": conclusion}
+
+
+_RESPOSTAS = {
+    "outliers": _resp_outliers,
+    "tendencia_central": _resp_tendencia_central,
+    "intervalo": _resp_intervalo,
+    "variabilidade": _resp_variabilidade,
+    "frequencias": _resp_frequencias,
+    "correlacao": _resp_correlacao,
+    "dispersao": _resp_dispersao,
+    "temporal": _resp_temporal,
+    "clusters": _resp_clusters,
+    "influencia": _resp_influencia,
+    "distribuicao": _resp_distribuicao,
+    "histograma": _resp_histograma,
+    "tabela_cruzada": _resp_tabela_cruzada,
+    "tipos": _resp_tipos,
+}
+
+
+_AJUDA = (
+    "Não entendi. Exemplos: 'tipos de dados', 'intervalo', 'média', 'variância', "
+    "'frequentes', 'outliers', 'correlação', 'dispersão', 'tendência temporal', "
+    "'clusters', 'variáveis mais influentes', 'distribuição de variáveis', "
+    "'histograma de Price', 'tabela cruzada'."
+)
+
+# Cálculos compartilhados por várias intenções (feitos uma vez antes das respostas em lote)
+_USAM_PERFIL = {"outliers", "tendencia_central", "intervalo", "variabilidade", "clusters", "tipos"}
+_USAM_CORRELACAO = {"influencia"}
+_USAM_COLUNAS = {"histograma", "temporal", "dispersao"}
+
+# Respostas por (conteúdo, candidatas, colunas citadas), antes de `registrar`: a conclusão é
+# gravada na sessão de quem perguntou, mesmo quando o cálculo veio de outra sessão
+_CALCULADAS = LRUCache(maxsize=256, nome="respostas", max_mb=RESULTADOS_MB, disco="respostas")
+
+# Intenções pesadas: a partir de SEGUNDO_PLANO linhas o app as calcula em segundo plano (utils.tarefas)
+PESADAS = {"clusters", "correlacao", "influencia", "distribuicao", "outliers", "dispersao"}
+SEGUNDO_PLANO = int(os.getenv("AGENTE_EDA_SEGUNDO_PLANO", "200000"))
+
+
+def _candidatas(rota, intencao: str = None) -> list:
+    candidatas = [nome for nome, _ in rota.intencoes]
+    if intencao in _RESPOSTAS:
+        candidatas = [intencao] + [c for c in candidatas if c != intencao]
+    return candidatas
+
+
+def _colunas(rota, candidatas) -> tuple:
+    # colunas citadas só diferenciam perguntas cujas respostas dependem delas
+    return tuple(rota.colunas) if _USAM_COLUNAS.intersection(candidatas) else ()
+
+
+def _chave(rota, intencao: str = None) -> tuple:
+    """(candidatas, colunas citadas): perguntas com a mesma chave têm a mesma resposta."""
+    candidatas = tuple(_candidatas(rota, intencao))
+    return candidatas, _colunas(rota, candidatas)
+
 
-    # TENDÊNCIA TEMPORAL
-    if "tendenc" in q or "tendência" in q or "temporal" in q or "serie" in q or "série" in q:
-        tcol = detectar_tempo(df)
-        ycols = [c for c in num_cols if c != tcol]
-        if tcol and ycols:
-            texto = f"Série temporal de {ycols[0]} vs {tcol}:"
-            conclusion = _save_conclusion(pergunta, f"Série temporal traçada: {ycols[0]} ao longo de {tcol}.")
-            return texto, "timeseries", {"tcol": tcol, "ycol": ycols[0], "conclusion": conclusion}
-        elif tcol:
-            return (f"Identifiquei a coluna temporal '{tcol}', mas não encontrei nenhuma outra "
-                    "variável numérica para comparar."), None, {}
-
-    # CLUSTERS
-    if "cluster" in q or "agrup" in q:
-        resumo, msg = clusters(df)
-        if resumo is None:
-            return msg, None, {}
-        texto = msg
-        conclusion = _save_conclusion(pergunta, f"Clusterização executada ({resumo.shape[0]} grupos).")
-        return texto, "tabela", {"data": resumo.to_frame(), "conclusion": conclusion}
-
-    # VARIÁVEIS INFLUENTES
-    if "influenc" in q or "influênc" in q or "importanc" in q or "importânc" in q:
-        if len(num_cols) < 2:
-            return "Preciso de pelo menos duas colunas numéricas para estimar influência por correlação.", None, {}
-        score = variaveis_mais_influentes(df)
-        texto = "Variáveis com maior correlação média (heurística de influência):"
-        # pequeno destaque das 3 primeiras
-        top = score.head(3)
-        destaque = ", ".join([f"{c} ({v:.3f})" for c, v in top.items()])
-        conclusion = _save_conclusion(pergunta, f"Maior centralidade de correlação: {destaque}.")
-        return texto, "serie", {"serie": score, "conclusion": conclusion}
-
-    # DISTRIBUIÇÃO
-    if "distribuic" in q or "distribuição" in q or "distribuicao" in q:
-        resultados = []
-        for c in num_cols:
-            resultados.append(("hist", c))
-        for c in cat_cols:
-            resultados.append(("bar", c))
-
-        if not resultados:
-            msg = "Não há colunas numéricas nem categóricas para gerar distribuição."
-            conclusion = _save_conclusion(pergunta, msg)
-            return msg, None, {"conclusion": conclusion}
-
-        texto = "Distribuição de variáveis numéricas e categóricas."
-        conclusion = _save_conclusion(pergunta, f"Gerados {len(num_cols)} histogramas e {len(cat_cols)} gráficos de barras.")
-        return texto, "multi_plot", {"resultados": resultados, "conclusion": conclusion}
-
-    # HISTOGRAMA ESPECÍFICO
-    if any(k in q for k in ("histograma", "histogram", "hist")):
-        alvos = [c for c in df.columns if c.lower() in q_raw]
-        if not alvos and num_cols:
-            alvos = [num_cols[0]]
-        if alvos:
-            texto = f"Histograma de {alvos[0]}:"
-            conclusion = _save_conclusion(pergunta, f"Histograma exibido para {alvos[0]}.")
-            return texto, "hist", {"col": alvos[0], "conclusion": conclusion}
-        return "Não encontrei coluna apropriada para histograma.", None, {}
-
-    # TABELA CRUZADA
-    if "tabela cruzada" in q or "crosstab" in q:
-        cats = [c for c in df.columns if not pd.api.types.is_numeric_dtype(df[c])]
-        if len(cats) >= 2:
-            ct = pd.crosstab(df[cats[0]], df[cats[1]])
-            texto = f"Tabela cruzada entre {cats[0]} e {cats[1]}:"
-            conclusion = _save_conclusion(pergunta, f"Tabela cruzada gerada para {cats[0]} × {cats[1]}.")
-            return texto, "tabela", {"data": ct, "conclusion": conclusion}
-        return "Não encontrei duas colunas categóricas para tabela cruzada.", None, {}
-
-    # TIPOS DE DADOS (por último)
-    if any(k in q for k in ("tipo", "tipos de dados", "categ", "numer", "dtype", "dtypes")):
-        tipos_df, resumo = tipos(df)
-        texto = (f"Detectadas {int(resumo.get('Numérica', 0))} colunas **numéricas**, "
-                 f"{int(resumo.get('Data/Tempo', 0))} de **data/tempo** e "
-                 f"{int(resumo.get('Categórica', 0))} **categóricas**.")
-        conclusion = _save_conclusion(
-            pergunta,
-            f"Tipos de dados: {int(resumo.get('Numérica', 0))} num., "
-            f"{int(resumo.get('Data/Tempo', 0))} tempo, "
-            f"{int(resumo.get('Categórica', 0))} categ."
-        )
-        return texto, "tabela", {"data": tipos_df, "conclusion": conclusion}
-
-    # AJUDA
-    return (
-        "Não entendi. Exemplos: 'tipos de dados', 'intervalo', 'média', 'variância', "
-        "'frequentes', 'outliers', 'correlação', 'dispersão', 'tendência temporal', "
-        "'clusters', 'variáveis mais influentes', 'distribuição de variáveis', "
-        "'histograma de Price', 'tabela cruzada'."
-    ), None, {}
+def _resolver(df: pd.DataFrame, candidatas, rota):
+    """
+    Resposta (ainda sem gravar a conclusão) da primeira candidata que souber responder.
+    Com um DataFrame, vem do cache do processo: a mesma pergunta sobre o mesmo conteúdo,
+    de qualquer sessão, é calculada uma vez.
+    """
+    if not isinstance(df, pd.DataFrame):  # motores (DuckDB/Polars)
+        return _calcular(df, candidatas, rota)
+    candidatas = tuple(candidatas)
+    return _CALCULADAS.get_or_compute((dataset.chave(df), candidatas, _colunas(rota, candidatas)),
+                                      lambda: _calcular(df, candidatas, rota))
+
+
+def _calcular(df: pd.DataFrame, candidatas, rota):
+    for nome in candidatas:
+        with instrumentacao.span(f"eda.{nome}"):
+            resposta = _RESPOSTAS[nome](df, rota)
+        if resposta is not None:
+            texto, acao, params = resposta
+            return texto, acao, {**params, "intencao": nome}
+    return _AJUDA, None, {}
+
+
+def registrar(pergunta: str, resposta):
+    """Grava a conclusão (se houver) na memória da sessão; roda sempre na thread do chamador."""
+    texto, acao, params = resposta
+    params = dict(params)
+    if params.get("conclusion"):
+        params["conclusion"] = _save_conclusion(pergunta, params["conclusion"])
+    return texto, acao, params
+
+
+def _aproximar(df: pd.DataFrame, am: pd.DataFrame, resposta):
+    """Rotula a resposta calculada na amostra e junta os intervalos de confiança."""
+    texto, acao, params = resposta
+    params = {**params, "aproximado": True, "dados": am, "n_amostra": len(am), "n_total": len(df)}
+    ic = amostragem.intervalos(params.get("intencao"), am, len(df))
+    if ic is not None:
+        params["ic"] = ic
+    texto = f"≈ {texto} (aproximado: amostra de {len(am):,} de {len(df):,} linhas)"
+    if params.get("conclusion"):
+        params["conclusion"] = f"[aproximado] {params['conclusion']}"
+    return texto, acao, params
+
+
+@instrumentacao.medir()
+def responder(df: pd.DataFrame, pergunta: str, intencao: str = None, aproximado: bool = False,
+              estrato: str = None):
+    """
+    Responde a pergunta com a melhor intenção do roteador compilado (utils.roteador).
+    - intencao: categoria já decidida (ex.: pela LLM); tem precedência sobre as regras
+    - aproximado: responde na amostra do dataset (utils.amostragem) com intervalos de confiança;
+      a resposta exata pode ser pedida depois com `refinar`
+    - estrato: coluna para estratificar a amostra
+    """
+    rota = roteador.rotear(pergunta, df.columns)
+    candidatas = _candidatas(rota, intencao)
+    if aproximado:
+        am = amostragem.amostra(df, estrato=estrato)
+        if len(am) < len(df):
+            return registrar(pergunta, _aproximar(df, am, _resolver(am, candidatas, rota)))
+    return registrar(pergunta, _resolver(df, candidatas, rota))
+
+
+def pesada(df: pd.DataFrame, pergunta: str, intencao: str = None) -> bool:
+    """A resposta vale uma tarefa em segundo plano (intenção pesada num dataset grande)?"""
+    if len(df) < SEGUNDO_PLANO:
+        return False
+    candidatas = _candidatas(roteador.rotear(pergunta, df.columns), intencao)
+    return bool(candidatas) and candidatas[0] in PESADAS
+
+
+def agendar(df: pd.DataFrame, pergunta: str, intencao: str = None) -> tarefas.Tarefa:
+    """
+    Resposta calculada em segundo plano (utils.tarefas: progresso, cancelamento). Perguntas
+    equivalentes sobre o mesmo dataset, de qualquer sessão, esperam a mesma tarefa.
+    A conclusão não é gravada: quem consome o resultado chama `registrar` na própria thread.
+    """
+    rota = roteador.rotear(pergunta, df.columns)
+    candidatas, colunas = _chave(rota, intencao)
+    return tarefas.submeter(lambda: _resolver(df, candidatas, rota),
+                            chave=("responder", dataset.chave(df), candidatas, colunas),
+                            nome=f"eda.{candidatas[0]}" if candidatas else "eda")
+
+
+def refinar(df: pd.DataFrame, pergunta: str, intencao: str = None) -> tarefas.Tarefa:
+    """Resposta exata de uma resposta aproximada (ver `agendar`)."""
+    return agendar(df, pergunta, intencao)
+
+
+def responder_lote(df: pd.DataFrame, perguntas, intencoes=None, workers: int = None):
+    """
+    Responde várias perguntas sobre o mesmo dataset; resultados na ordem de entrada.
+    1) roteia todas; 2) perguntas equivalentes (mesmas intenções e colunas) viram uma tarefa só;
+    3) perfil/correlação usados por várias tarefas são calculados antes, uma vez;
+    4) as tarefas restantes rodam em paralelo (threads, utils.paralelo).
+    - intencoes: categoria de cada pergunta (ex.: da LLM), ou None
+    """
+    perguntas = list(perguntas)
+    intencoes = list(intencoes) if intencoes is not None else [None] * len(perguntas)
+    rotas = [roteador.rotear(q, df.columns) for q in perguntas]
+    chaves = [_chave(r, i) for r, i in zip(rotas, intencoes)]
+
+    unicas = {}
+    for chave, rota in zip(chaves, rotas):
+        unicas.setdefault(chave, rota)
+
+    usadas = {nome for candidatas, _ in unicas for nome in candidatas[:1]}
+    previas = []
+    if usadas & _USAM_PERFIL:
+        previas.append(lambda: perfil.perfil(df))
+    if usadas & _USAM_CORRELACAO:
+        previas.append(lambda: correlacao.matriz(df))
+    paralelo.mapear(lambda f: f(), previas, workers=workers, backend="thread")
+
+    resultados = paralelo.mapear(lambda item: _resolver(df, item[0][0], item[1]),
+                                 list(unicas.items()), workers=workers, backend="thread")
+    por_chave = dict(zip(unicas, resultados))
+    return [registrar(q, por_chave[c]) for q, c in zip(perguntas, chaves)]
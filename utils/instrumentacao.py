@@ -0,0 +1,315 @@
+# utils/instrumentacao.py
+"""
+Instrumentação do caminho quente (pergunta → roteamento → LLM → eda → figura → PNG).
+
+- `span(nome)` mede o tempo (e, com memória ligada, o pico de memória alocada via tracemalloc)
+  de um trecho. Desligada, é a leitura de um ContextVar que devolve um contexto vazio reaproveitado.
+- `pergunta(texto)` agrupa os spans de uma pergunta (inclusive os das threads de utils.paralelo
+  e utils.tarefas, que herdam o contexto) e as variações dos contadores de acerto/falta dos caches.
+- `exportar_jsonl` grava um span por linha para análise offline e AGENTE_EDA_TRACE anexa cada
+  pergunta a um arquivo.
+
+Ligar para o processo todo: AGENTE_EDA_INSTRUMENTAR=1 (e AGENTE_EDA_INSTRUMENTAR_MEMORIA=1), ou
+`ativar()`; as perguntas recentes ficam em RECENTES. No app, cada sessão tem a sua `Sessao`
+(ligada/desligada e perguntas recentes próprias), posta no contexto do rerun com `usar()`.
+
+O pico de memória vem do tracemalloc, que é do processo: um span só informa o pico quando
+nenhum outro span medindo memória (de outra thread ou sessão) rodou junto com ele; alocações
+de threads que não medem memória também entram no pico.
+"""
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+ATIVO = os.getenv("AGENTE_EDA_INSTRUMENTAR", "0") == "1"
+MEMORIA = os.getenv("AGENTE_EDA_INSTRUMENTAR_MEMORIA", "0") == "1"
+# JSONL ao qual cada pergunta instrumentada é anexada (opcional)
+ARQUIVO = os.getenv("AGENTE_EDA_TRACE")
+
+RECENTES = deque(maxlen=50)
+
+_NULO = nullcontext()
+_IDS = itertools.count(1)
+_PERGUNTA = contextvars.ContextVar("pergunta", default=None)
+_PAI = contextvars.ContextVar("span_pai", default=None)
+_SESSAO = contextvars.ContextVar("sessao_instrumentacao", default=None)
+_LOCK_ARQUIVO = threading.Lock()
+
+# tracemalloc (do processo): quem pediu memória e quantas vezes o pico global já foi zerado
+_LOCK_MEMORIA = threading.Lock()
+_MEDINDO = weakref.WeakSet()  # sessões com memória ligada (somem junto com a sessão)
+_INICIADO = False  # o tracemalloc foi ligado aqui (e não por PYTHONTRACEMALLOC, por exemplo)
+_ABERTOS = 0  # spans medindo memória em andamento, em todas as threads
+_ZERADOS = 0
+
+
+class Sessao:
+    """Instrumentação de uma sessão do app: ligada/desligada, memória e as perguntas recentes."""
+
+    def __init__(self, ativo: bool = False, memoria: bool = False):
+        self.recentes = deque(maxlen=50)
+        self.configurar(ativo, memoria)
+
+    def configurar(self, ativo: bool, memoria: bool) -> None:
+        self.ativo, self.memoria = bool(ativo), bool(ativo and memoria)
+        with _LOCK_MEMORIA:
+            if self.memoria:
+                _MEDINDO.add(self)
+            else:
+                _MEDINDO.discard(self)
+        _ajustar_tracemalloc()
+
+
+def usar(sessao: Sessao) -> None:
+    """Instrumentação de `sessao` no contexto atual (o rerun e as threads/tarefas que ele dispara)."""
+    _SESSAO.set(sessao)
+
+
+def _ajustar_tracemalloc() -> None:
+    """Liga o tracemalloc enquanto o processo (ativar) ou alguma sessão mede memória; desliga depois."""
+    global _INICIADO
+    with _LOCK_MEMORIA:
+        querem = (ATIVO and MEMORIA) or len(_MEDINDO) > 0
+        if querem and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _INICIADO = True
+        elif not querem and _INICIADO and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            _INICIADO = False
+
+
+def ligada() -> bool:
+    """Instrumentação ligada no contexto atual (a da sessão, se houver; senão a do processo)."""
+    sessao = _SESSAO.get()
+    return ATIVO if sessao is None else sessao.ativo
+
+
+def _memoria() -> bool:
+    sessao = _SESSAO.get()
+    return (MEMORIA if sessao is None else sessao.memoria) and tracemalloc.is_tracing()
+
+
+def ativar(memoria: bool = False) -> None:
+    """Liga os spans para o processo (e o tracemalloc, se `memoria`); o tracemalloc é caro, só para depurar."""
+    global ATIVO, MEMORIA
+    ATIVO, MEMORIA = True, memoria
+    _ajustar_tracemalloc()
+
+
+def desativar() -> None:
+    global ATIVO, MEMORIA
+    ATIVO = MEMORIA = False
+    _ajustar_tracemalloc()
+
+
+class _Span:
+    __slots__ = ("nome", "attrs", "id", "pai", "inicio", "mem0", "pico", "prof", "zerados0", "filhos",
+                 "sozinho", "_token")
+
+    def __init__(self, nome: str, attrs: dict):
+        self.nome, self.attrs = nome, attrs
+
+    def __enter__(self):
+        global _ABERTOS, _ZERADOS
+        self.id = next(_IDS)
+        pai = _PAI.get()
+        self.pai = pai.id if pai else None
+        self._token = _PAI.set(self)
+        self.pico = 0
+        self.mem0 = None
+        if _memoria():
+            # spans medindo memória abertos agora: só os ancestrais deste (senão o pico se mistura)
+            self.prof = pai.prof + 1 if pai is not None and pai.mem0 is not None else 0
+            self.filhos = 0  # quantas vezes os descendentes zeraram o pico (somado na saída deles)
+            with _LOCK_MEMORIA:
+                self.sozinho = _ABERTOS == self.prof
+                _ABERTOS += 1
+                self.mem0 = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                _ZERADOS += 1
+                self.zerados0 = _ZERADOS
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _ABERTOS
+        fim = time.perf_counter()
+        _PAI.reset(self._token)
+        registro = {"id": self.id, "pai": self.pai, "nome": self.nome,
+                    "inicio": self.inicio, "ms": (fim - self.inicio) * 1000,
+                    "thread": threading.current_thread().name, **self.attrs}
+        if self.mem0 is not None:
+            pai = _PAI.get()
+            with _LOCK_MEMORIA:
+                _ABERTOS -= 1
+                # o pico global foi zerado na entrada; picos dos spans filhos (que zeram de novo) sobem
+                # para cá. Qualquer outro zerar (span concorrente) invalida o pico deste span e dos pais.
+                pico = max(self.pico, tracemalloc.get_traced_memory()[1])
+                sozinho = self.sozinho and _ZERADOS - self.zerados0 == self.filhos and tracemalloc.is_tracing()
+                if pai is not None and pai.mem0 is not None:
+                    pai.pico = max(pai.pico, pico)
+                    pai.filhos += self.filhos + 1
+                    pai.sozinho = pai.sozinho and sozinho
+            if sozinho:
+                registro["pico_kb"] = max(pico - self.mem0, 0) / 1024
+        p = _PERGUNTA.get()
+        if p is not None:
+            p.adicionar(registro)
+        return False
+
+
+def span(nome: str, **attrs):
+    """Contexto que mede `nome`; quase sem custo quando a instrumentação está desligada."""
+    if not ligada():
+        return _NULO
+    return _Span(nome, attrs)
+
+
+def medir(nome: str = None):
+    """Decorador: a função inteira vira um span (nome padrão: módulo.função)."""
+    def decorar(func):
+        rotulo = nome or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        @wraps(func)
+        def envolver(*args, **kwargs):
+            if not ligada():
+                return func(*args, **kwargs)
+            with _Span(rotulo, {}):
+                return func(*args, **kwargs)
+        return envolver
+    return decorar
+
+
+def contexto(func):
+    """`func` rodando no contexto atual (pergunta e span pai), para submeter a outras threads."""
+    if not ligada():
+        return func
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.copy().run(func, *args, **kwargs)
+
+
+class Pergunta:
+    """Spans e variações dos contadores de cache de uma pergunta (em uma ou mais fases)."""
+
+    def __init__(self, texto: str):
+        self.texto = texto
+        self.spans = []
+        self.caches = {}
+        self.ms = 0.0
+        self.inicio = time.time()
+        self._exportados = 0
+        self._lock = threading.Lock()
+
+    def adicionar(self, registro: dict) -> None:
+        with self._lock:
+            self.spans.append(registro)
+
+    def fase(self, nome: str) -> "_Fase":
+        """Novo trecho da mesma pergunta (ex.: a exibição, que acontece no rerun seguinte do app)."""
+        return _Fase(self, nome)
+
+    def __enter__(self):
+        sessao = _SESSAO.get()
+        (RECENTES if sessao is None else sessao.recentes).append(self)
+        self._fase = self.fase("pergunta")
+        return self._fase.__enter__()
+
+    def __exit__(self, *exc):
+        return self._fase.__exit__(*exc)
+
+    def registros(self) -> list:
+        """Spans em ordem de início, com o tempo relativo ao início da pergunta (ms)."""
+        with self._lock:
+            spans = list(self.spans)
+        base = min((s["inicio"] for s in spans), default=0)
+        return [{**s, "inicio": (s["inicio"] - base) * 1000, "pergunta": self.texto, "quando": self.inicio}
+                for s in sorted(spans, key=lambda s: s["inicio"])]
+
+    def tabela(self):
+        """DataFrame dos spans (nível de aninhamento como recuo do nome), para o painel."""
+        import pandas as pd
+        regs = self.registros()
+        nivel = {}
+        for s in regs:
+            nivel[s["id"]] = nivel[s["pai"]] + 1 if s["pai"] in nivel else 0
+        return pd.DataFrame([{"etapa": "  " * nivel[s["id"]] + s["nome"], "início (ms)": round(s["inicio"], 1),
+                              "duração (ms)": round(s["ms"], 1), "pico (KB)": s.get("pico_kb"),
+                              "thread": s["thread"]} for s in regs])
+
+    def _publicar(self, caches: dict) -> None:
+        """Anexa a AGENTE_EDA_TRACE os spans ainda não gravados e o resumo da fase."""
+        if not ARQUIVO:
+            return
+        with _LOCK_ARQUIVO:
+            regs = self.registros()
+            linhas = [json.dumps(s, ensure_ascii=False, default=str) for s in regs[self._exportados:]]
+            linhas.append(json.dumps({"pergunta": self.texto, "quando": self.inicio, "caches": caches,
+                                      "ms": self.ms}, ensure_ascii=False))
+            self._exportados = len(regs)
+            with open(ARQUIVO, "a", encoding="utf-8") as f:
+                f.write("".join(linha + "\n" for linha in linhas))
+
+
+class _Fase:
+    def __init__(self, pergunta: Pergunta, nome: str):
+        self.pergunta, self.nome = pergunta, nome
+
+    def __enter__(self):
+        from utils.cache import estatisticas
+        self._caches0 = estatisticas()
+        self._token = _PERGUNTA.set(self.pergunta)
+        self._raiz = _Span(self.nome, {}).__enter__()
+        return self.pergunta
+
+    def __exit__(self, *exc):
+        from utils.cache import estatisticas
+        p = self.pergunta
+        self._raiz.__exit__(*exc)
+        _PERGUNTA.reset(self._token)
+        p.ms += (time.perf_counter() - self._raiz.inicio) * 1000
+        delta = {}
+        for nome, (acertos, faltas) in estatisticas().items():
+            a0, f0 = self._caches0.get(nome, (0, 0))
+            if acertos - a0 or faltas - f0:
+                delta[nome] = {"acertos": acertos - a0, "faltas": faltas - f0}
+                total = p.caches.setdefault(nome, {"acertos": 0, "faltas": 0})
+                total["acertos"] += acertos - a0
+                total["faltas"] += faltas - f0
+        p._publicar(delta)
+        return False
+
+
+def pergunta(texto: str):
+    """Contexto que registra os spans da pergunta (no-op com a instrumentação desligada)."""
+    return Pergunta(texto) if ligada() else _NULO
+
+
+def retomar(p, nome: str = "exibir"):
+    """Nova fase da pergunta `p` (ou no-op, se `p` for None ou a instrumentação estiver desligada)."""
+    return p.fase(nome) if ligada() and isinstance(p, Pergunta) else _NULO
+
+
+def exportar_jsonl(perguntas, destino) -> None:
+    """Um span por linha (JSON) e um resumo por pergunta; `destino` = caminho ou arquivo aberto."""
+    linhas = []
+    for p in perguntas:
+        linhas += [json.dumps(s, ensure_ascii=False, default=str) for s in p.registros()]
+        linhas.append(json.dumps({"pergunta": p.texto, "quando": p.inicio, "caches": p.caches, "ms": p.ms},
+                                 ensure_ascii=False))
+    texto = "".join(linha + "\n" for linha in linhas)
+    if hasattr(destino, "write"):
+        destino.write(texto)
+        return
+    with open(destino, "w", encoding="utf-8") as f:
+        f.write(texto)
+
+
+_ajustar_tracemalloc()  # AGENTE_EDA_INSTRUMENTAR_MEMORIA=1 já mede desde a importação
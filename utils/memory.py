@@ -1,13 +1,32 @@
+import sys
+import threading
 from datetime import datetime
-import streamlit as st
 
 _KEY = "conclusoes_agente"
 
+# Fora do Streamlit (CLI, scripts): uma lista por thread
+_LOCAL = threading.local()
+
+def _sessao():
+    """st.session_state quando há um script Streamlit rodando; senão None (sem importar o streamlit)."""
+    st = sys.modules.get("streamlit")
+    if st is None:
+        return None
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state
+
 def _store():
-    """Garante a lista de conclusões na sessão do Streamlit."""
-    if _KEY not in st.session_state:
-        st.session_state[_KEY] = []
-    return st.session_state[_KEY]
+    """Garante a lista de conclusões na sessão do Streamlit (ou na thread, fora dele)."""
+    sessao = _sessao()
+    if sessao is None:
+        if not hasattr(_LOCAL, "itens"):
+            _LOCAL.itens = []
+        return _LOCAL.itens
+    if _KEY not in sessao:
+        sessao[_KEY] = []
+    return sessao[_KEY]
 
 def salvar(pergunta: str, resposta: str) -> None:
     """
@@ -41,4 +60,4 @@ def all_md() -> str:
 
 def clear() -> None:
     """Limpa todas as conclusões da sessão."""
-    st.session_state[_KEY] = []
+    _store().clear()
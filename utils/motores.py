@@ -0,0 +1,419 @@
+# utils/motores.py
+"""
+Motores de cálculo para as funções básicas de `eda` (tipos, intervalo, tendência central,
+variabilidade, frequências, outliers IQR, efeito dos outliers e tabela cruzada).
+
+- "pandas": o DataFrame em memória (padrão; mesmas funções de utils/eda.py)
+- "duckdb": relação DuckDB lendo o CSV/Parquet direto do disco
+- "polars": LazyFrame do Polars (scan_csv/scan_parquet), coletado com o motor streaming
+
+Nos motores externos as agregações rodam dentro do motor (multithread, com spill em disco
+quando passam do limite de memória); só as tabelas de resultado viram pandas.
+DuckDB e Polars são opcionais: sem eles, só o motor "pandas" fica disponível.
+"""
+import importlib.util
+import math
+import os
+from decimal import Decimal
+
+import numpy as np
+import pandas as pd
+
+from utils import cruzamento, dataset, eda, paralelo, roteador
+from utils.cache import DIR_CACHE
+
+MOTORES = ("pandas", "duckdb", "polars")
+MOTOR_PADRAO = os.getenv("AGENTE_EDA_MOTOR", "pandas")
+# Limite de memória dos motores externos; acima dele as agregações usam DIR_SPILL
+MEMORIA_MB = int(os.getenv("AGENTE_EDA_MOTOR_MEMORIA_MB", "2048"))
+DIR_SPILL = os.path.join(DIR_CACHE, "spill")
+
+# Intenções que os motores externos respondem sem carregar o DataFrame
+COBERTAS = {"tipos", "intervalo", "tendencia_central", "variabilidade", "frequencias", "outliers",
+            "tabela_cruzada"}
+
+
+def disponiveis() -> list:
+    """Motores que podem ser usados neste ambiente (sem importar as bibliotecas)."""
+    return [m for m in MOTORES if m == "pandas" or importlib.util.find_spec(m) is not None]
+
+
+def _parquet(caminho: str) -> bool:
+    return str(caminho).lower().endswith((".parquet", ".pq"))
+
+
+class Motor:
+    """
+    Interface comum. Cada motor externo informa o esquema e implementa quatro consultas
+    (`_agregar`, `_fora`, `_top`, `_pares`); as tabelas saem no formato de utils/eda.py.
+    """
+
+    nome = ""
+
+    def __init__(self, esquema):
+        # esquema: [(coluna, tipo no motor, categoria, usa nas estatísticas numéricas)]
+        self.columns = pd.Index([c for c, _, _, _ in esquema])
+        self._dtypes = [t for _, t, _, _ in esquema]
+        self._categorias = [cat for _, _, cat, _ in esquema]
+        self.numericas = [c for c, _, _, num in esquema if num]
+        self.categoricas = [c for c, _, cat, _ in esquema if cat != "Numérica"]
+        self._stats = None
+        self._outliers = None
+
+    # -------- consultas de cada motor --------
+    def _agregar(self) -> tuple:
+        """(linhas, {coluna: não nulos}, {coluna numérica: n/min/max/mean/median/std/var/q1/q3})."""
+        raise NotImplementedError
+
+    def _fora(self, limites: dict) -> tuple:
+        """({coluna: nº de outliers}, {coluna: média sem outliers}, {coluna: desvio sem outliers})."""
+        raise NotImplementedError
+
+    def _top(self, col: str, topn: int) -> list:
+        """[(valor, contagem)] dos `topn` valores mais frequentes (sem nulos)."""
+        raise NotImplementedError
+
+    def _pares(self, a: str, b: str) -> list:
+        """[(valor de a, valor de b, contagem)] sem nulos."""
+        raise NotImplementedError
+
+    # -------- estatísticas (uma agregação por motor, reaproveitada) --------
+    def _perfil(self) -> pd.DataFrame:
+        if self._stats is None:
+            self.linhas, self._nao_nulos, stats = self._agregar()
+            campos = ("n", "min", "max", "mean", "median", "std", "var", "q1", "q3")
+            self._stats = pd.DataFrame({k: [stats[c][k] for c in self.numericas] for k in campos},
+                                       index=self.numericas)
+        return self._stats
+
+    def _perfil_outliers(self) -> pd.DataFrame:
+        if self._outliers is None:
+            st = self._perfil()
+            iqr = st["q3"] - st["q1"]
+            lim = pd.DataFrame({"lim_inf": st["q1"] - 1.5 * iqr, "lim_sup": st["q3"] + 1.5 * iqr})
+            limites = {c: (lo, hi) for c, lo, hi in lim.itertuples() if not (math.isnan(lo) or math.isnan(hi))}
+            n_out, media, desvio = self._fora(limites)
+            lim["n_outliers"] = [n_out.get(c, 0) for c in self.numericas]
+            lim["mean_sem_out"] = [media.get(c, np.nan) for c in self.numericas]
+            lim["std_sem_out"] = [desvio.get(c, np.nan) for c in self.numericas]
+            self._outliers = lim
+        return self._outliers
+
+    # -------- tabelas no formato de utils/eda.py --------
+    def tipos(self):
+        self._perfil()
+        nao_nulos = np.array([self._nao_nulos[c] for c in self.columns])
+        nulos_pct = ((1 - nao_nulos / self.linhas) * 100).round(2) if self.linhas else np.full(len(nao_nulos), np.nan)
+        return eda._tabela_tipos(self.columns, self._dtypes, self._categorias, nao_nulos, nulos_pct)
+
+    def intervalo(self) -> pd.DataFrame:
+        return self._perfil()[["min", "max"]].copy()
+
+    def tendencia_central(self) -> pd.DataFrame:
+        return self._perfil()[["mean", "median"]].rename(columns={"mean": "Média", "median": "Mediana"})
+
+    def variabilidade(self) -> pd.DataFrame:
+        return self._perfil()[["std", "var"]].copy()
+
+    def frequencias(self, topn=10):
+        out = {}
+        for c in self.columns:
+            top = self._top(c, topn)
+            if top:
+                valores, n = zip(*top)
+                out[c] = pd.Series(n, index=pd.Index(valores, name=c), name="count", dtype="int64")
+        return out
+
+    def outliers_iqr(self) -> pd.Series:
+        self._perfil()
+        if not self.numericas or self.linhas == 0:
+            return pd.Series(dtype=float)
+        pct = self._perfil_outliers()["n_outliers"] / self.linhas * 100
+        return pct.sort_values(ascending=False).round(2)
+
+    def efeito_outliers(self) -> pd.DataFrame:
+        if not self.numericas:
+            return pd.DataFrame()
+        st, out = self._perfil(), self._perfil_outliers()
+        comp = pd.DataFrame({
+            "mean_com_out": st["mean"],
+            "mean_sem_out": out["mean_sem_out"],
+            "std_com_out":  st["std"],
+            "std_sem_out":  out["std_sem_out"]
+        })
+        comp["delta_mean_abs"] = (comp["mean_sem_out"] - comp["mean_com_out"]).abs()
+        comp["delta_std_abs"]  = (comp["std_sem_out"]  - comp["std_com_out"]).abs()
+        return comp
+
+    def crosstab(self, a: str, b: str, top: int = cruzamento.TOP):
+        return cruzamento.de_pares(self._pares(a, b), a, b, top)
+
+
+class MotorPandas(Motor):
+    """DataFrame em memória: delega para as funções de utils/eda.py (referência dos demais)."""
+
+    nome = "pandas"
+
+    def __init__(self, fonte):
+        if isinstance(fonte, pd.DataFrame):
+            self.df = fonte
+        elif _parquet(fonte):
+            df = pd.read_parquet(fonte)
+            dataset.preparar_tempo(df)
+            self.df = dataset.marcar(df, dataset.hash_conteudo(fonte))
+        else:
+            self.df = dataset.carregar(fonte)
+        self.columns = self.df.columns
+        self.linhas = len(self.df)
+        num = self.df.select_dtypes("number").columns
+        self.numericas = list(num)
+        self.categoricas = [c for c in self.df.columns if not pd.api.types.is_numeric_dtype(self.df[c])]
+
+    def tipos(self):
+        return eda.tipos(self.df)
+
+    def intervalo(self):
+        return eda.intervalo(self.df)
+
+    def tendencia_central(self):
+        return eda.tendencia_central(self.df)
+
+    def variabilidade(self):
+        return eda.variabilidade(self.df)
+
+    def frequencias(self, topn=10):
+        return eda.frequencias(self.df, topn=topn)
+
+    def outliers_iqr(self):
+        return eda.outliers_iqr(self.df)
+
+    def efeito_outliers(self):
+        return eda.efeito_outliers(self.df)
+
+    def crosstab(self, a: str, b: str, top: int = cruzamento.TOP):
+        return eda.crosstab(self.df, a, b, top)
+
+
+# ---------------------- DuckDB ----------------------
+def _ident(nome) -> str:
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def _literal(texto) -> str:
+    return "'" + str(texto).replace("'", "''") + "'"
+
+
+def _num(x) -> str:
+    return repr(float(x))
+
+
+_DUCKDB_INTEIROS = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT",
+                    "UTINYINT", "USMALLINT", "UINTEGER", "UBIGINT", "UHUGEINT")
+_DUCKDB_REAIS = ("FLOAT", "DOUBLE", "REAL", "DECIMAL")
+_DUCKDB_TEMPO = ("DATE", "TIME", "TIMESTAMP", "INTERVAL")
+
+
+def _categoria_duckdb(tipo: str) -> tuple:
+    """(categoria, entra nas estatísticas numéricas) para um tipo do DuckDB."""
+    base = tipo.split("(")[0].upper()
+    if base == "BOOLEAN":
+        return "Numérica", False  # como no pandas: bool é numérico, mas fica fora das estatísticas
+    if base in _DUCKDB_INTEIROS or base in _DUCKDB_REAIS:
+        return "Numérica", True
+    if base.startswith(_DUCKDB_TEMPO):
+        return "Data/Tempo", False
+    return "Categórica", False
+
+
+class MotorDuckDB(Motor):
+    """Relação DuckDB sobre o arquivo (ou sobre um DataFrame, sem cópia)."""
+
+    nome = "duckdb"
+
+    def __init__(self, fonte, threads: int = None, memoria_mb: int = MEMORIA_MB):
+        import duckdb
+        os.makedirs(DIR_SPILL, exist_ok=True)
+        self._con = duckdb.connect(config={
+            "threads": threads or paralelo.WORKERS,
+            "memory_limit": f"{memoria_mb}MB",
+            "temp_directory": DIR_SPILL,
+            "preserve_insertion_order": False,  # permite agregar em paralelo sem reordenar
+        })
+        if isinstance(fonte, pd.DataFrame):
+            self._con.register("dados", fonte)
+        else:
+            leitor = "read_parquet" if _parquet(fonte) else "read_csv_auto"
+            self._con.execute(f"CREATE VIEW dados AS SELECT * FROM {leitor}({_literal(fonte)})")
+        esquema = self._con.execute("DESCRIBE dados").fetchall()
+        super().__init__([(nome, tipo, *_categoria_duckdb(tipo)) for nome, tipo, *_ in esquema])
+
+    def _agregar(self):
+        partes = ["count(*)"] + [f"count({_ident(c)})" for c in self.columns]
+        for c in self.numericas:
+            q = _ident(c)
+            partes += [f"min({q})", f"max({q})", f"avg({q})", f"quantile_cont({q}, [0.25, 0.5, 0.75])",
+                       f"stddev_samp({q})", f"var_samp({q})"]
+        linha = self._con.execute(f"SELECT {', '.join(partes)} FROM dados").fetchone()
+        linhas, nao_nulos = linha[0], dict(zip(self.columns, linha[1:len(self.columns) + 1]))
+        stats, i = {}, len(self.columns) + 1
+        for c in self.numericas:
+            mn, mx, media, quartis, std, var = linha[i:i + 6]
+            q1, med, q3 = quartis if quartis is not None else (np.nan,) * 3
+            stats[c] = {"n": nao_nulos[c], "min": mn, "max": mx, "mean": media, "median": med,
+                        "std": std, "var": var, "q1": q1, "q3": q3}
+            stats[c] = {k: _nan(v) for k, v in stats[c].items()}
+            i += 6
+        return linhas, nao_nulos, stats
+
+    def _fora(self, limites):
+        if not limites:
+            return {}, {}, {}
+        cond = {c: f"({_ident(c)} < {_num(lo)} OR {_ident(c)} > {_num(hi)})" for c, (lo, hi) in limites.items()}
+        # nulos não são outliers (coalesce), como nas comparações com NaN do pandas
+        fica = "NOT coalesce(" + " OR ".join(cond.values()) + ", false)"
+        partes = []
+        for c in limites:
+            partes += [f"count_if({cond[c]})", f"avg({_ident(c)}) FILTER (WHERE {fica})",
+                       f"stddev_samp({_ident(c)}) FILTER (WHERE {fica})"]
+        linha = self._con.execute(f"SELECT {', '.join(partes)} FROM dados").fetchone()
+        cols = list(limites)
+        return (dict(zip(cols, linha[0::3])), {c: _nan(v) for c, v in zip(cols, linha[1::3])},
+                {c: _nan(v) for c, v in zip(cols, linha[2::3])})
+
+    def _top(self, col, topn):
+        q = _ident(col)
+        return self._con.execute(
+            f"SELECT {q}, count(*) AS n FROM dados WHERE {q} IS NOT NULL GROUP BY 1 ORDER BY 2 DESC LIMIT {int(topn)}"
+        ).fetchall()
+
+    def _pares(self, a, b):
+        qa, qb = _ident(a), _ident(b)
+        return self._con.execute(
+            f"SELECT {qa}, {qb}, count(*) FROM dados WHERE {qa} IS NOT NULL AND {qb} IS NOT NULL GROUP BY 1, 2"
+        ).fetchall()
+
+
+def _nan(v):
+    """NULL → NaN e DECIMAL → float, para as tabelas ficarem iguais às do pandas."""
+    if v is None:
+        return np.nan
+    return float(v) if isinstance(v, Decimal) else v
+
+
+# ---------------------- Polars ----------------------
+class MotorPolars(Motor):
+    """LazyFrame do Polars; cada consulta é um plano preguiçoso coletado em streaming."""
+
+    nome = "polars"
+
+    def __init__(self, fonte, threads: int = None):
+        # o pool de threads do Polars é fixado no primeiro import
+        os.environ.setdefault("POLARS_MAX_THREADS", str(threads or paralelo.WORKERS))
+        os.environ.setdefault("POLARS_TEMP_DIR", DIR_SPILL)
+        import polars as pl
+        self._pl = pl
+        if isinstance(fonte, pd.DataFrame):
+            self._lf = pl.from_pandas(fonte).lazy()
+        elif _parquet(fonte):
+            self._lf = pl.scan_parquet(fonte)
+        else:
+            self._lf = pl.scan_csv(fonte, try_parse_dates=True, infer_schema_length=10_000)
+        esquema = []
+        for nome, tipo in self._lf.collect_schema().items():
+            if tipo == pl.Boolean:
+                esquema.append((nome, str(tipo), "Numérica", False))
+            elif tipo.is_numeric():
+                esquema.append((nome, str(tipo), "Numérica", True))
+            elif tipo.is_temporal():
+                esquema.append((nome, str(tipo), "Data/Tempo", False))
+            else:
+                esquema.append((nome, str(tipo), "Categórica", False))
+        super().__init__(esquema)
+
+    def _coletar(self, lf):
+        try:
+            return lf.collect(engine="streaming")
+        except TypeError:  # Polars < 1.23
+            return lf.collect(streaming=True)
+
+    def _agregar(self):
+        pl = self._pl
+        exprs = [pl.len().alias("__linhas")] + [pl.col(c).count().alias(f"n{i}") for i, c in enumerate(self.columns)]
+        for i, c in enumerate(self.numericas):
+            col = pl.col(c)
+            exprs += [col.min().alias(f"min{i}"), col.max().alias(f"max{i}"), col.mean().alias(f"mean{i}"),
+                      col.median().alias(f"median{i}"), col.std().alias(f"std{i}"), col.var().alias(f"var{i}"),
+                      col.quantile(0.25, interpolation="linear").alias(f"q1{i}"),
+                      col.quantile(0.75, interpolation="linear").alias(f"q3{i}")]
+        linha = self._coletar(self._lf.select(exprs)).row(0, named=True)
+        nao_nulos = {c: linha[f"n{i}"] for i, c in enumerate(self.columns)}
+        stats = {c: {"n": nao_nulos[c], **{k: _nan(linha[f"{k}{i}"]) for k in
+                                           ("min", "max", "mean", "median", "std", "var", "q1", "q3")}}
+                 for i, c in enumerate(self.numericas)}
+        return linha["__linhas"], nao_nulos, stats
+
+    def _fora(self, limites):
+        if not limites:
+            return {}, {}, {}
+        pl = self._pl
+        cond = {c: (pl.col(c) < lo) | (pl.col(c) > hi) for c, (lo, hi) in limites.items()}
+        fica = ~pl.any_horizontal(list(cond.values())).fill_null(False)
+        exprs = []
+        for i, c in enumerate(limites):
+            exprs += [cond[c].sum().alias(f"o{i}"), pl.col(c).filter(fica).mean().alias(f"m{i}"),
+                      pl.col(c).filter(fica).std().alias(f"s{i}")]
+        linha = self._coletar(self._lf.select(exprs)).row(0, named=True)
+        cols = list(limites)
+        return ({c: linha[f"o{i}"] for i, c in enumerate(cols)},
+                {c: _nan(linha[f"m{i}"]) for i, c in enumerate(cols)},
+                {c: _nan(linha[f"s{i}"]) for i, c in enumerate(cols)})
+
+    def _top(self, col, topn):
+        pl = self._pl
+        plano = (self._lf.select(pl.col(col)).drop_nulls().group_by(col).agg(pl.len().alias("__n"))
+                 .sort("__n", descending=True).head(topn))
+        return self._coletar(plano).rows()
+
+    def _pares(self, a, b):
+        pl = self._pl
+        plano = self._lf.select(pl.col(a), pl.col(b)).drop_nulls().group_by([a, b]).agg(pl.len().alias("__n"))
+        return self._coletar(plano).rows()
+
+
+_CLASSES = {"pandas": MotorPandas, "duckdb": MotorDuckDB, "polars": MotorPolars}
+
+
+def abrir(fonte, motor: str = None) -> Motor:
+    """
+    Abre `fonte` (caminho de CSV/Parquet ou DataFrame) no motor pedido.
+    - motor: "pandas", "duckdb", "polars" ou "auto" (primeiro externo instalado); padrão AGENTE_EDA_MOTOR
+    """
+    motor = motor or MOTOR_PADRAO
+    if motor == "auto":
+        motor = next((m for m in ("duckdb", "polars") if m in disponiveis()), "pandas")
+    if motor not in _CLASSES:
+        raise ValueError(f"Motor desconhecido: {motor} (opções: {', '.join(MOTORES)})")
+    return _CLASSES[motor](fonte)
+
+
+def responder_lote(motor: Motor, perguntas, intencoes=None) -> list:
+    """
+    Como `eda.responder_lote`, mas sobre um motor. Perguntas cuja intenção precisa dos dados
+    em memória (gráficos, clusters, correlação...) voltam com um aviso em vez de resposta.
+    """
+    perguntas = list(perguntas)
+    intencoes = list(intencoes) if intencoes is not None else [None] * len(perguntas)
+    respostas = []
+    for q, i in zip(perguntas, intencoes):
+        rota = roteador.rotear(q, motor.columns)
+        candidatas = eda._candidatas(rota, i)
+        if candidatas and candidatas[0] not in COBERTAS and motor.nome != "pandas":
+            respostas.append((f"A intenção '{candidatas[0]}' precisa dos dados em memória "
+                              f"(motor pandas); o motor {motor.nome} não a calcula.", None,
+                              {"intencao": candidatas[0]}))
+            continue
+        if motor.nome != "pandas":
+            candidatas = [c for c in candidatas if c in COBERTAS]
+        alvo = motor.df if isinstance(motor, MotorPandas) else motor
+        respostas.append(eda.registrar(q, eda._resolver(alvo, candidatas, rota)))
+    return respostas
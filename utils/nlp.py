@@ -1,57 +1,156 @@
 # utils/nlp.py
+import hashlib
+import json
 import os
 import re
-import streamlit as st
+import sys
+import threading
+import time
+import unicodedata
 from typing import Optional
-import requests
+
+from utils import cache, instrumentacao, roteador
+from utils.cache import LRUCache
 
 CATEGORIAS = [
     "tipos", "intervalo", "tendencia_central", "variabilidade", "frequencias",
     "outliers", "correlacao", "dispersao", "temporal", "clusters",
-    "influencia", "distribuicao", "tabela_cruzada"
+    "influencia", "distribuicao", "histograma", "tabela_cruzada"
 ]
 
-HF_API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-small"
+# Endpoint e limites (sobrescrevíveis por variável de ambiente, ex.: um stub local em testes)
+HF_API_URL = os.getenv("AGENTE_EDA_HF_URL", "https://api-inference.huggingface.co/models/google/flan-t5-small")
+TIMEOUT_CONEXAO = float(os.getenv("AGENTE_EDA_HF_TIMEOUT_CONEXAO", "2"))
+TIMEOUT_LEITURA = float(os.getenv("AGENTE_EDA_HF_TIMEOUT_LEITURA", "5"))
+FALHAS_ATE_ABRIR = int(os.getenv("AGENTE_EDA_HF_FALHAS", "3"))
+ESPERA_DISJUNTOR = float(os.getenv("AGENTE_EDA_HF_ESPERA", "60"))
+
+_INTENCOES = LRUCache(maxsize=1024, nome="nlp")
+_LOCK = threading.Lock()
+_sessao = None
+_persistidas = None
+
+class Disjuntor:
+    """
+    Circuit breaker: após `limite` falhas seguidas fica aberto por `espera` segundos
+    (nenhuma chamada remota); depois libera uma única tentativa (meio-aberto), que fecha
+    ou reabre o circuito. Quem chega durante a tentativa continua no fallback.
+    """
+
+    def __init__(self, limite: int = FALHAS_ATE_ABRIR, espera: float = ESPERA_DISJUNTOR):
+        self.limite = limite
+        self.espera = espera
+        self.falhas = 0
+        self.aberto_ate = 0.0
+        self.testando = False
+        self._lock = threading.Lock()
+
+    def permite(self) -> bool:
+        """Pode chamar? Com o circuito recém-reaberto, só o primeiro a perguntar recebe True."""
+        with self._lock:
+            if self.falhas < self.limite:
+                return True
+            if self.testando or time.monotonic() < self.aberto_ate:
+                return False
+            self.testando = True
+            return True
+
+    def sucesso(self) -> None:
+        with self._lock:
+            self.falhas = 0
+            self.aberto_ate = 0.0
+            self.testando = False
+
+    def falha(self) -> None:
+        with self._lock:
+            self.falhas += 1
+            if self.falhas >= self.limite:
+                self.aberto_ate = time.monotonic() + self.espera
+            self.testando = False
+
+    @property
+    def aberto(self) -> bool:
+        with self._lock:
+            return self.falhas >= self.limite and (self.testando or time.monotonic() < self.aberto_ate)
+
+_DISJUNTOR = Disjuntor()
 
 def _hf_token() -> Optional[str]:
-    return st.secrets.get("HF_TOKEN") or os.getenv("HF_TOKEN")
+    # st.secrets só se o app já carregou o streamlit (a CLI não o importa)
+    st = sys.modules.get("streamlit")
+    token = None
+    if st is not None:
+        try:
+            token = st.secrets.get("HF_TOKEN")
+        except Exception:  # sem secrets.toml
+            token = None
+    return token or os.getenv("HF_TOKEN")
 
-def _chutar_regra(pergunta: str) -> str:
-    q = (pergunta or "").lower()
-    if any(x in q for x in ["tipo", "dtype", "dtypes", "categó", "numér"]):
-        return "tipos"
-    if any(x in q for x in ["intervalo", "min", "máx", "minimo", "maximo"]):
-        return "intervalo"
-    if any(x in q for x in ["tendência", "tendencia", "média", "media", "mediana"]):
-        return "tendencia_central"
-    if any(x in q for x in ["variân", "varianc", "desvio"]):
-        return "variabilidade"
-    if "frequ" in q or "moda" in q:
-        return "frequencias"
-    if "outlier" in q or "atípic" in q or "atipic" in q:
-        return "outliers"
-    if "correla" in q:
-        return "correlacao"
-    if "dispers" in q or "scatter" in q:
-        return "dispersao"
-    if any(x in q for x in ["temporal", "série", "serie"]):
-        return "temporal"
-    if "cluster" in q or "agrup" in q:
-        return "clusters"
-    if "influenc" in q or "importanc" in q:
-        return "influencia"
-    if "distribui" in q:
-        return "distribuicao"
-    if "tabela cruzada" in q or "crosstab" in q:
-        return "tabela_cruzada"
-    return "tipos"
+def _sessao_http():
+    """Sessão única com pool de conexões (keep-alive) reaproveitada entre perguntas."""
+    global _sessao
+    with _LOCK:
+        if _sessao is None:
+            # requests só é importado na primeira chamada ao modelo
+            import requests
+            from requests.adapters import HTTPAdapter
+            _sessao = requests.Session()
+            _sessao.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+            _sessao.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        return _sessao
 
-def interpretar_pergunta(pergunta: str) -> str:
-    """Tenta classificar a pergunta via Hugging Face; se falhar, usa o fallback."""
-    token = _hf_token()
-    if not token:
-        return _chutar_regra(pergunta)
+def normalizar(pergunta: str) -> str:
+    """Chave de cache: minúsculas, espaços colapsados, sem pontuação nas pontas."""
+    q = unicodedata.normalize("NFKC", pergunta or "").lower()
+    return " ".join(q.split()).strip(" ?!.,;:")
+
+# ---------------------- Cache persistente ----------------------
+def _arquivo_cache() -> str:
+    # um arquivo por endpoint: trocar de modelo não reaproveita classificações antigas
+    modelo = hashlib.blake2b(HF_API_URL.encode(), digest_size=6).hexdigest()
+    return os.path.join(cache.DIR_CACHE, f"intencoes-{modelo}.json")
+
+def _carregar_persistidas() -> dict:
+    global _persistidas
+    if _persistidas is None:
+        try:
+            with open(_arquivo_cache(), encoding="utf-8") as f:
+                _persistidas = {k: v for k, v in json.load(f).items() if v in CATEGORIAS}
+        except (OSError, ValueError):
+            _persistidas = {}
+    return _persistidas
 
+def _persistir(chave: str, categoria: str) -> None:
+    with _LOCK:
+        persistidas = _carregar_persistidas()
+        persistidas[chave] = categoria
+        destino = _arquivo_cache()
+        tmp = f"{destino}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(cache.DIR_CACHE, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(persistidas, f, ensure_ascii=False)
+            os.replace(tmp, destino)  # escrita atômica
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+def limpar_cache(disco: bool = False) -> None:
+    """Esvazia o cache de intenções em memória (e o arquivo, se `disco`)."""
+    global _persistidas
+    _INTENCOES.clear()
+    with _LOCK:
+        _persistidas = None
+        if disco and os.path.exists(_arquivo_cache()):
+            os.remove(_arquivo_cache())
+
+def _chutar_regra(pergunta: str) -> str:
+    """Fallback local: melhor intenção do roteador compilado (utils.roteador); padrão "tipos"."""
+    intencao = roteador.rotear(pergunta).intencao
+    return intencao if intencao in CATEGORIAS else "tipos"
+
+def _classificar_remoto(pergunta: str, token: str) -> Optional[str]:
+    """Chamada ao modelo com timeouts curtos; None se falhar ou a saída não for uma categoria."""
     prompt = f"""
 Você é um classificador para análise exploratória de dados (EDA).
 Receba a pergunta do usuário e responda APENAS com UMA das categorias abaixo:
@@ -60,21 +159,57 @@ Receba a pergunta do usuário e responda APENAS com UMA das categorias abaixo:
 Pergunta: "{pergunta}"
 Responda SOMENTE com a categoria.
 """
+    resp = _sessao_http().post(
+        HF_API_URL,
+        headers={"Authorization": f"Bearer {token}"},
+        json={"inputs": prompt, "parameters": {"max_new_tokens": 10}},
+        timeout=(TIMEOUT_CONEXAO, TIMEOUT_LEITURA),
+    )
+    resp.raise_for_status()
+    data = resp.json()
+    saida = ""
+
+    if isinstance(data, list) and data and "generated_text" in data[0]:
+        saida = data[0]["generated_text"].strip().lower()
+    elif isinstance(data, dict) and "generated_text" in data:
+        saida = data["generated_text"].strip().lower()
+
+    saida = re.sub(r"[^a-z_]", "", saida)
+    return saida if saida in CATEGORIAS else None
+
+@instrumentacao.medir("nlp.interpretar")
+def interpretar_pergunta(pergunta: str) -> str:
+    """
+    Classifica a pergunta via Hugging Face; se falhar, usa o fallback por regras.
+    - cache (memória + disco) pela pergunta normalizada: repetições não vão à rede
+    - timeouts de conexão/leitura e disjuntor após falhas seguidas
+    """
+    token = _hf_token()
+    if not token:
+        return _chutar_regra(pergunta)
+
+    chave = normalizar(pergunta)
+    categoria = _INTENCOES.get(chave)
+    if categoria is None:
+        categoria = _carregar_persistidas().get(chave)
+        if categoria is not None:
+            _INTENCOES.set(chave, categoria)
+    if categoria is not None:
+        return categoria
+
+    if not _DISJUNTOR.permite():
+        return _chutar_regra(pergunta)
     try:
-        resp = requests.post(
-            HF_API_URL,
-            headers={"Authorization": f"Bearer {token}"},
-            json={"inputs": prompt, "parameters": {"max_new_tokens": 10}}
-        )
-        data = resp.json()
-        saida = ""
-
-        if isinstance(data, list) and "generated_text" in data[0]:
-            saida = data[0]["generated_text"].strip().lower()
-        elif isinstance(data, dict) and "generated_text" in data:
-            saida = data["generated_text"].strip().lower()
-
-        saida = re.sub(r"[^a-z_]", "", saida)
-        return saida if saida in CATEGORIAS else _chutar_regra(pergunta)
+        with instrumentacao.span("llm"):
+            categoria = _classificar_remoto(pergunta, token)
     except Exception:
+        # rede, HTTP, JSON inválido ou corpo em formato inesperado: conta como falha e usa as regras
+        _DISJUNTOR.falha()
+        return _chutar_regra(pergunta)
+    _DISJUNTOR.sucesso()
+    if categoria is None:
+        # resposta válida, mas fora das categorias: não guarda, o fallback decide
         return _chutar_regra(pergunta)
+    _INTENCOES.set(chave, categoria)
+    _persistir(chave, categoria)
+    return categoria
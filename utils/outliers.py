@@ -0,0 +1,204 @@
+# utils/outliers.py
+"""
+Outliers por IQR, MAD (z robusto) e z-score, calculados juntos sobre o array ordenado de cada
+coluna numérica (uma ordenação por coluna, sem máscaras do tamanho dos dados):
+- quartis, mediana e MAD saem de posições do array ordenado;
+- os limites de cada método viram dois searchsorted: fora = i0 + (n − i1);
+- média/desvio "sem outliers" vêm de somas acumuladas de x e x² (o trecho [i0, i1) é o que fica).
+O método "isolamento" (IsolationForest, opcional) é ajustado numa amostra e pontua todas as linhas em lotes.
+"""
+import os
+from dataclasses import dataclass
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset, paralelo, tarefas
+from utils.cache import RESULTADOS_MB, LRUCache
+
+_RESULTADOS = LRUCache(maxsize=8, nome="outliers", max_mb=RESULTADOS_MB, disco="outliers")
+
+NOMES = {"iqr": "IQR", "mad": "MAD", "zscore": "z-score", "isolamento": "Isolation Forest"}
+# Métodos calculados nas respostas (ex.: AGENTE_EDA_OUTLIERS=iqr,mad,zscore,isolamento)
+METODOS = tuple(os.getenv("AGENTE_EDA_OUTLIERS", "iqr,mad,zscore").split(","))
+# Limites de cada método
+K_IQR = 1.5
+LIMIAR_MAD = 3.5  # |0.6745·(x − mediana) / MAD| > 3.5 (Iglewicz & Hoaglin)
+LIMIAR_Z = 3.0
+# IsolationForest: linhas da amostra de ajuste, linhas por lote na pontuação e fração esperada de anomalias
+AMOSTRA_ISOLAMENTO = 100_000
+LOTE = 65_536
+CONTAMINACAO = 0.01
+
+
+@dataclass
+class Outliers:
+    """% de linhas fora por método e o efeito de tirá-las na média e no desvio de cada coluna."""
+    pct: pd.DataFrame      # coluna × método (% das linhas do dataset)
+    limites: pd.DataFrame  # coluna × (método_inf, método_sup)
+    efeito: pd.DataFrame   # coluna × (mean/std com outliers, mean/std sem outliers de cada método)
+    metodos: tuple
+
+
+def _quantil(x: np.ndarray, q: float) -> float:
+    """Quantil com interpolação linear (igual ao pandas) de um array já ordenado."""
+    p = q * (x.size - 1)
+    lo, hi = int(np.floor(p)), int(np.ceil(p))
+    return x[lo] + (x[hi] - x[lo]) * (p - lo)
+
+
+def _mad(x: np.ndarray, med: float) -> float:
+    """
+    Mediana de |x − med| sem montar o array de desvios: à esquerda e à direita da mediana os
+    desvios já estão ordenados, então basta o k-ésimo da união de duas sequências ordenadas.
+    """
+    m = int(np.searchsorted(x, med))
+    na, nb = m, x.size - m
+
+    def esq(t):  # t-ésimo menor desvio à esquerda da mediana
+        return med - x[m - 1 - t]
+
+    def dir_(t):
+        return x[m + t] - med
+
+    def kesimo(k):
+        lo, hi = max(0, k + 1 - nb), min(k + 1, na)
+        while True:
+            i = (lo + hi) // 2  # i desvios da esquerda, j da direita
+            j = k + 1 - i
+            if i < na and j > 0 and dir_(j - 1) > esq(i):
+                lo = i + 1
+            elif i > 0 and j < nb and esq(i - 1) > dir_(j):
+                hi = i - 1
+            else:
+                return max(esq(i - 1) if i > 0 else -np.inf, dir_(j - 1) if j > 0 else -np.inf)
+
+    n = x.size
+    return (kesimo((n - 1) // 2) + kesimo(n // 2)) / 2
+
+
+def _limites(x, s1, s2, med, metodo: str):
+    n = x.size
+    if metodo == "iqr":
+        q1, q3 = _quantil(x, 0.25), _quantil(x, 0.75)
+        return q1 - K_IQR * (q3 - q1), q3 + K_IQR * (q3 - q1)
+    if metodo == "mad":
+        escala = _mad(x, med) / 0.6745
+        if escala == 0:
+            # mais da metade dos valores iguais: usa o desvio absoluto médio (×1.2533 ≈ σ na normal)
+            m = int(np.searchsorted(x, med))
+            escala = 1.253314 * ((s1[n] - s1[m]) - s1[m]) / n
+        return (med - LIMIAR_MAD * escala, med + LIMIAR_MAD * escala) if escala > 0 else (-np.inf, np.inf)
+    media = med + s1[n] / n
+    dp = np.sqrt(max(s2[n] - s1[n] ** 2 / n, 0) / (n - 1)) if n > 1 else 0.0
+    return media - LIMIAR_Z * dp, media + LIMIAR_Z * dp
+
+
+def _media_dp(s1, s2, i0: int, i1: int, centro: float):
+    k = i1 - i0
+    soma, quad = s1[i1] - s1[i0], s2[i1] - s2[i0]
+    media = centro + soma / k if k else np.nan
+    dp = np.sqrt(max(quad - soma * soma / k, 0) / (k - 1)) if k > 1 else np.nan
+    return media, dp
+
+
+def _coluna(df: pd.DataFrame, c: str, metodos) -> dict:
+    """Todos os métodos de uma coluna a partir de uma única ordenação."""
+    x = df[c].to_numpy(dtype="float64", na_value=np.nan)
+    x = np.sort(x[~np.isnan(x)])  # cópia ordenada: o df não é alterado
+    n = x.size
+    out = {"n": n}
+    if n == 0:
+        out.update({"mean": np.nan, "std": np.nan})
+        for m in metodos:
+            out.update({f"{m}_inf": np.nan, f"{m}_sup": np.nan, f"{m}_fora": 0,
+                        f"mean_sem_{m}": np.nan, f"std_sem_{m}": np.nan})
+        return out
+    med = _quantil(x, 0.5)
+    # somas acumuladas de (x − mediana): centrar evita o cancelamento em Σx² − (Σx)²/n
+    y = x - med
+    s1 = np.concatenate(([0.0], np.cumsum(y)))
+    s2 = np.concatenate(([0.0], np.cumsum(y * y)))
+    out["mean"], out["std"] = _media_dp(s1, s2, 0, n, med)
+    for m in metodos:
+        lo, hi = _limites(x, s1, s2, med, m)
+        i0, i1 = int(np.searchsorted(x, lo, "left")), int(np.searchsorted(x, hi, "right"))
+        out[f"{m}_inf"], out[f"{m}_sup"] = lo, hi
+        out[f"{m}_fora"] = i0 + (n - i1)
+        out[f"mean_sem_{m}"], out[f"std_sem_{m}"] = _media_dp(s1, s2, i0, i1, med)
+    return out
+
+
+def _isolamento(df: pd.DataFrame, colunas, stats: pd.DataFrame, random_state: int = 42) -> dict:
+    """
+    IsolationForest ajustado em até AMOSTRA_ISOLAMENTO linhas; todas as linhas são pontuadas em
+    lotes de LOTE (nulos → mediana da coluna). Contagens e somas sem as linhas anômalas são
+    acumuladas lote a lote, como nos outros métodos.
+    """
+    from sklearn.ensemble import IsolationForest
+
+    medianas = stats["mediana"].to_numpy(dtype="float64")
+
+    def lote(linhas):
+        X = np.column_stack([df[c].iloc[linhas].to_numpy(dtype="float64", na_value=np.nan) for c in colunas])
+        nulos = np.isnan(X)
+        X[nulos] = np.take(medianas, np.nonzero(nulos)[1])
+        return X, nulos
+
+    rng = np.random.default_rng(random_state)
+    amostra = np.sort(rng.choice(len(df), size=min(AMOSTRA_ISOLAMENTO, len(df)), replace=False))
+    modelo = IsolationForest(contamination=CONTAMINACAO, n_jobs=paralelo.WORKERS,
+                             random_state=random_state).fit(lote(amostra)[0])
+
+    k = len(colunas)
+    fora, cont, soma, quad = (np.zeros(k) for _ in range(4))
+    tarefas.etapa("Isolation Forest: pontuando as linhas")
+    for ini in range(0, len(df), LOTE):
+        X, nulos = lote(slice(ini, ini + LOTE))
+        anomala = modelo.predict(X) == -1
+        validos = ~nulos
+        fora += (validos & anomala[:, None]).sum(axis=0)
+        fica = validos & ~anomala[:, None]
+        y = np.where(fica, X - medianas, 0.0)
+        cont += fica.sum(axis=0)
+        soma += y.sum(axis=0)
+        quad += (y * y).sum(axis=0)
+        tarefas.progresso(min(ini + LOTE, len(df)), len(df))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = medianas + soma / cont
+        dp = np.sqrt(np.maximum(quad - soma * soma / cont, 0) / (cont - 1))
+    dp[cont < 2] = np.nan
+    return {"isolamento_fora": fora, "mean_sem_isolamento": media, "std_sem_isolamento": dp}
+
+
+def _analisar(df: pd.DataFrame, metodos) -> Outliers:
+    colunas = list(df.select_dtypes("number").columns)
+    if not colunas:
+        return Outliers(pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), metodos)
+    exatos = [m for m in metodos if m != "isolamento"]
+    tarefas.etapa("outliers por coluna")
+    linhas = paralelo.por_coluna(df, partial(_coluna, metodos=exatos), colunas)
+    stats = pd.DataFrame(linhas, index=colunas)
+    if "isolamento" in metodos and len(df):
+        stats["mediana"] = [df[c].median() for c in colunas]
+        for chave, valores in _isolamento(df, colunas, stats.fillna({"mediana": 0})).items():
+            stats[chave] = valores
+
+    total = max(len(df), 1)
+    pct = pd.DataFrame({NOMES[m]: stats[f"{m}_fora"] / total * 100 for m in metodos}, index=colunas).round(2)
+    limites = stats[[f"{m}_{lado}" for m in exatos for lado in ("inf", "sup")]]
+    efeito = stats[["mean", "std"]].rename(columns={"mean": "mean_com_out", "std": "std_com_out"})
+    for m in metodos:
+        efeito[f"mean_sem_{m}"] = stats[f"mean_sem_{m}"]
+        efeito[f"std_sem_{m}"] = stats[f"std_sem_{m}"]
+    return Outliers(pct, limites, efeito, metodos)
+
+
+def analisar(df: pd.DataFrame, metodos=METODOS) -> Outliers:
+    """Outliers de todas as colunas numéricas pelos `metodos` pedidos (cache por dataset)."""
+    metodos = tuple(metodos)
+    desconhecidos = set(metodos) - set(NOMES)
+    if desconhecidos:
+        raise ValueError(f"Métodos de outlier desconhecidos: {sorted(desconhecidos)}; use {list(NOMES)}.")
+    return _RESULTADOS.get_or_compute((dataset.chave(df), metodos), lambda: _analisar(df, metodos))
@@ -0,0 +1,111 @@
+# utils/paralelo.py
+import contextvars
+import multiprocessing as mp
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from utils import instrumentacao, tarefas
+
+# Configuração padrão (pode ser trocada por chamada)
+WORKERS = int(os.getenv("AGENTE_EDA_WORKERS", "0")) or (os.cpu_count() or 1)
+BACKEND = os.getenv("AGENTE_EDA_BACKEND", "thread")  # "thread" | "process"
+
+# DataFrame visto pelos processos filhos (herdado via fork, sem cópia)
+_DF = None
+# Processo filho de um pool deste módulo: chamadas aninhadas rodam em sequência
+_FILHO = False
+# Dentro de um worker: quantas threads as chamadas aninhadas (ex.: por_coluna numa tarefa de
+# responder_lote) ainda podem usar; o total fica em WORKERS em vez de WORKERS × WORKERS
+_ORCAMENTO = contextvars.ContextVar("paralelo_orcamento", default=None)
+
+
+def _fork_disponivel() -> bool:
+    return "fork" in mp.get_all_start_methods()
+
+
+def _processos_permitidos() -> bool:
+    """Processos só a partir da thread principal, fora de um pool: fork com outras threads rodando pode travar."""
+    return not _FILHO and _ORCAMENTO.get() is None and threading.current_thread() is threading.main_thread()
+
+
+def _iniciar_filho(df=None) -> None:
+    global _DF, _FILHO
+    _DF, _FILHO = df, True
+
+
+def _workers(workers: int, n: int) -> int:
+    orcamento = 1 if _FILHO else _ORCAMENTO.get()
+    workers = workers or WORKERS
+    if orcamento is not None:
+        workers = min(workers, orcamento)
+    return min(workers, n)
+
+
+def _repartir(func, workers: int):
+    """`func` num dos `workers`: as chamadas aninhadas dividem o orçamento de threads entre eles."""
+    fatia = max(1, (_ORCAMENTO.get() or max(WORKERS, workers)) // workers)
+
+    def rodar(*args):
+        token = _ORCAMENTO.set(fatia)
+        try:
+            return func(*args)
+        finally:
+            _ORCAMENTO.reset(token)
+    return rodar
+
+
+def _chamar_no_filho(args):
+    func, coluna = args
+    return func(_DF, coluna)
+
+
+def _acompanhar(resultados, total: int) -> list:
+    """Junta os resultados em ordem, avisando o progresso (e o cancelamento) da tarefa atual (utils.tarefas)."""
+    out = []
+    for r in resultados:
+        out.append(r)
+        tarefas.progresso(len(out), total)
+    return out
+
+
+def mapear(func, itens, workers: int = None, backend: str = None) -> list:
+    """
+    Aplica `func` a cada item em paralelo; os resultados voltam na ordem de entrada.
+    Dentro de um worker (aninhado), usa só a parte do orçamento de threads que coube a ele.
+    """
+    itens = list(itens)
+    workers = _workers(workers, len(itens))
+    if workers <= 1:
+        return _acompanhar((func(i) for i in itens), len(itens))
+    if (backend or BACKEND) == "process" and _processos_permitidos():
+        with ProcessPoolExecutor(max_workers=workers, initializer=_iniciar_filho) as ex:
+            return _acompanhar(ex.map(func, itens), len(itens))
+    # threads herdam a pergunta/span atuais (utils.instrumentacao)
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return _acompanhar(ex.map(instrumentacao.contexto(_repartir(func, workers)), itens), len(itens))
+
+
+def por_coluna(df, func, colunas=None, workers: int = None, backend: str = None) -> list:
+    """
+    Calcula `func(df, coluna)` para cada coluna, na ordem de `colunas` (padrão: todas).
+    - backend "thread": as threads leem as colunas do próprio df (NumPy/pandas liberam o GIL
+      nas varreduras vetorizadas).
+    - backend "process": filhos criados por fork herdam o df (copy-on-write, sem serializar
+      os dados); `func` precisa ser uma função de módulo. Sem fork, ou fora da thread principal
+      (ex.: numa tarefa de responder_lote ou de utils.tarefas), cai para threads.
+    Aninhada em outro pool (ex.: responder_lote), divide o orçamento de threads com ele.
+    """
+    colunas = list(df.columns if colunas is None else colunas)
+    workers = _workers(workers, len(colunas))
+    backend = backend or BACKEND
+    if workers <= 1:
+        return _acompanhar((func(df, c) for c in colunas), len(colunas))
+    if backend == "process" and _fork_disponivel() and _processos_permitidos():
+        with ProcessPoolExecutor(max_workers=workers, mp_context=mp.get_context("fork"),
+                                 initializer=_iniciar_filho, initargs=(df,)) as ex:
+            return _acompanhar(ex.map(_chamar_no_filho, [(func, c) for c in colunas],
+                                      chunksize=max(1, len(colunas) // (4 * workers))), len(colunas))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        return _acompanhar(ex.map(instrumentacao.contexto(_repartir(lambda c: func(df, c), workers)), colunas),
+                           len(colunas))
@@ -0,0 +1,119 @@
+# utils/perfil.py
+import numpy as np
+import pandas as pd
+
+from utils import dataset
+from utils.cache import LRUCache
+
+_PERFIS = LRUCache(maxsize=8, nome="perfil")
+
+
+def _quantis(x: np.ndarray, qs):
+    """Quantis com interpolação linear (igual ao pandas) usando um único np.partition."""
+    n = x.size
+    pos = [q * (n - 1) for q in qs]
+    idx = sorted({int(np.floor(p)) for p in pos} | {int(np.ceil(p)) for p in pos})
+    x.partition(idx)
+    out = []
+    for p in pos:
+        lo, hi = int(np.floor(p)), int(np.ceil(p))
+        out.append(x[lo] + (x[hi] - x[lo]) * (p - lo))
+    return out
+
+
+class DatasetProfile:
+    """
+    Estatísticas por coluna calculadas uma única vez por dataset, em passadas vetorizadas
+    (NumPy) sobre o array contíguo de cada coluna numérica. As funções de `eda` viram consultas.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        num = df.select_dtypes("number")
+        self.linhas = len(df)
+        self.colunas = list(num.columns)
+        self.nao_nulos = pd.Series({c: int(df[c].count()) for c in df.columns}, dtype="int64")
+
+        campos = ("n", "min", "max", "mean", "median", "std", "var", "q1", "q3", "lim_inf", "lim_sup", "n_outliers")
+        stats = {k: [] for k in campos}
+        linha_com_out = np.zeros(self.linhas, dtype=bool)
+
+        # 1ª passada: tudo por coluna + máscara 1D de linhas com algum outlier
+        for c in self.colunas:
+            v = num[c].to_numpy(dtype="float64", na_value=np.nan)
+            x = v[~np.isnan(v)]
+            n = x.size
+            stats["n"].append(n)
+            if n == 0:
+                for k in campos[1:]:
+                    stats[k].append(np.nan)
+                stats["n_outliers"][-1] = 0
+                continue
+            inteiro = pd.api.types.is_integer_dtype(num[c])
+            mn, mx = x.min(), x.max()
+            stats["min"].append(int(mn) if inteiro else mn)
+            stats["max"].append(int(mx) if inteiro else mx)
+            media = x.sum() / n
+            var = np.square(x - media).sum() / (n - 1) if n > 1 else np.nan
+            stats["mean"].append(media)
+            stats["var"].append(var)
+            stats["std"].append(np.sqrt(var))
+            q1, med, q3 = _quantis(x, (0.25, 0.5, 0.75))
+            iqr = q3 - q1
+            lim_inf, lim_sup = q1 - 1.5 * iqr, q3 + 1.5 * iqr
+            fora = (v < lim_inf) | (v > lim_sup)
+            linha_com_out |= fora
+            stats["median"].append(med)
+            stats["q1"].append(q1)
+            stats["q3"].append(q3)
+            stats["lim_inf"].append(lim_inf)
+            stats["lim_sup"].append(lim_sup)
+            stats["n_outliers"].append(int(fora.sum()))
+
+        self.stats = pd.DataFrame(stats, index=self.colunas)
+
+        # 2ª passada: média/desvio sem as linhas que têm outlier em qualquer coluna
+        fica = ~linha_com_out
+        sem_media, sem_std = [], []
+        for c in self.colunas:
+            x = num[c].to_numpy(dtype="float64", na_value=np.nan)[fica]
+            x = x[~np.isnan(x)]
+            n = x.size
+            media = x.sum() / n if n else np.nan
+            sem_media.append(media)
+            sem_std.append(np.sqrt(np.square(x - media).sum() / (n - 1)) if n > 1 else np.nan)
+        self.stats["mean_sem_out"] = sem_media
+        self.stats["std_sem_out"] = sem_std
+
+    # -------- consultas no formato das funções de utils/eda.py --------
+    def intervalo(self) -> pd.DataFrame:
+        return self.stats[["min", "max"]].copy()
+
+    def tendencia_central(self) -> pd.DataFrame:
+        return self.stats[["mean", "median"]].rename(columns={"mean": "Média", "median": "Mediana"})
+
+    def variabilidade(self) -> pd.DataFrame:
+        return self.stats[["std", "var"]].copy()
+
+    def outliers_iqr(self) -> pd.Series:
+        if not self.colunas:
+            return pd.Series(dtype=float)
+        pct = self.stats["n_outliers"] / self.linhas * 100
+        return pct.sort_values(ascending=False).round(2)
+
+    def efeito_outliers(self) -> pd.DataFrame:
+        if not self.colunas:
+            return pd.DataFrame()
+        comp = pd.DataFrame({
+            "mean_com_out": self.stats["mean"],
+            "mean_sem_out": self.stats["mean_sem_out"],
+            "std_com_out":  self.stats["std"],
+            "std_sem_out":  self.stats["std_sem_out"]
+        })
+        comp["delta_mean_abs"] = (comp["mean_sem_out"] - comp["mean_com_out"]).abs()
+        comp["delta_std_abs"]  = (comp["std_sem_out"]  - comp["std_com_out"]).abs()
+        return comp
+
+
+def perfil(df: pd.DataFrame) -> DatasetProfile:
+    """DatasetProfile do DataFrame, construído uma vez por conteúdo (cache LRU)."""
+    return _PERFIS.get_or_compute(dataset.chave(df), lambda: DatasetProfile(df))
@@ -0,0 +1,186 @@
+# utils/roteador.py
+import sys
+import unicodedata
+from collections import deque
+from dataclasses import dataclass, field
+
+from utils import instrumentacao
+from utils.cache import LRUCache
+
+# Intenções e termos (já normalizados: minúsculos, sem acento). Um termo casa no início de
+# uma palavra e vale como prefixo ("correlac" casa "correlação"). A ordem do dicionário é a
+# prioridade do eda.responder, usada para desempatar pontuações iguais.
+INTENCOES = {
+    "outliers": ["outlier", "atipic"],
+    "tendencia_central": ["tendencia central", "medidas de tendencia", "media", "mediana"],
+    "intervalo": ["intervalo", "min", "max", "minimo", "maximo"],
+    "variabilidade": ["desvio", "varian"],
+    "frequencias": ["frequ", "moda"],
+    "correlacao": ["correlac"],
+    "dispersao": ["dispers", "scatter"],
+    "temporal": ["tendenc", "temporal", "serie"],
+    "clusters": ["cluster", "agrup"],
+    "influencia": ["influen", "importanc"],
+    "distribuicao": ["distribui"],
+    "histograma": ["hist", "histograma"],
+    "tabela_cruzada": ["tabela cruzada", "crosstab"],
+    "tipos": ["tipo", "categ", "numer", "dtype"],
+}
+
+# Sinônimo → termo canônico (herda a intenção do termo)
+SINONIMOS = {
+    "mean": "media",
+    "average": "media",
+    "median": "mediana",
+    "anomal": "outlier",
+    "valores extremos": "outlier",
+    "amplitude": "intervalo",
+    "range": "intervalo",
+    "std": "desvio",
+    "variance": "varian",
+    "contagem": "frequ",
+    "mais comuns": "frequ",
+    "correlation": "correlac",
+    "relacao entre": "correlac",
+    "ao longo do tempo": "temporal",
+    "evolucao": "temporal",
+    "trend": "tendenc",
+    "kmeans": "cluster",
+    "segment": "agrup",
+    "grupos": "agrup",
+    "importance": "importanc",
+    "contingencia": "tabela cruzada",
+    "cruzamento": "tabela cruzada",
+}
+
+_PRIORIDADE = {nome: i for i, nome in enumerate(INTENCOES)}
+_INDICES = LRUCache(maxsize=32, nome="roteador")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculo, sem acentos e com espaços colapsados."""
+    s = unicodedata.normalize("NFD", str(texto or "").strip().lower())
+    s = "".join(ch for ch in s if unicodedata.category(ch) != "Mn")
+    return " ".join(s.split())
+
+
+class Automato:
+    """Aho-Corasick sobre um dicionário termo → valor; `buscar` percorre o texto uma vez."""
+
+    def __init__(self, termos: dict):
+        self._filhos = [{}]
+        self._falha = [0]
+        self._saida = [[]]
+        for termo, valor in termos.items():
+            estado = 0
+            for ch in termo:
+                prox = self._filhos[estado].get(ch)
+                if prox is None:
+                    prox = len(self._filhos)
+                    self._filhos[estado][ch] = prox
+                    self._filhos.append({})
+                    self._falha.append(0)
+                    self._saida.append([])
+                estado = prox
+            self._saida[estado].append((len(termo), valor))
+
+        # ligações de falha em largura; cada estado herda as saídas do seu sufixo
+        fila = deque(self._filhos[0].values())
+        while fila:
+            estado = fila.popleft()
+            for ch, prox in self._filhos[estado].items():
+                f = self._falha[estado]
+                while f and ch not in self._filhos[f]:
+                    f = self._falha[f]
+                self._falha[prox] = self._filhos[f].get(ch, 0)
+                self._saida[prox] = self._saida[prox] + self._saida[self._falha[prox]]
+                fila.append(prox)
+
+    def buscar(self, texto: str):
+        """Gera (início, fim, valor) de cada ocorrência de termo no texto."""
+        estado = 0
+        filhos, falha, saida = self._filhos, self._falha, self._saida
+        for i, ch in enumerate(texto):
+            while estado and ch not in filhos[estado]:
+                estado = falha[estado]
+            estado = filhos[estado].get(ch, 0)
+            for tam, valor in saida[estado]:
+                yield i + 1 - tam, i + 1, valor
+
+
+def _termos() -> dict:
+    termos = {t: nome for nome, lista in INTENCOES.items() for t in lista}
+    for sinonimo, canonico in SINONIMOS.items():
+        termos[sinonimo] = termos[canonico]
+    return termos
+
+
+_AUTOMATO = Automato(_termos())
+
+
+def _inicio_palavra(texto: str, i: int) -> bool:
+    return i == 0 or not texto[i - 1].isalnum()
+
+
+def _fim_palavra(texto: str, i: int) -> bool:
+    return i == len(texto) or not texto[i].isalnum()
+
+
+@dataclass
+class Rota:
+    """Intenções candidatas (maior pontuação primeiro) e colunas citadas na pergunta."""
+    intencoes: list = field(default_factory=list)
+    colunas: list = field(default_factory=list)
+
+    @property
+    def intencao(self):
+        return self.intencoes[0][0] if self.intencoes else None
+
+
+def indice_colunas(colunas) -> Automato:
+    """Autômato dos nomes de coluna normalizados (um por conjunto de colunas, em cache)."""
+    # pd.Index é imutável: a identidade basta como chave (sem percorrer milhares de nomes).
+    # O pandas não é importado aqui: se ainda não foi carregado, `colunas` não é um Index.
+    pd = sys.modules.get("pandas")
+    por_id = pd is not None and isinstance(colunas, pd.Index)
+    chave = ("index", id(colunas)) if por_id else ("nomes", tuple(colunas))
+    achado = _INDICES.get(chave)
+    if achado is not None and (not por_id or achado[0] is colunas):
+        return achado[1]
+    nomes = {}
+    for c in colunas:
+        nomes.setdefault(normalizar(c), c)
+    nomes.pop("", None)
+    automato = Automato(nomes)
+    _INDICES.set(chave, (colunas, automato))  # guarda o Index: o id não é reaproveitado
+    return automato
+
+
+def _colunas_citadas(q: str, colunas) -> list:
+    """Colunas citadas como palavras inteiras, na ordem do texto; a mais longa vence sobreposições."""
+    achados = sorted(((ini, -(fim - ini), col) for ini, fim, col in indice_colunas(colunas).buscar(q)
+                      if _inicio_palavra(q, ini) and _fim_palavra(q, fim)))
+    citadas, livre = [], 0
+    for ini, menos_tam, col in achados:
+        if ini >= livre and col not in citadas:
+            citadas.append(col)
+            livre = ini - menos_tam
+    return citadas
+
+
+@instrumentacao.medir("roteamento")
+def rotear(pergunta: str, colunas=None) -> Rota:
+    """
+    Roteia a pergunta numa única passada pelo texto normalizado.
+    - pontuação de cada intenção: tamanho do termo mais específico que casou
+      (ex.: "tendencia central" vence "tendenc"); empate → prioridade de INTENCOES
+    - colunas: nomes do DataFrame a procurar na pergunta (opcional)
+    """
+    q = normalizar(pergunta)
+    pontos = {}
+    for ini, fim, nome in _AUTOMATO.buscar(q):
+        if _inicio_palavra(q, ini) and fim - ini > pontos.get(nome, 0):
+            pontos[nome] = fim - ini
+    ordem = sorted(pontos, key=lambda nome: (-pontos[nome], _PRIORIDADE[nome]))
+    citadas = _colunas_citadas(q, colunas) if colunas is not None else []
+    return Rota([(nome, pontos[nome]) for nome in ordem], citadas)
@@ -0,0 +1,319 @@
+# utils/streaming.py
+import io
+import math
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset, eda
+from utils.cache import LRUCache
+from utils.contagem import ContagemTopK
+
+_PERFIS = LRUCache(maxsize=4, nome="streaming")
+
+
+# ---------------------- Acumuladores mescláveis ----------------------
+class Welford:
+    """Contagem, média e variância (Welford/Chan) + mínimo/máximo; mesclável entre blocos."""
+
+    def __init__(self):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def atualizar(self, valores: np.ndarray) -> None:
+        v = valores[~np.isnan(valores)]
+        if v.size == 0:
+            return
+        bloco = Welford()
+        bloco.n = int(v.size)
+        bloco.media = float(v.mean())
+        bloco.m2 = float(np.square(v - bloco.media).sum())
+        bloco.min = float(v.min())
+        bloco.max = float(v.max())
+        self.merge(bloco)
+
+    def merge(self, outro: "Welford") -> "Welford":
+        if outro.n == 0:
+            return self
+        n = self.n + outro.n
+        delta = outro.media - self.media
+        self.media += delta * outro.n / n
+        self.m2 += outro.m2 + delta * delta * self.n * outro.n / n
+        self.n = n
+        self.min = min(self.min, outro.min)
+        self.max = max(self.max, outro.max)
+        return self
+
+    @property
+    def var(self) -> float:
+        return self.m2 / (self.n - 1) if self.n > 1 else np.nan
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.var) if self.n > 1 else np.nan
+
+
+class QuantilSketch:
+    """
+    Sketch de quantis no estilo KLL: guarda O(k·log(n/k)) valores com erro de posto ~1/k.
+    Cada nível h guarda itens com peso 2^h; níveis cheios são compactados (metade sobe).
+    """
+
+    def __init__(self, k: int = 256, random_state: int = 42):
+        self.k = k
+        self.n = 0
+        self.niveis = [np.empty(0)]
+        self._rng = np.random.default_rng(random_state)
+
+    def _capacidade(self, h: int) -> int:
+        profundidade = len(self.niveis) - 1 - h
+        return max(8, int(math.ceil(self.k * (2 / 3) ** profundidade)))
+
+    def atualizar(self, valores: np.ndarray) -> None:
+        v = valores[~np.isnan(valores)]
+        if v.size == 0:
+            return
+        self.n += int(v.size)
+        self.niveis[0] = np.concatenate([self.niveis[0], v])
+        self._compactar()
+
+    def merge(self, outro: "QuantilSketch") -> "QuantilSketch":
+        while len(self.niveis) < len(outro.niveis):
+            self.niveis.append(np.empty(0))
+        for h, nivel in enumerate(outro.niveis):
+            self.niveis[h] = np.concatenate([self.niveis[h], nivel])
+        self.n += outro.n
+        self._compactar()
+        return self
+
+    def _compactar(self) -> None:
+        h = 0
+        while h < len(self.niveis):
+            nivel = self.niveis[h]
+            if nivel.size > self._capacidade(h):
+                if h + 1 == len(self.niveis):
+                    self.niveis.append(np.empty(0))
+                nivel = np.sort(nivel)
+                # número par de itens sobe (um a cada dois, offset aleatório); a sobra fica
+                par = nivel.size - (nivel.size % 2)
+                sobe = nivel[int(self._rng.integers(2)):par:2]
+                self.niveis[h] = nivel[par:]
+                self.niveis[h + 1] = np.concatenate([self.niveis[h + 1], sobe])
+            h += 1
+
+    def _pesos(self):
+        valores = np.concatenate(self.niveis)
+        pesos = np.concatenate([np.full(n.size, 2.0 ** h) for h, n in enumerate(self.niveis)])
+        ordem = np.argsort(valores, kind="stable")
+        return valores[ordem], pesos[ordem]
+
+    def quantil(self, q: float) -> float:
+        if self.n == 0:
+            return np.nan
+        valores, pesos = self._pesos()
+        acumulado = np.cumsum(pesos)
+        i = int(np.searchsorted(acumulado, q * acumulado[-1], side="left"))
+        return float(valores[min(i, valores.size - 1)])
+
+    def cdf(self, x: float, estrito: bool = False) -> float:
+        """Fração estimada de valores <= x (ou < x, se estrito)."""
+        if self.n == 0:
+            return np.nan
+        valores, pesos = self._pesos()
+        i = np.searchsorted(valores, x, side="left" if estrito else "right")
+        return float(pesos[:i].sum() / pesos.sum())
+
+
+class Reservatorio:
+    """Amostra uniforme de tamanho fixo: mantém as linhas com as menores chaves aleatórias."""
+
+    def __init__(self, tamanho: int, random_state: int = 42):
+        self.tamanho = tamanho
+        self._rng = np.random.default_rng(random_state)
+        self._chaves = np.empty(0)
+        self._posicoes = np.empty(0, dtype="int64")
+        self._linhas = None
+        self._vistas = 0
+
+    def atualizar(self, bloco: pd.DataFrame) -> None:
+        chaves = self._rng.random(len(bloco))
+        posicoes = np.arange(self._vistas, self._vistas + len(bloco))
+        self._vistas += len(bloco)
+        if self._chaves.size >= self.tamanho:
+            # só entram linhas que batem a pior chave atual
+            entra = chaves < self._chaves.max()
+            bloco, chaves, posicoes = bloco.iloc[np.flatnonzero(entra)], chaves[entra], posicoes[entra]
+            if chaves.size == 0:
+                return
+        linhas = bloco if self._linhas is None else pd.concat([self._linhas, bloco])
+        chaves = np.concatenate([self._chaves, chaves])
+        posicoes = np.concatenate([self._posicoes, posicoes])
+        if chaves.size > self.tamanho:
+            fica = np.sort(np.argpartition(chaves, self.tamanho)[:self.tamanho])
+            linhas, chaves, posicoes = linhas.iloc[fica], chaves[fica], posicoes[fica]
+        self._linhas, self._chaves, self._posicoes = linhas, chaves, posicoes
+
+    @property
+    def amostra(self) -> pd.DataFrame:
+        """Linhas sorteadas na ordem original do arquivo."""
+        if self._linhas is None:
+            return pd.DataFrame()
+        ordem = np.argsort(self._posicoes, kind="stable")
+        return self._linhas.iloc[ordem].reset_index(drop=True)
+
+
+# ---------------------- Perfil em passagem única ----------------------
+class PerfilStreaming:
+    """
+    Resumos de `eda` (tipos, intervalo, tendência central, variabilidade, frequências e outliers IQR)
+    calculados em uma única passada por blocos, com memória independente do tamanho do arquivo.
+    """
+
+    def __init__(self, amostra: int = 50_000, k_quantis: int = 1024, capacidade_topk: int = 1000,
+                 random_state: int = 42):
+        self.linhas = 0
+        self.colunas = None
+        self.tcol = None
+        self._k_quantis = k_quantis
+        self._capacidade_topk = capacidade_topk
+        self._random_state = random_state
+        self._tipos = {}
+        self._nao_nulos = {}
+        self._stats = {}
+        self._quantis = {}
+        self._topk = {}
+        self._reservatorio = Reservatorio(amostra, random_state)
+
+    @staticmethod
+    def _tipo(s: pd.Series) -> str:
+        if pd.api.types.is_bool_dtype(s):
+            return "bool"
+        if pd.api.types.is_numeric_dtype(s):
+            return "num"
+        if pd.api.types.is_datetime64_any_dtype(s):
+            return "tempo"
+        return "cat"
+
+    def atualizar(self, bloco: pd.DataFrame) -> None:
+        if self.colunas is None:
+            self.colunas = list(bloco.columns)
+        tcol = dataset.preparar_tempo(bloco)
+        self.tcol = self.tcol or tcol
+        self.linhas += len(bloco)
+
+        for c in self.colunas:
+            s = bloco[c]
+            self._tipos.setdefault(c, set()).add(self._tipo(s))
+            self._nao_nulos[c] = self._nao_nulos.get(c, 0) + int(s.notna().sum())
+            self._topk.setdefault(c, ContagemTopK(self._capacidade_topk)).atualizar(s)
+            if self._tipo(s) == "num":
+                v = s.to_numpy(dtype="float64", na_value=np.nan)
+                self._stats.setdefault(c, Welford()).atualizar(v)
+                self._quantis.setdefault(c, QuantilSketch(self._k_quantis, self._random_state)).atualizar(v)
+
+        self._reservatorio.atualizar(bloco)
+
+    # -------- tabelas no mesmo formato de utils/eda.py --------
+    @property
+    def amostra(self) -> pd.DataFrame:
+        return self._reservatorio.amostra
+
+    def _numericas(self):
+        # blocos com tipos diferentes (ex.: texto no meio de números) tiram a coluna das estatísticas
+        return [c for c in self.colunas if self._tipos[c] == {"num"}]
+
+    def tipos(self):
+        categorias = []
+        for c in self.colunas:
+            t = self._tipos[c]
+            if t <= {"num", "bool"}:
+                categorias.append("Numérica")
+            elif t == {"tempo"}:
+                categorias.append("Data/Tempo")
+            else:
+                categorias.append("Categórica")
+        amostra = self.amostra
+        dtypes = [str(amostra[c].dtype) if c in amostra else "object" for c in self.colunas]
+        nao_nulos = np.array([self._nao_nulos[c] for c in self.colunas])
+        nulos_pct = ((1 - nao_nulos / max(self.linhas, 1)) * 100).round(2)
+        return eda._tabela_tipos(self.colunas, dtypes, categorias, nao_nulos, nulos_pct)
+
+    def intervalo(self) -> pd.DataFrame:
+        cols = self._numericas()
+        return pd.DataFrame({"min": [self._stats[c].min for c in cols],
+                             "max": [self._stats[c].max for c in cols]}, index=cols)
+
+    def tendencia_central(self) -> pd.DataFrame:
+        cols = self._numericas()
+        return pd.DataFrame({"Média": [self._stats[c].media for c in cols],
+                             "Mediana": [self._quantis[c].quantil(0.5) for c in cols]}, index=cols)
+
+    def variabilidade(self) -> pd.DataFrame:
+        cols = self._numericas()
+        return pd.DataFrame({"std": [self._stats[c].std for c in cols],
+                             "var": [self._stats[c].var for c in cols]}, index=cols)
+
+    def frequencias(self, topn=10):
+        out = {}
+        for c in self.colunas:
+            vc = self._topk[c].top(topn).rename("count")
+            vc.index.name = c
+            if not vc.empty:
+                out[c] = vc
+        return out
+
+    def outliers_iqr(self) -> pd.Series:
+        """% de linhas fora de [Q1 - 1.5·IQR, Q3 + 1.5·IQR], estimado pela CDF do sketch."""
+        cols = self._numericas()
+        if not cols or self.linhas == 0:
+            return pd.Series(dtype=float)
+        pct = {}
+        for c in cols:
+            sk = self._quantis[c]
+            q1, q3 = sk.quantil(0.25), sk.quantil(0.75)
+            iqr = q3 - q1
+            fora = sk.cdf(q1 - 1.5 * iqr, estrito=True) + (1 - sk.cdf(q3 + 1.5 * iqr))
+            pct[c] = fora * sk.n / self.linhas * 100
+        return pd.Series(pct).sort_values(ascending=False).round(2)
+
+
+# ---------------------- Leitura por blocos ----------------------
+def _abrir(arquivo):
+    if isinstance(arquivo, (bytes, bytearray, memoryview)):
+        return io.BytesIO(arquivo)
+    if hasattr(arquivo, "seek"):
+        arquivo.seek(0)
+    return arquivo
+
+
+def linhas_por_bloco(arquivo, memoria_mb: int) -> int:
+    """Estima quantas linhas cabem em 1/4 do orçamento de memória (o resto fica para parser e amostra)."""
+    cabeca = pd.read_csv(_abrir(arquivo), nrows=1000, low_memory=False)
+    bytes_linha = max(cabeca.memory_usage(deep=True).sum() / max(len(cabeca), 1), 1)
+    return max(1000, int(memoria_mb * 1024 * 1024 / 4 / bytes_linha))
+
+
+def perfilar_csv(arquivo, memoria_mb: int = 512, amostra: int = 50_000, k_quantis: int = 1024,
+                 random_state: int = 42) -> PerfilStreaming:
+    """
+    Lê o CSV em blocos e devolve um PerfilStreaming (uma passada, memória limitada por `memoria_mb`).
+    A amostra (reservatório) serve para gráficos e clusterização.
+    """
+    bloco = linhas_por_bloco(arquivo, memoria_mb)
+    # a amostra também respeita o orçamento (no máximo outro 1/4)
+    perfil = PerfilStreaming(amostra=min(amostra, bloco), k_quantis=k_quantis, random_state=random_state)
+    for parte in pd.read_csv(_abrir(arquivo), chunksize=bloco):
+        perfil.atualizar(parte)
+    return perfil
+
+
+def carregar_streaming(arquivo, h: str = None, memoria_mb: int = 512, amostra: int = 50_000) -> PerfilStreaming:
+    """Como `perfilar_csv`, mas guardando o perfil em cache pelo hash do conteúdo."""
+    h = h or dataset.hash_conteudo(arquivo)
+    return _PERFIS.get_or_compute(
+        (h, memoria_mb, amostra),
+        lambda: perfilar_csv(arquivo, memoria_mb=memoria_mb, amostra=amostra)
+    )
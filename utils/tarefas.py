@@ -0,0 +1,150 @@
+# utils/tarefas.py
+"""
+Cálculos pesados em segundo plano (clusters, correlação, outliers, gráficos de distribuição):
+o script do Streamlit agenda a tarefa, termina o rerun e a sessão continua usável.
+
+- `submeter(func, chave)` roda `func()` num pool de threads e devolve uma Tarefa (id, estado,
+  progresso, cancelamento; done()/result() como um Future). Pedidos iguais (mesma `chave`)
+  enquanto a tarefa não termina recebem a mesma Tarefa: um cálculo só, para todas as sessões.
+- Dentro da tarefa, `progresso(feito, total, etapa)` atualiza a barra e é também o ponto de
+  cancelamento (levanta Cancelada). Fora de uma tarefa não faz nada.
+"""
+import contextvars
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Tarefas rodando ao mesmo tempo (as demais esperam na fila)
+WORKERS = int(os.getenv("AGENTE_EDA_TAREFAS", "2"))
+
+_POOL = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="agente-eda-tarefa")
+_ATIVAS = {}  # chave → Tarefa ainda não terminada
+_LOCK = threading.Lock()
+_IDS = itertools.count(1)
+_ATUAL = contextvars.ContextVar("tarefa", default=None)
+
+
+class Cancelada(Exception):
+    """Levantada no ponto de progresso seguinte ao pedido de cancelamento."""
+
+
+class Tarefa:
+    """Cálculo em segundo plano; compartilhado por todos que pediram a mesma chave."""
+
+    def __init__(self, nome: str, chave):
+        self.id = f"t{next(_IDS)}"
+        self.nome, self.chave = nome, chave
+        self.progresso = 0.0
+        self.etapa = None
+        self.assinantes = 1
+        self._cancelar = threading.Event()
+        self._futuro = None
+        self._rodando = False
+
+    def done(self) -> bool:
+        return self._futuro.done()
+
+    def result(self, timeout: float = None):
+        return self._futuro.result(timeout)
+
+    @property
+    def cancelada(self) -> bool:
+        if not self._futuro.done():
+            return False
+        return self._futuro.cancelled() or isinstance(self._futuro.exception(), Cancelada)
+
+    @property
+    def erro(self):
+        """Exceção do cálculo (None se terminou bem, foi cancelada ou ainda está rodando)."""
+        if not self._futuro.done() or self.cancelada:
+            return None
+        return self._futuro.exception()
+
+    @property
+    def estado(self) -> str:
+        if not self._futuro.done():
+            return "cancelando" if self._cancelar.is_set() else "rodando" if self._rodando else "na fila"
+        return "cancelada" if self.cancelada else "erro" if self.erro is not None else "concluída"
+
+    def cancelar(self) -> None:
+        """
+        Desiste da tarefa. Compartilhada, ela só para quando todos os assinantes desistem.
+        Na fila, sai sem rodar; rodando, para no próximo ponto de progresso.
+        """
+        with _LOCK:
+            self.assinantes -= 1
+            if self.assinantes > 0:
+                return
+            if _ATIVAS.get(self.chave) is self:
+                del _ATIVAS[self.chave]
+        self._cancelar.set()
+        self._futuro.cancel()
+
+    def __repr__(self) -> str:
+        return f"Tarefa({self.id}, {self.nome!r}, {self.estado}, {self.progresso:.0%})"
+
+
+def _rodar(tarefa: Tarefa, func):
+    token = _ATUAL.set(tarefa)
+    tarefa._rodando = True
+    try:
+        verificar()
+        return func()
+    finally:
+        _ATUAL.reset(token)
+
+
+def _encerrar(tarefa: Tarefa) -> None:
+    with _LOCK:
+        if _ATIVAS.get(tarefa.chave) is tarefa:
+            del _ATIVAS[tarefa.chave]
+    if not tarefa._futuro.cancelled() and tarefa._futuro.exception() is None:
+        tarefa.progresso = 1.0
+
+
+def submeter(func, chave=None, nome: str = "tarefa") -> Tarefa:
+    """
+    Agenda `func()` e devolve a Tarefa. Com `chave`, reaproveita a tarefa igual que ainda não
+    terminou. `func` roda no contexto de quem agendou (ex.: a pergunta instrumentada).
+    """
+    with _LOCK:
+        existente = _ATIVAS.get(chave) if chave is not None else None
+        if existente is not None and not existente.done():
+            existente.assinantes += 1
+            return existente
+        tarefa = Tarefa(nome, chave)
+        ctx = contextvars.copy_context()
+        tarefa._futuro = _POOL.submit(ctx.run, _rodar, tarefa, func)
+        if chave is not None:
+            _ATIVAS[chave] = tarefa
+    tarefa._futuro.add_done_callback(lambda _: _encerrar(tarefa))
+    return tarefa
+
+
+def verificar() -> None:
+    """Levanta Cancelada se a tarefa atual foi cancelada."""
+    t = _ATUAL.get()
+    if t is not None and t._cancelar.is_set():
+        raise Cancelada(t.id)
+
+
+def etapa(nome: str) -> None:
+    """Começa uma etapa da tarefa atual (nome na barra, progresso zerado); no-op fora de uma."""
+    t = _ATUAL.get()
+    if t is None:
+        return
+    t.etapa, t.progresso = nome, 0.0
+    verificar()
+
+
+def progresso(feito, total, etapa: str = None) -> None:
+    """Atualiza o progresso da tarefa atual (no-op fora de uma) e verifica o cancelamento."""
+    t = _ATUAL.get()
+    if t is None:
+        return
+    t.progresso = min(max(feito / total, 0.0), 1.0) if total else 0.0
+    if etapa is not None:
+        t.etapa = etapa
+    if t._cancelar.is_set():
+        raise Cancelada(t.id)
@@ -0,0 +1,307 @@
+# utils/temporal.py
+"""
+Séries temporais sobre a coluna de tempo detectada, sem reordenar nem copiar o dataset:
+- o eixo (int64 em ns para datas; float para colunas numéricas como 'year' ou 'Time' em
+  segundos) é convertido uma vez por dataset/coluna, com os testes de ordem (monotônico, repetidos);
+- cada reamostragem (coluna, frequência) percorre os dados em blocos: o balde de cada linha
+  sai de um searchsorted nas bordas e contagem, soma, soma², mín. e máx. de todas as colunas
+  numéricas saem de reduceat sobre o bloco ordenado por balde. A memória fica em
+  O(bloco + baldes), limitada por MEMORIA_MB, então logs de 100M linhas cabem;
+- na mesma passada, somas de t, t², y e t·y dão a inclinação da tendência de cada coluna
+  (mínimos quadrados sobre todas as linhas);
+- médias/desvios móveis e a decomposição sazonal saem da série reamostrada.
+"""
+import os
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from utils import dataset
+from utils.cache import LRUCache
+
+_EIXOS = LRUCache(maxsize=8, nome="temporal.eixo")
+_SERIES = LRUCache(maxsize=32, nome="temporal.serie")
+
+# Memória de trabalho de cada bloco (as colunas numéricas do bloco em float64)
+MEMORIA_MB = int(os.getenv("AGENTE_EDA_TEMPORAL_MEMORIA_MB", "256"))
+# Baldes da frequência automática (≈ pontos do gráfico)
+MAX_BALDES = 500
+# Frequências tentadas, da mais fina para a mais grossa, com a duração aproximada de cada uma
+FREQUENCIAS = {"s": 1, "min": 60, "h": 3600, "D": 86_400, "W": 7 * 86_400,
+               "MS": 30.44 * 86_400, "QS": 91.31 * 86_400, "YS": 365.25 * 86_400}
+# Período sazonal padrão (em baldes) de cada frequência
+PERIODOS = {"s": 60, "min": 60, "h": 24, "D": 7, "W": 52, "MS": 12, "QS": 4}
+_NOMES_FREQ = {"s": "segundo", "min": "minuto", "h": "hora", "D": "dia", "W": "semana",
+               "MS": "mês", "QS": "trimestre", "YS": "ano"}
+_NS_DIA = 86_400 * 10**9
+
+
+@dataclass
+class Eixo:
+    """Coluna de tempo convertida (alinhada às linhas do df) e o que se sabe sobre a ordem."""
+    coluna: str
+    valores: np.ndarray  # int64 (ns) para datas; float64 para tempo numérico
+    datas: bool
+    validos: int
+    inicio: float
+    fim: float
+    monotonico: bool     # não decrescente (ignorando nulos): dispensa ordenar os blocos
+    repetidos: bool      # há instantes repetidos (só avaliado quando monotônico)
+    inteiro: bool = False  # tempo numérico só com valores inteiros (ex.: 'year')
+
+    def nulos(self, ini: int = 0, fim: int = None) -> np.ndarray:
+        v = self.valores[ini:fim]
+        return v == np.iinfo("int64").min if self.datas else np.isnan(v)
+
+    def como_serie(self, index=None) -> pd.Series:
+        """Tempo como Series (datetime64 ou float), para gráficos e tabelas."""
+        v = self.valores.view("datetime64[ns]") if self.datas else self.valores
+        return pd.Series(v, index=index, name=self.coluna)
+
+
+def _converter(s: pd.Series):
+    if pd.api.types.is_datetime64_any_dtype(s):
+        if getattr(s.dt, "tz", None) is not None:
+            s = s.dt.tz_convert(None)
+        return s.to_numpy(dtype="datetime64[ns]").view("int64"), True
+    if pd.api.types.is_numeric_dtype(s):
+        return s.to_numpy(dtype="float64", na_value=np.nan), False
+    # texto: convertido uma única vez aqui (o df do chamador não é alterado)
+    return pd.to_datetime(s, errors="coerce").to_numpy(dtype="datetime64[ns]").view("int64"), True
+
+
+def _bloco(colunas: int) -> int:
+    """Linhas por bloco para o bloco (colunas e seus quadrados + tempo, baldes e ordem) caber em MEMORIA_MB."""
+    return max(1 << 14, (MEMORIA_MB << 20) // (8 * (2 * colunas + 4)))
+
+
+def _criar_eixo(df: pd.DataFrame, tcol: str) -> Eixo:
+    valores, datas = _converter(df[tcol])
+    e = Eixo(tcol, valores, datas, 0, np.nan, np.nan, True, False, inteiro=not datas)
+    bloco, ultimo, minimos, maximos = _bloco(1), None, [], []
+    for ini in range(0, valores.size, bloco):
+        v = valores[ini:ini + bloco][~e.nulos(ini, ini + bloco)]
+        if not v.size:
+            continue
+        e.validos += v.size
+        minimos.append(v.min())
+        maximos.append(v.max())
+        if e.inteiro:
+            e.inteiro = bool((v == np.floor(v)).all())
+        if e.monotonico:
+            d = np.diff(v if ultimo is None else np.concatenate(([ultimo], v)))
+            e.monotonico = bool((d >= 0).all())
+            e.repetidos |= bool((d == 0).any())
+        ultimo = v[-1]
+    if e.validos:
+        # int (ns) exato para datas: float64 perderia a precisão de nanossegundos
+        e.inicio, e.fim = min(minimos).item(), max(maximos).item()
+    return e
+
+
+def eixo(df: pd.DataFrame, tcol: str) -> Eixo:
+    """Eixo de tempo de `tcol`, convertido uma vez por dataset."""
+    return _EIXOS.get_or_compute((dataset.chave(df), tcol), lambda: _criar_eixo(df, tcol))
+
+
+# ---------------------- Frequência e baldes ----------------------
+def frequencia_auto(e: Eixo, max_baldes: int = MAX_BALDES):
+    """
+    A frequência mais fina com no máximo `max_baldes` baldes. Tempo numérico: largura 1-2-5·10^k
+    (no mínimo 1 se os valores forem inteiros).
+    """
+    extensao = (e.fim - e.inicio) if e.validos else 0
+    if not e.datas:
+        if not extensao:
+            return 1.0
+        passo = extensao / max_baldes
+        base = 10 ** np.floor(np.log10(passo))
+        largura = float(next(m * base for m in (1, 2, 5, 10) if m * base >= passo))
+        return max(largura, 1.0) if e.inteiro else largura
+    segundos = extensao / 1e9
+    for freq, dur in FREQUENCIAS.items():
+        if segundos / dur <= max_baldes:
+            return freq
+    return "YS"
+
+
+def descrever(freq, tcol: str = "") -> str:
+    """Nome do balde para textos: 'dia', 'hora'... ou 'faixa de 500 de Time'."""
+    if isinstance(freq, str):
+        return _NOMES_FREQ.get(freq, freq)
+    return f"faixa de {freq:g}" + (f" de {tcol}" if tcol else "")
+
+
+def _bordas(e: Eixo, freq) -> np.ndarray:
+    """Início de cada balde (int64 ns ou float), para o searchsorted."""
+    if not e.datas:
+        origem = np.floor(e.inicio / freq) * freq
+        return origem + freq * np.arange(int((e.fim - origem) // freq) + 1)
+    limites = pd.Series(0, index=pd.to_datetime([e.inicio, e.fim]))
+    rotulos = limites.resample(freq, closed="left", label="left").size().index
+    return rotulos.as_unit("ns").asi8
+
+
+def _baldes(t: np.ndarray, bordas: np.ndarray) -> np.ndarray:
+    """Balde de cada instante: divisão inteira se as bordas (ns) forem equidistantes; senão searchsorted."""
+    passo = bordas[1] - bordas[0] if bordas.size > 1 and bordas.dtype.kind == "i" else 0
+    if passo and (np.diff(bordas) == passo).all():
+        return np.minimum((t - bordas[0]) // passo, bordas.size - 1).astype(np.intp)
+    return np.maximum(np.searchsorted(bordas, t, "right") - 1, 0)
+
+
+# ---------------------- Reamostragem ----------------------
+@dataclass
+class Serie:
+    """Série reamostrada de todas as colunas numéricas (baldes × colunas) e a tendência de cada uma."""
+    tcol: str
+    freq: object
+    n: pd.DataFrame
+    media: pd.DataFrame
+    dp: pd.DataFrame
+    minimo: pd.DataFrame
+    maximo: pd.DataFrame
+    tendencia: pd.DataFrame  # coluna → inclinação, r, variação no período
+
+    def movel(self, janela: int):
+        """Média e desvio móveis (em baldes) das médias de cada balde."""
+        rol = self.media.rolling(janela, min_periods=1)
+        return rol.mean(), rol.std()
+
+    def decompor(self, periodo: int = None):
+        """
+        Decomposição aditiva clássica (tendência = média móvel centrada de um período;
+        sazonal = média por posição no ciclo). None se houver menos de dois períodos.
+        """
+        periodo = periodo or PERIODOS.get(self.freq)
+        if not periodo or len(self.media) < 2 * periodo:
+            return None
+        y = self.media.interpolate(limit_area="inside")
+        tendencia = y.rolling(periodo, center=True, min_periods=periodo).mean()
+        if periodo % 2 == 0:  # período par: média 2×p (centrada entre dois baldes)
+            tendencia = tendencia.rolling(2, min_periods=2).mean().shift(-1)
+        desvio = y - tendencia
+        fase = np.arange(len(y)) % periodo
+        sazonal = desvio.groupby(fase).transform("mean")
+        sazonal -= sazonal.groupby(fase).first().mean()
+        return {"observado": y, "tendencia": tendencia, "sazonal": sazonal, "residuo": y - tendencia - sazonal}
+
+
+def _tendencia(e: Eixo, colunas, somas: np.ndarray, n_pares: np.ndarray) -> pd.DataFrame:
+    """Inclinação de mínimos quadrados a partir de Σt, Σt², Σy, Σy², Σty (centrados) de cada coluna."""
+    st, st2, sy, sy2, sty = somas
+    with np.errstate(invalid="ignore", divide="ignore"):
+        stt = st2 - st * st / n_pares
+        syy = sy2 - sy * sy / n_pares
+        sty_c = sty - st * sy / n_pares
+        inclinacao = sty_c / stt
+        r = sty_c / np.sqrt(stt * syy)
+    extensao = (e.fim - e.inicio) / (_NS_DIA if e.datas else 1)
+    return pd.DataFrame({
+        f"inclinacao_por_{'dia' if e.datas else 'unidade'}": inclinacao,
+        "r": r,
+        "variacao_no_periodo": inclinacao * extensao,
+        "n": n_pares.astype("int64"),
+    }, index=pd.Index(colunas, name="coluna"))
+
+
+def _reamostrar(df: pd.DataFrame, e: Eixo, freq) -> Serie:
+    colunas = [c for c in df.select_dtypes("number").columns if c != e.coluna]
+    bordas = _bordas(e, freq)
+    nb, k = bordas.size, len(colunas)
+    # acumuladores coluna × balde (linhas contíguas por coluna para os reduceat)
+    cont, soma, quad = np.zeros((k, nb)), np.zeros((k, nb)), np.zeros((k, nb))
+    mn, mx = np.full((k, nb), np.inf), np.full((k, nb), -np.inf)
+    somas, n_pares = np.zeros((5, k)), np.zeros(k)
+    ref = None  # valores de referência: centrar as somas evita cancelamento em Σy² − (Σy)²/n
+    escala_t = _NS_DIA if e.datas else 1.0
+
+    bloco = _bloco(k)
+    for ini in range(0, len(df), bloco):
+        fim = min(ini + bloco, len(df))
+        ok = ~e.nulos(ini, fim)
+        todos = bool(ok.all())
+        if not ok.any():
+            continue
+        t = e.valores[ini:fim] if todos else e.valores[ini:fim][ok]
+        X = np.empty((k, t.size))
+        for j, c in enumerate(colunas):
+            v = df[c].iloc[ini:fim].to_numpy(dtype="float64", na_value=np.nan)
+            X[j] = v if todos else v[ok]
+        if ref is None:
+            with np.errstate(invalid="ignore"):
+                ref = np.nan_to_num(np.nanmean(X, axis=1)) if t.size else np.zeros(k)
+        X -= ref[:, None]
+
+        validos = ~np.isnan(X)
+        if e.monotonico:
+            # tempo já ordenado: cada balde é uma fatia, achada com nb buscas (não uma por linha),
+            # e cada estatística é um reduceat sobre as fatias, todas as colunas juntas
+            inicios = np.searchsorted(t, bordas, "left")
+            fins = np.r_[inicios[1:], t.size]
+            ub = np.flatnonzero(fins > inicios)
+            inicios = inicios[ub]
+            mn[:, ub] = np.fmin(mn[:, ub], np.fmin.reduceat(X, inicios, axis=1))
+            mx[:, ub] = np.fmax(mx[:, ub], np.fmax.reduceat(X, inicios, axis=1))
+            X[~validos] = 0.0
+            X2 = X * X
+            cont[:, ub] += np.add.reduceat(validos, inicios, axis=1, dtype="int64")
+            soma[:, ub] += np.add.reduceat(X, inicios, axis=1)
+            quad[:, ub] += np.add.reduceat(X2, inicios, axis=1)
+        else:
+            # fora de ordem: balde por linha e acumulação por bincount / ufunc.at (sem ordenar)
+            b = _baldes(t, bordas)
+            for j in range(k):
+                np.fmin.at(mn[j], b, X[j])
+                np.fmax.at(mx[j], b, X[j])
+            X[~validos] = 0.0
+            X2 = X * X
+            for j in range(k):
+                cont[j] += np.bincount(b, weights=validos[j], minlength=nb)
+                soma[j] += np.bincount(b, weights=X[j], minlength=nb)
+                quad[j] += np.bincount(b, weights=X2[j], minlength=nb)
+
+        # tendência: t em dias (ou unidades) desde o início, só nas linhas em que y existe
+        tt = (t - e.inicio) / escala_t
+        st, st2 = tt.sum(), tt @ tt
+        for j in range(k):
+            if validos[j].all():
+                somas[0, j] += st
+                somas[1, j] += st2
+            else:
+                tj = tt[validos[j]]
+                somas[0, j] += tj.sum()
+                somas[1, j] += tj @ tj
+        somas[2] += X.sum(1)
+        somas[3] += X2.sum(1)
+        somas[4] += X @ tt
+        n_pares += validos.sum(1)
+
+    ref = (ref if ref is not None else np.zeros(k))[:, None]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = soma / cont
+        dp = np.sqrt(np.maximum(quad - soma * media, 0) / (cont - 1))
+    dp[cont < 2] = np.nan
+    mn[cont == 0], mx[cont == 0] = np.nan, np.nan
+    rotulos = pd.DatetimeIndex(bordas.view("datetime64[ns]")) if e.datas else pd.Index(bordas)
+    rotulos = rotulos.rename(e.coluna)
+
+    def quadro(a):
+        return pd.DataFrame(a.T, index=rotulos, columns=colunas)
+
+    return Serie(e.coluna, freq, quadro(cont.astype("int64")), quadro(media + ref), quadro(dp),
+                 quadro(mn + ref), quadro(mx + ref), _tendencia(e, colunas, somas, n_pares))
+
+
+def reamostrar(df: pd.DataFrame, tcol: str, freq=None, max_baldes: int = MAX_BALDES) -> Serie:
+    """
+    Todas as colunas numéricas de `df` agregadas por `freq` (alias do pandas, ex.: "h", "D", "W", "MS";
+    para tempo numérico, a largura do balde). Sem `freq`, a mais fina com até `max_baldes` baldes.
+    Cache por (dataset, coluna, frequência). None se a coluna de tempo não tiver valores válidos.
+    """
+    e = eixo(df, tcol)
+    if not e.validos:
+        return None
+    freq = freq or frequencia_auto(e, max_baldes)
+    return _SERIES.get_or_compute((dataset.chave(df), tcol, freq), lambda: _reamostrar(df, e, freq))